@@ -0,0 +1,45 @@
+"""
+ADMIN DASHBOARD - EXPORT BUILDERS (admin_dashboard/exports.py)
+--------------------------------------------------------------
+Row sources for the admin CSV exports, consumed by backend/exports.py either
+as a streamed response or as a background file. Each builder takes the
+request's filters as a plain dict and returns `(header, rows)`, where rows is
+a lazy `values_list` iterator.
+"""
+
+from django.db.models import Q
+
+from backend.exports import EXPORT_CHUNK_SIZE
+from payments.models import Payment
+from users.models import User
+
+
+def users(params):
+    """Users matching the user-management filters (`query`, `status`)."""
+    qs = User.objects.all()
+    query = params.get("query", "")
+    if query:
+        qs = qs.filter(Q(username__icontains=query) | Q(email__icontains=query))
+    if params.get("status") == "active":
+        qs = qs.filter(is_active=True)
+    elif params.get("status") == "banned":
+        qs = qs.filter(is_active=False)
+
+    rows = qs.values_list("username", "email", "is_active", "last_login").iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    return (
+        ["Username", "Email", "Status", "Last Login"],
+        ([username, email, "Active" if active else "Inactive", last_login] for username, email, active, last_login in rows),
+    )
+
+
+def payments(params):
+    """Every payment, latest first."""
+    rows = (
+        Payment.objects.order_by("-created_at")
+        .values_list("payment_id", "user__username", "amount", "status", "created_at")
+        .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    )
+    return (
+        ["Payment ID", "User", "Amount", "Status", "Date"],
+        ([pid, username, amount, status, created.strftime("%Y-%m-%d %H:%M:%S")] for pid, username, amount, status, created in rows),
+    )
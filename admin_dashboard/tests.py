@@ -1,3 +1,42 @@
-from django.test import TestCase
+import csv
+import gzip
+import io
 
-# Create your tests here.
+from django.test import TestCase, Client
+from django.urls import reverse
+
+from payments.models import Payment
+from users.models import User
+
+
+class StreamingExportTests(TestCase):
+    """Admin CSV exports are streamed from chunked querysets, optionally gzipped."""
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser(username='root', email='root@example.com', password='pw')
+        User.objects.create_user(username='alice', email='alice@example.com', password='pw')
+        User.objects.create_user(username='bob', email='bob@example.com', password='pw', is_active=False)
+        Payment.objects.create(user=self.admin, amount='99.50', status='Completed')
+        self.client = Client()
+        self.client.force_login(self.admin)
+
+    def _rows(self, response, compressed=False):
+        body = b''.join(response.streaming_content)
+        if compressed:
+            body = gzip.decompress(body)
+        return list(csv.reader(io.StringIO(body.decode('utf-8'))))
+
+    def test_export_users_streams_filtered_rows(self):
+        res = self.client.get(reverse('export_users'), {'status': 'banned'})
+        self.assertTrue(res.streaming)
+        rows = self._rows(res)
+        self.assertEqual(rows[0], ["Username", "Email", "Status", "Last Login"])
+        self.assertEqual(rows[1:], [['bob', 'bob@example.com', 'Inactive', '']])
+
+    def test_export_payments_gzip(self):
+        res = self.client.get(reverse('export_payments'), {'compress': 'gzip'})
+        self.assertEqual(res['Content-Type'], 'application/gzip')
+        self.assertIn('payments.csv.gz', res['Content-Disposition'])
+        rows = self._rows(res, compressed=True)
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[1][1:4], ['root', '99.50', 'Completed'])
@@ -19,6 +19,7 @@ urlpatterns = [
     path('transactions/', views.transaction_management, name='transaction_management'),
     path('payments/', views.payment_management, name='payment_management'),
     path('payments/export/', views.export_payments, name='export_payments'),
+    path('exports/<str:token>/', views.export_download, name='export_download'),
 
     # ==========================================
     # 4. NOTIFICATIONS
@@ -29,6 +30,7 @@ urlpatterns = [
     # 5. ADMIN SETTINGS
     # ==========================================
     path('settings/', views.settings_view, name='settings'),
+    path('settings/jobs/', views.job_stats, name='job_stats'),
 
     # ==========================================
     # 6. ADMIN AUTHENTICATION
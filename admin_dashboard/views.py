@@ -2,7 +2,7 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.contrib.auth import authenticate, login, logout
-from django.http import JsonResponse, HttpResponse
+from django.http import JsonResponse
 from django.core.paginator import Paginator
 from django.db.models import Sum, Count
 from django.utils.timezone import now
@@ -11,7 +11,7 @@ from transactions.models import Transaction
 from payments.models import Payment
 from notifications.models import Notification
 from users.models import User
-import csv
+from backend.exports import export_response, export_job_response
 import json
 from django.db.models import Q
 from datetime import datetime, timedelta, date
@@ -142,31 +142,12 @@ def user_management(request):
 
 @login_required
 def export_users(request):
-    """ Export users data as CSV based on applied filters """
-    query = request.GET.get('query', '').strip()
-    status_filter = request.GET.get('status', '')
-    
-    users = User.objects.all()
-
-    if query:
-        users = users.filter(Q(username__icontains=query) | Q(email__icontains=query))
-
-    if status_filter:
-        if status_filter == "active":
-            users = users.filter(is_active=True)
-        elif status_filter == "banned":
-            users = users.filter(is_active=False)
-
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = 'attachment; filename="users.csv"'
-    
-    writer = csv.writer(response)
-    writer.writerow(["Username", "Email", "Status", "Last Login"])
-    
-    for user in users:
-        writer.writerow([user.username, user.email, "Active" if user.is_active else "Inactive", user.last_login])
-
-    return response
+    """ Export users data as CSV based on applied filters (streamed; see backend/exports.py) """
+    params = {
+        'query': request.GET.get('query', '').strip(),
+        'status': request.GET.get('status', ''),
+    }
+    return export_response(request, 'admin_dashboard.exports.users', params, 'users.csv', 'export_download')
 
 @login_required
 def update_user(request, user_id):
@@ -343,26 +324,14 @@ def payment_management(request):
 
 @login_required
 def export_payments(request):
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = 'attachment; filename="payments.csv"'
+    """ Export all payments as CSV (streamed; see backend/exports.py) """
+    return export_response(request, 'admin_dashboard.exports.payments', {}, 'payments.csv', 'export_download')
 
-    writer = csv.writer(response)
-    writer.writerow([
-        "Payment ID", "User", "Amount", "Status", "Date"
-    ])
 
-    payments = Payment.objects.all().order_by('-created_at')  # Fetch all payments sorted by latest
-
-    for payment in payments:
-        writer.writerow([
-            payment.payment_id,  # Use UUID as payment ID
-            payment.user.username,  # Fetch the username of the user
-            payment.amount,
-            payment.status,  # Use the raw status
-            payment.created_at.strftime("%Y-%m-%d %H:%M:%S")  # Format the date
-        ])
-
-    return response
+@login_required
+def export_download(request, token):
+    """ Status / download of a background export started with ?mode=file """
+    return export_job_response(request, token)
 
 
 # ==========================================
@@ -455,6 +424,15 @@ def settings_view(request):
 
     return render(request, "admin_dashboard/settings.html", {"settings": settings})
 
+
+@login_required
+def job_stats(request):
+    """ Queue depth and counters of this worker's background job runner (backend/jobs.py) """
+    from backend import jobs
+    if not request.user.is_staff:
+        return JsonResponse({"error": "Forbidden"}, status=403)
+    return JsonResponse(jobs.stats())
+
 # ==========================================
 # 6. ADMIN AUTHENTICATION
 # ==========================================
@@ -0,0 +1,216 @@
+"""
+BACKEND MODULE - STREAMING EXPORTS (backend/exports.py)
+-------------------------------------------------------
+Shared machinery for CSV downloads (admin user/payment exports, per-user
+transaction export). Memory stays constant regardless of table size:
+
+1. Streaming: rows come from `values_list(...).iterator(chunk_size=...)`, are
+   formatted by `csv.writer` into a pseudo-buffer and sent in batches through
+   a StreamingHttpResponse. `?compress=gzip` compresses the stream on the fly
+   (served as a `.csv.gz` attachment).
+2. Background files (`?mode=file`): for very large exports the same rows are
+   written to a file under EXPORTS_DIR by a Celery task, and the client polls
+   a download URL that answers 202 until the file is ready. Only the user who
+   requested an export can download it.
+
+An export is described by a "builder": a function, referenced by dotted path
+so a worker can import it, that takes a JSON-serializable params dict and
+returns `(header, rows)`.
+"""
+
+import csv
+import json
+import logging
+import os
+import re
+import time
+import uuid
+import zlib
+
+from celery import shared_task
+from django.conf import settings
+from django.http import FileResponse, Http404, JsonResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.utils.module_loading import import_string
+
+from backend import jobs
+
+logger = logging.getLogger(__name__)
+
+EXPORT_CHUNK_SIZE = 2000    # rows fetched per database round trip
+ROWS_PER_WRITE = 500        # CSV rows joined into one response chunk
+_TOKEN = re.compile(r"^[0-9a-f]{32}$")
+
+
+# ==========================================
+# 1. STREAMED CSV
+# ==========================================
+
+class _Echo:
+    """File-like object whose write() hands the formatted line straight back."""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(header, rows):
+    """Encoded CSV chunks of ROWS_PER_WRITE lines each."""
+    writer = csv.writer(_Echo())
+    lines = [writer.writerow(header)]
+    for row in rows:
+        lines.append(writer.writerow(row))
+        if len(lines) >= ROWS_PER_WRITE:
+            yield "".join(lines).encode("utf-8")
+            lines = []
+    if lines:
+        yield "".join(lines).encode("utf-8")
+
+
+def iter_gzip(chunks):
+    """Compresses a byte stream into a gzip stream, chunk by chunk."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def wants_gzip(request):
+    return request.GET.get("compress") == "gzip"
+
+
+def streaming_csv_response(filename, header, rows, gzip=False):
+    """A CSV attachment streamed row batch by row batch."""
+    chunks = iter_csv(header, rows)
+    if gzip:
+        response = StreamingHttpResponse(iter_gzip(chunks), content_type="application/gzip")
+        filename += ".gz"
+    else:
+        response = StreamingHttpResponse(chunks, content_type="text/csv")
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
+def export_response(request, builder, params, filename, download_url_name):
+    """
+    Answers an export request: streams the CSV, or with `?mode=file` starts a
+    background file export and returns 202 with the URL to poll/download it.
+    """
+    gzip = wants_gzip(request)
+    if request.GET.get("mode") == "file":
+        token = start_file_export(builder, params, filename, request.user.pk, gzip)
+        return JsonResponse(
+            {"job": token, "status": "pending", "download_url": reverse(download_url_name, args=[token])},
+            status=202,
+        )
+    header, rows = import_string(builder)(params)
+    return streaming_csv_response(filename, header, rows, gzip=gzip)
+
+
+# ==========================================
+# 2. BACKGROUND FILE EXPORTS
+# ==========================================
+
+def get_exports_dir():
+    return getattr(settings, "EXPORTS_DIR", os.path.join(settings.BASE_DIR, "exports"))
+
+
+def _paths(token):
+    base = os.path.join(get_exports_dir(), token)
+    return base + ".json", base + ".data"
+
+
+def _read_meta(token):
+    try:
+        with open(_paths(token)[0], encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_meta(token, meta):
+    path = _paths(token)[0]
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    os.replace(path + ".tmp", path)
+
+
+def purge_expired_exports():
+    """Deletes export files older than EXPORT_FILE_TTL seconds."""
+    cutoff = time.time() - getattr(settings, "EXPORT_FILE_TTL", 24 * 3600)
+    try:
+        names = os.listdir(get_exports_dir())
+    except OSError:
+        return
+    for name in names:
+        path = os.path.join(get_exports_dir(), name)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+        except OSError:
+            pass
+
+
+def _publish_export(token):
+    """Queues the file export; without a reachable broker the file is generated in this thread."""
+    try:
+        generate_export_file.apply_async(args=[token], retry=False)
+    except Exception as e:
+        logger.warning(f"[EXPORTS] Could not queue export {token}, generating in-process: {e}")
+        run_file_export(token)
+
+
+def start_file_export(builder, params, filename, owner_id, gzip=False):
+    """Registers a background export and returns its token."""
+    os.makedirs(get_exports_dir(), exist_ok=True)
+    purge_expired_exports()
+    token = uuid.uuid4().hex
+    _write_meta(token, {
+        "builder": builder, "params": params, "owner": str(owner_id),
+        "filename": filename + (".gz" if gzip else ""), "gzip": gzip, "status": "pending",
+    })
+    jobs.schedule(f"export:{token}", _publish_export, token, delay=0)
+    return token
+
+
+def run_file_export(token):
+    """Writes the export to disk (renamed into place when complete) and marks it ready."""
+    meta = _read_meta(token)
+    if meta is None or meta["status"] != "pending":
+        return
+    data_path = _paths(token)[1]
+    try:
+        header, rows = import_string(meta["builder"])(meta["params"])
+        chunks = iter_csv(header, rows)
+        if meta["gzip"]:
+            chunks = iter_gzip(chunks)
+        with open(data_path + ".part", "wb") as f:
+            for chunk in chunks:
+                f.write(chunk)
+        os.replace(data_path + ".part", data_path)
+        meta.update(status="ready", size=os.path.getsize(data_path))
+    except Exception as e:
+        logger.error(f"[EXPORTS] Export {token} failed: {e}")
+        meta.update(status="failed", error=str(e))
+    _write_meta(token, meta)
+
+
+@shared_task(ignore_result=True)
+def generate_export_file(token):
+    run_file_export(token)
+
+
+def export_job_response(request, token):
+    """202 while the export is being generated, then the file itself. 404 for anyone but its owner."""
+    meta = _read_meta(token) if _TOKEN.match(token) else None
+    if meta is None or meta["owner"] != str(request.user.pk):
+        raise Http404("Unknown export")
+    if meta["status"] == "pending":
+        return JsonResponse({"job": token, "status": "pending"}, status=202)
+    if meta["status"] == "failed":
+        return JsonResponse({"job": token, "status": "failed", "error": meta.get("error")}, status=500)
+    content_type = "application/gzip" if meta["gzip"] else "text/csv"
+    return FileResponse(
+        open(_paths(token)[1], "rb"), as_attachment=True, filename=meta["filename"], content_type=content_type,
+    )
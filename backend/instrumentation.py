@@ -0,0 +1,60 @@
+"""
+BACKEND MODULE - QUERY BUDGETS (backend/instrumentation.py)
+-----------------------------------------------------------
+`@query_budget(n)` declares how many SQL queries a view may issue. The count
+is taken with a connection execute wrapper (no SQL is recorded, so it is
+cheap enough to leave on in production). A view that goes over its budget is
+logged, and under QUERY_BUDGET_STRICT (turned on by the project's test runner)
+raises QueryBudgetExceeded so an N+1 regression fails the test suite.
+
+Place it directly above the view function, below DRF's `@api_view` /
+`@permission_classes`, so authentication queries are not counted:
+
+    @api_view(['GET'])
+    @permission_classes([IsAuthenticated])
+    @query_budget(2)
+    def my_view(request): ...
+"""
+
+import functools
+import logging
+
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class _QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def query_budget(max_queries):
+    """Decorator: warns (or raises, when strict) if the view runs more than `max_queries` queries."""
+    def decorator(view):
+        name = f"{view.__module__}.{view.__qualname__}"
+
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            counter = _QueryCounter()
+            with connection.execute_wrapper(counter):
+                response = view(*args, **kwargs)
+            if counter.count > max_queries:
+                message = f"[QUERY BUDGET] {name} ran {counter.count} queries (budget {max_queries})"
+                if getattr(settings, "QUERY_BUDGET_STRICT", False):
+                    raise QueryBudgetExceeded(message)
+                logger.warning(message)
+            return response
+
+        wrapper.query_budget = max_queries
+        return wrapper
+    return decorator
@@ -0,0 +1,178 @@
+"""
+BACKEND MODULE - COALESCING JOB RUNNER (backend/jobs.py)
+--------------------------------------------------------
+In-process runner for the background work that model signals trigger
+(partition compaction, the AI training-data export, publishing insight
+refreshes, file exports and Gemini category refinements to Celery), so a signal never runs heavy work inline or spawns an
+unbounded thread per write.
+
+- Coalescing: a job is identified by a key. `schedule(key, ...)` starts a
+  countdown of `delay` seconds (JOBS_COALESCE_WINDOW by default); identical
+  requests while that job is pending are dropped, so a burst of 1,000 writes
+  runs the job once. Countdowns live in one heap, watched by a single timer
+  thread, so pending jobs cost no thread each.
+- Bounded: due jobs run on a ThreadPoolExecutor of JOBS_MAX_WORKERS threads,
+  and never two runs of the same key at once (a request that arrives while
+  its key is running becomes one follow-up run).
+- Observable: `stats()` reports queue depth (pending / queued / running)
+  and lifetime counters; admins can read it at /admin_dashboard/settings/jobs/.
+
+Work that must survive the process (e.g. the precompute task) is still
+published to Celery *from* a job here, with that job's own fallback.
+`flush()` runs every pending job immediately in the calling thread and
+`wait_idle()` blocks until nothing is queued or running (tests, shutdown).
+"""
+
+import heapq
+import itertools
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class _Job:
+    __slots__ = ('key', 'func', 'args', 'kwargs')
+
+    def __init__(self, key, func, args, kwargs):
+        self.key = key
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+
+
+class JobScheduler:
+    COUNTERS = ('requested', 'coalesced', 'completed', 'failed')
+
+    def __init__(self, max_workers=None, window=None):
+        self._max_workers = max_workers
+        self._window = window
+        self._lock = threading.Condition()
+        self._pending = {}      # key -> _Job waiting for its countdown
+        self._due = []          # heap of (due time, seq, _Job) for the pending jobs
+        self._seq = itertools.count()
+        self._timer = None      # the thread that dispatches jobs as they fall due
+        self._running = set()   # keys currently executing
+        self._queued = 0        # submitted to the executor, not started yet
+        self._counters = dict.fromkeys(self.COUNTERS, 0)
+        self._executor = None
+
+    @property
+    def max_workers(self):
+        return self._max_workers or getattr(settings, 'JOBS_MAX_WORKERS', 2)
+
+    @property
+    def window(self):
+        return self._window if self._window is not None else getattr(settings, 'JOBS_COALESCE_WINDOW', 15.0)
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='jobs')
+            return self._executor
+
+    def schedule(self, key, func, *args, delay=None, **kwargs):
+        """
+        Runs `func(*args, **kwargs)` once, `delay` seconds from now, unless a job
+        with the same key is already pending, in which case this request is
+        coalesced into it. Returns True when a new job was scheduled.
+        """
+        delay = self.window if delay is None else delay
+        with self._lock:
+            self._counters['requested'] += 1
+            if key in self._pending:
+                self._counters['coalesced'] += 1
+                return False
+            job = self._pending[key] = _Job(key, func, args, kwargs)
+            if delay > 0:
+                heapq.heappush(self._due, (time.monotonic() + delay, next(self._seq), job))
+                if self._timer is None or not self._timer.is_alive():
+                    self._timer = threading.Thread(target=self._watch, name='jobs-timer', daemon=True)
+                    self._timer.start()
+                self._lock.notify_all()
+        if delay <= 0:
+            self._dispatch(job)
+        return True
+
+    def _watch(self):
+        """Timer thread: sleeps until the earliest countdown ends, then dispatches it."""
+        while True:
+            with self._lock:
+                while not self._due or self._due[0][0] > time.monotonic():
+                    self._lock.wait(self._due[0][0] - time.monotonic() if self._due else None)
+                job = heapq.heappop(self._due)[2]
+            self._dispatch(job)
+
+    def _dispatch(self, job):
+        """Countdown over: hands the job to the executor."""
+        with self._lock:
+            if self._pending.get(job.key) is not job:
+                return  # already flushed
+            del self._pending[job.key]
+            self._queued += 1
+        try:
+            self._get_executor().submit(self._run, job, True)
+        except RuntimeError as e:  # interpreter shutting down
+            with self._lock:
+                self._queued -= 1
+                self._lock.notify_all()
+            logger.warning(f"[JOBS] Dropped {job.key}: {e}")
+
+    def _run(self, job, from_queue=False):
+        with self._lock:
+            if from_queue:
+                self._queued -= 1
+            busy = job.key in self._running
+            if not busy:
+                self._running.add(job.key)
+        if busy:
+            # The previous run of this key has not finished: fold into one follow-up run
+            self.schedule(job.key, job.func, *job.args, **job.kwargs)
+            return
+        try:
+            job.func(*job.args, **job.kwargs)
+            outcome = 'completed'
+        except Exception:
+            logger.exception(f"[JOBS] {job.key} failed")
+            outcome = 'failed'
+        with self._lock:
+            self._running.discard(job.key)
+            self._counters[outcome] += 1
+            self._lock.notify_all()
+
+    def flush(self):
+        """Runs every pending job now, in the calling thread. Returns how many ran."""
+        with self._lock:
+            jobs = list(self._pending.values())
+            self._pending.clear()
+            self._due.clear()
+        for job in jobs:
+            self._run(job)
+        return len(jobs)
+
+    def wait_idle(self, timeout=None):
+        """Blocks until no job is queued or running. Returns False on timeout."""
+        with self._lock:
+            return self._lock.wait_for(lambda: not self._queued and not self._running, timeout)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'pending': len(self._pending),
+                'queued': self._queued,
+                'running': len(self._running),
+                'max_workers': self.max_workers,
+                'coalesce_window': self.window,
+                **self._counters,
+            }
+
+
+scheduler = JobScheduler()
+schedule = scheduler.schedule
+flush = scheduler.flush
+wait_idle = scheduler.wait_idle
+stats = scheduler.stats
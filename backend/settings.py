@@ -76,6 +76,14 @@ AUTHENTICATION_BACKENDS = [
 ]
 MEDIA_URL = '/media/'  # URL to access media files
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')  # Path
+
+# Per-user columnar transaction partitions read by the insights ML models
+TRANSACTION_STORE_DIR = os.path.join(MEDIA_ROOT, 'datasets', 'users')
+# Background CSV exports (backend/exports.py). Kept outside MEDIA_ROOT so files are
+# only reachable through the owner-checked download views.
+EXPORTS_DIR = os.path.join(BASE_DIR, 'exports')
+EXPORT_FILE_TTL = config('EXPORT_FILE_TTL', default=24 * 3600, cast=int)
+
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',  
     'django.middleware.security.SecurityMiddleware',
@@ -85,6 +93,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'insights.middleware.AnalyticsLoadMiddleware',
 ]
 CORS_ALLOW_ALL_ORIGINS = True  # Allow frontend access
 
@@ -123,6 +132,62 @@ DATABASES = {
 
 
 GEMINI_API_KEY = config('GEMINI_API_KEY', default='')
+GEMINI_API_ENDPOINT = config('GEMINI_API_ENDPOINT', default='')  # e.g. a local stub server (REST transport)
+GEMINI_CATEGORIZE_TIMEOUT = config('GEMINI_CATEGORIZE_TIMEOUT', default=3.0, cast=float)  # seconds
+
+# Caches — `forecasts` holds fitted forecast outputs (insights/forecast_cache.py).
+# For multi-host deployments switch it to
+# 'django.core.cache.backends.redis.RedisCache' with LOCATION 'redis://localhost:6379/1'.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'forecasts': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(BASE_DIR, 'media', 'cache', 'forecasts'),
+        'TIMEOUT': 6 * 60 * 60,
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    },
+}
+FORECAST_CACHE_ALIAS = 'forecasts'
+FORECAST_CACHE_TTL = 6 * 60 * 60  # seconds
+FORECAST_CACHE_LRU_SIZE = 512     # in-process entries per worker
+
+# Forecast engine used by the insights models (insights/forecasting.py):
+# 'ets' = NumPy exponential smoothing (fast default), 'prophet' = opt-in high accuracy
+INSIGHTS_FORECAST_ENGINE = config('INSIGHTS_FORECAST_ENGINE', default='ets')
+# Per-series fits (Prophet) run in a warm process pool of this many workers; 0 = in-process
+INSIGHTS_FIT_WORKERS = config('INSIGHTS_FIT_WORKERS', default=0, cast=int)
+INSIGHTS_FIT_TIMEOUT = 20  # seconds per fit before falling back to linear extrapolation
+
+# Most rows one request may create (JSON array POST to /transactions/) or categorize
+# (POST {"descriptions": [...]}); bigger batches go through the statement import endpoint.
+TRANSACTIONS_MAX_BATCH_SIZE = config('TRANSACTIONS_MAX_BATCH_SIZE', default=1000, cast=int)
+
+# Naive Bayes categorizer: LRU of normalized description → category (transactions/categorizer.py)
+CATEGORIZER_CACHE_SIZE = 10000
+# Seconds between checks for a retrained model on disk (hot reload without restart)
+CATEGORIZER_RELOAD_CHECK = config('CATEGORIZER_RELOAD_CHECK', default=30, cast=int)
+# Per-user override rules (transactions/merchants.py): seconds a worker trusts its compiled
+# index before re-reading the user's rules version from the DB, and how many users it keeps
+CATEGORY_RULES_RECHECK = config('CATEGORY_RULES_RECHECK', default=5, cast=int)
+CATEGORY_RULES_INDEX_SIZE = 1000
+
+# Views decorated with @query_budget(n) (backend/instrumentation.py) log when they run
+# more than n queries; strict mode raises instead. The test runner below turns it on.
+QUERY_BUDGET_STRICT = config('QUERY_BUDGET_STRICT', default=False, cast=bool)
+TEST_RUNNER = 'backend.testing.ProjectTestRunner'
+
+# Background insight precompute (insights/tasks.py). Writes queue a refresh of the
+# user's MaterializedInsight rows, run after the countdown; bursts of writes
+# coalesce on the job runner and refreshes of unchanged data are skipped.
+INSIGHTS_PRECOMPUTE_ON_WRITE = config('INSIGHTS_PRECOMPUTE_ON_WRITE', default=True, cast=bool)
+INSIGHTS_PRECOMPUTE_COUNTDOWN = 30  # seconds
+
+# In-process job runner for signal-driven work (backend/jobs.py): identical jobs
+# requested within the window run once; at most JOBS_MAX_WORKERS run at a time.
+JOBS_COALESCE_WINDOW = config('JOBS_COALESCE_WINDOW', default=15.0, cast=float)
+JOBS_MAX_WORKERS = config('JOBS_MAX_WORKERS', default=2, cast=int)
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -0,0 +1,67 @@
+"""
+BACKEND MODULE - TEST HELPERS (backend/testing.py)
+--------------------------------------------------
+Fixtures shared by the apps' tests.py modules, and the project's test runner.
+"""
+
+import copy
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.test import override_settings
+from django.test.runner import DiscoverRunner
+
+
+class TempDirMixin:
+    """
+    Gives every test its own temporary directory (`self.tmp_dir`) and points
+    the settings listed in `temp_dir_settings` into it: a setting mapped to
+    None gets the directory itself, one mapped to a file name gets that file
+    inside it. Both are undone after tearDown, so tests never write to media/.
+    Subclasses that define setUp must call super().setUp() first.
+    """
+
+    temp_dir_settings = {}
+
+    def setUp(self):
+        super().setUp()
+        self.tmp_dir = self.enterContext(tempfile.TemporaryDirectory())
+        self.enterContext(override_settings(**{
+            name: os.path.join(self.tmp_dir, leaf) if leaf else self.tmp_dir
+            for name, leaf in self.temp_dir_settings.items()
+        }))
+
+
+
+class ProjectTestRunner(DiscoverRunner):
+    """
+    `manage.py test` for this project. For the whole run:
+
+    - QUERY_BUDGET_STRICT is on, so a view that goes over its @query_budget
+      fails its test instead of only logging;
+    - the per-user store, background exports and the forecast file cache live
+      in one temporary directory, removed at the end, so no test writes to
+      media/ (TempDirMixin classes still get a fresh directory per test).
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._run_dir = tempfile.mkdtemp(prefix='test-run-')
+        cache_settings = copy.deepcopy(settings.CACHES)
+        forecasts = getattr(settings, 'FORECAST_CACHE_ALIAS', 'forecasts')
+        if forecasts in cache_settings:
+            cache_settings[forecasts]['LOCATION'] = os.path.join(self._run_dir, 'forecasts')
+        self._run_settings = override_settings(
+            QUERY_BUDGET_STRICT=True,
+            TRANSACTION_STORE_DIR=os.path.join(self._run_dir, 'users'),
+            EXPORTS_DIR=os.path.join(self._run_dir, 'exports'),
+            CACHES=cache_settings,
+        )
+        self._run_settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._run_settings.disable()
+        shutil.rmtree(self._run_dir, ignore_errors=True)
+        super().teardown_test_environment(**kwargs)
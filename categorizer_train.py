@@ -62,9 +62,12 @@ X_transformed = vectorizer.fit_transform(X)
 classifier = MultinomialNB()
 classifier.fit(X_transformed, y)
 
-# Save model and vectorizer
+# Save model and vectorizer. Written to a temp file and renamed into place, so
+# running workers (which hot-reload on mtime change) never read a partial pickle.
 base_dir = os.path.dirname(os.path.abspath(__file__))
-joblib.dump(classifier, os.path.join(base_dir, "transaction_classifier.pkl"))
-joblib.dump(vectorizer, os.path.join(base_dir, "transaction_vectorizer.pkl"))
+for obj, name in ((classifier, "transaction_classifier.pkl"), (vectorizer, "transaction_vectorizer.pkl")):
+    path = os.path.join(base_dir, name)
+    joblib.dump(obj, path + ".tmp")
+    os.replace(path + ".tmp", path)
 
 print(f"✅ Model trained successfully on {len(df)} records and saved!")
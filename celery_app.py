@@ -13,6 +13,8 @@ app.config_from_object('django.conf:settings', namespace='CELERY')
 
 # Auto-discover tasks from all registered Django app configs
 app.autodiscover_tasks()
+# Project-level tasks outside the Django apps (background CSV exports)
+app.autodiscover_tasks(['backend'], related_name='exports')
 
 @app.task(bind=True)
 def debug_task(self):
@@ -30,4 +32,12 @@ app.conf.beat_schedule = {
         'task': 'notifications.tasks.send_bill_reminders',
         'schedule': crontab(hour=8, minute=30),
     },
+    'precompute-insights': {
+        'task': 'insights.tasks.precompute_all_insights',
+        'schedule': crontab(hour=2, minute=0),
+    },
+    'train-categorizer': {
+        'task': 'transactions.tasks.train_categorizer_incremental',
+        'schedule': crontab(hour=3, minute=0),
+    },
 }
\ No newline at end of file
@@ -1,3 +1,140 @@
+from datetime import date
+
 from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from transactions.aggregates import ledger_totals, previous_month, last_n_months, monthly_rollup
+from transactions.models import Transaction, Budget, Category
+from users.models import User
+
+
+class LedgerTotalsTests(TestCase):
+    """Dashboard buckets come from one conditional-aggregation query."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='dash', email='dash@example.com', password='pw')
+        today = date.today()
+        self.this_month = (today.year, today.month)
+        self.last_month = previous_month(*self.this_month)
+        last_day = date(*self.last_month, 28)
+        for amount, type_, day in (
+            (5000, 'income', today), (1200, 'expense', today), (300, 'expense', today),
+            (4000, 'income', last_day), (2500, 'expense', last_day),
+            (999, 'expense', date(2020, 1, 1)),
+        ):
+            Transaction.objects.create(user=self.user, amount=amount, category_type=type_, date=day)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_buckets(self):
+        with self.assertNumQueries(1):
+            totals = ledger_totals(self.user, months=[self.this_month, self.last_month])
+        self.assertEqual(totals['count'], 6)
+        self.assertEqual((totals['income'], totals['expense']), (9000.0, 4999.0))
+        self.assertEqual(totals['months'][self.this_month], {'income': 5000.0, 'expense': 1500.0})
+        self.assertEqual(totals['months'][self.last_month], {'income': 4000.0, 'expense': 2500.0})
+
+    def test_financial_summary_is_one_query(self):
+        with self.assertNumQueries(1):
+            res = self.client.get(reverse('financial_summary'))
+        data = res.json()
+        self.assertEqual(data['total_balance'], 4001.0)
+        self.assertEqual((data['monthly_income'], data['monthly_expenses']), (5000.0, 1500.0))
+        self.assertEqual(data['expense_change'], 60.0)
+
+    def test_analysis_summary_queries(self):
+        with self.assertNumQueries(2):  # ledger buckets + budget total
+            res = self.client.get(reverse('analysis-summary'))
+        self.assertEqual(res.json()['total_spent'], 1500.0)
+
+
+class MonthlyRollupTests(TestCase):
+    """6-month trend charts come from one TruncMonth-grouped query per endpoint."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='trend', email='trend@example.com', password='pw')
+        self.months = last_n_months(6)
+        food = Category.objects.create(user=self.user, name='Food & Dining')
+        rent = Category.objects.create(user=self.user, name='Rent & Housing')
+        for (year, month), amount in zip(self.months[::2], (100, 200, 300)):
+            Transaction.objects.create(user=self.user, amount=amount, category=food, category_type='expense', date=date(year, month, 3))
+        Transaction.objects.create(user=self.user, amount=900, category=rent, category_type='expense', date=date(*self.months[-1], 1))
+        Transaction.objects.create(user=self.user, amount=5000, category_type='income', date=date(*self.months[-1], 2))
+        Budget.objects.create(user=self.user, category='Food & Dining', monthly_limit=1000)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_rollup_fills_missing_months(self):
+        self.assertEqual(last_n_months(3, date(2026, 2, 10)), [(2025, 12), (2026, 1), (2026, 2)])
+        with self.assertNumQueries(1):
+            rollup = monthly_rollup(Transaction.objects.filter(user=self.user, category_type='expense'), self.months)
+        self.assertEqual(list(rollup.values()), [100.0, 0.0, 200.0, 0.0, 300.0, 900.0])
+
+    def test_spending_trends_queries(self):
+        with self.assertNumQueries(3):  # expenses rollup + budget history + current-limit fallback
+            res = self.client.get(reverse('spending-trends'))
+        self.assertEqual(res.json()['actual_spends'], [100.0, 0.0, 200.0, 0.0, 300.0, 900.0])
+        self.assertEqual(res.json()['budget_limits'], [1000.0] * 6)
+
+    def test_category_trends_is_one_query(self):
+        with self.assertNumQueries(1):
+            res = self.client.get(reverse('category-spending-trends'))
+        series = {s['name']: s['data'] for s in res.json()['series']}
+        self.assertEqual(series['Food & Dining'], [100.0, 0, 200.0, 0, 300.0, 0])
+        self.assertEqual(series['Rent & Housing'][-1], 900.0)
+
+    def test_spending_analysis_bar_chart(self):
+        data = self.client.get(reverse('spending_analysis')).json()
+        self.assertEqual(len(data['bar_months']), 6)
+        self.assertEqual(data['bar_income'][-1], 5000.0)
+        self.assertEqual(data['bar_expenses'], [100.0, 0.0, 200.0, 0.0, 300.0, 900.0])
+
+
+class QueryBudgetTests(TestCase):
+    """@query_budget logs over-budget views, and fails them in strict mode."""
+
+    def setUp(self):
+        from backend.instrumentation import query_budget
+
+        @query_budget(1)
+        def two_queries():
+            User.objects.count()
+            Category.objects.count()
+            return 'ok'
+
+        self.view = two_queries
+
+    def test_strict_raises(self):
+        from django.test import override_settings
+        from backend.instrumentation import QueryBudgetExceeded
+
+        with override_settings(QUERY_BUDGET_STRICT=True), self.assertRaises(QueryBudgetExceeded):
+            self.view()
+
+    def test_test_runner_enables_strict_and_keeps_files_out_of_media(self):
+        import os
+        from django.conf import settings
+
+        self.assertTrue(settings.QUERY_BUDGET_STRICT)
+        media = os.path.join(settings.BASE_DIR, 'media')
+        for path in (settings.TRANSACTION_STORE_DIR, settings.CACHES[settings.FORECAST_CACHE_ALIAS]['LOCATION']):
+            self.assertFalse(path.startswith(media), path)
+
+    def test_lenient_logs(self):
+        from django.test import override_settings
+
+        with override_settings(QUERY_BUDGET_STRICT=False), self.assertLogs('backend.instrumentation', 'WARNING') as logs:
+            self.assertEqual(self.view(), 'ok')
+        self.assertIn('ran 2 queries (budget 1)', logs.output[0])
 
-# Create your tests here.
+    def test_spending_analysis_categories_without_lookups(self):
+        user = User.objects.create_user(username='n1', email='n1@example.com', password='pw')
+        for i in range(5):
+            cat = Category.objects.create(user=user, name=f'Cat {i}')
+            Transaction.objects.create(user=user, amount=10 + i, category=cat, category_type='expense', date=date.today())
+        client = APIClient()
+        client.force_authenticate(user)
+        with self.assertNumQueries(5):
+            data = client.get(reverse('spending_analysis')).json()
+        self.assertEqual(sorted(c['category'] for c in data['expense_categories']), [f'Cat {i}' for i in range(5)])
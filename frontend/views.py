@@ -14,7 +14,8 @@ from django.contrib.auth.decorators import login_required
 from django.db.models import Sum, Count, Avg, F
 from datetime import datetime, timedelta
 from users.models import User
-from transactions.models import Transaction, Category
+from transactions.models import Transaction
+from transactions.aggregates import ledger_totals, previous_month, last_n_months, monthly_rollup
 from insights.models import BudgetInsight
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.forms import UserCreationForm, AuthenticationForm
@@ -23,6 +24,7 @@ import json
 from django.db.models.functions import ExtractMonth
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
+from backend.instrumentation import query_budget
 
 # ==========================================
 # 1. ADMIN / GLOBAL STATS
@@ -73,22 +75,13 @@ def dashboard_stats(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@query_budget(1)
 def financial_summary(request):
     user = request.user  
 
     today = datetime.today()
-    current_month = today.month
-    current_year = today.year
-    
-    # Calculate exactly one month ago
-    last_month_date = today.replace(day=1) - timedelta(days=1)
-    last_month = last_month_date.month
-    last_month_year = last_month_date.year
-
-    def get_net_balance(qs):
-        income = qs.filter(category_type="income").aggregate(Sum('amount'))['amount__sum'] or 0
-        expense = qs.filter(category_type="expense").aggregate(Sum('amount'))['amount__sum'] or 0
-        return float(income) - float(expense)
+    this_month = (today.year, today.month)
+    last_month = previous_month(*this_month)
 
     def calc_progress(current, target):
         if target == 0:
@@ -100,22 +93,22 @@ def financial_summary(request):
                 return -100.00
         return round((float(current) / abs(target)) * 100, 2)
 
-    total_transactions_count = Transaction.objects.filter(user=user).count()
+    # Every bucket below (all time, this month, last month) in one query
+    totals = ledger_totals(user, months=[this_month, last_month])
+    total_transactions_count = totals['count']
 
     # Total Balance (All time)
-    total_balance = get_net_balance(Transaction.objects.filter(user=user))
-    total_income = float(Transaction.objects.filter(user=user, category_type="income").aggregate(Sum('amount'))['amount__sum'] or 0)
+    total_income = totals['income']
+    total_balance = total_income - totals['expense']
     balance_change = round((total_balance / total_income) * 100, 2) if total_income > 0 else 0.00
 
     # Current Month Actuals
-    current_month_qs = Transaction.objects.filter(user=user, date__year=current_year, date__month=current_month)
-    monthly_income = float(current_month_qs.filter(category_type="income").aggregate(Sum('amount'))['amount__sum'] or 0)
-    monthly_expenses = float(current_month_qs.filter(category_type="expense").aggregate(Sum('amount'))['amount__sum'] or 0)
+    monthly_income = totals['months'][this_month]['income']
+    monthly_expenses = totals['months'][this_month]['expense']
 
     # Last Month Baseline
-    last_month_qs = Transaction.objects.filter(user=user, date__year=last_month_year, date__month=last_month)
-    last_month_income = float(last_month_qs.filter(category_type="income").aggregate(Sum('amount'))['amount__sum'] or 0)
-    last_month_expenses = float(last_month_qs.filter(category_type="expense").aggregate(Sum('amount'))['amount__sum'] or 0)
+    last_month_income = totals['months'][last_month]['income']
+    last_month_expenses = totals['months'][last_month]['expense']
 
     income_change = calc_progress(monthly_income, last_month_income)
     expense_change = calc_progress(monthly_expenses, last_month_expenses)
@@ -176,6 +169,7 @@ def financial_summary(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@query_budget(5)
 def spending_analysis(request):
     if not request.user.is_authenticated:
         return JsonResponse({"error": "Authentication required"}, status=401)
@@ -208,10 +202,10 @@ def spending_analysis(request):
     income = [income_dict.get(d, 0) for d in unique_dates]
     expenses = [expense_dict.get(d, 0) for d in unique_dates]
 
-    # Expense category breakdown
-    expense_categories = transactions.filter(category_type="expense", category__isnull=False).values('category_id').annotate(total=Sum('amount'))
+    # Expense category breakdown (names joined in the grouping query, no per-category lookups)
+    expense_categories = transactions.filter(category_type="expense", category__isnull=False).values('category__name').annotate(total=Sum('amount'))
     category_data = [
-        {"category": Category.objects.get(id=entry["category_id"]).name, "amount": entry["total"]}
+        {"category": entry["category__name"], "amount": entry["total"]}
         for entry in expense_categories
     ]
 
@@ -223,30 +217,15 @@ def spending_analysis(request):
     # Monthly expense & income trend for 6 months (Income vs Expenses Bar Chart)
     # Note: THIS SHOULD ALWAYS use the full base query (all records) or else old records 
     # are hidden by the 'start_date' period filter above it!
-    base_transactions = Transaction.objects.filter(user_id=user_id)
-    
-    last_6_months = []
-    # Build a stable month-by-month list
-    for i in range(5, -1, -1):
-        target_date = today.replace(day=1) - timedelta(days=i*30)
-        # Fix date math slightly to get correct year/month pairs jumping back
-        month = (today.month - 1 - i) % 12 + 1
-        year = today.year + ((today.month - 1 - i) // 12)
-        import calendar
-        month_abbr = calendar.month_abbr[month]
-        last_6_months.append((year, month, f"{month_abbr} {year}"))
-
-    bar_months = []
-    bar_income = []
-    bar_expenses = []
-
-    for year, month, label in last_6_months:
-        inc = base_transactions.filter(category_type="income", date__year=year, date__month=month).aggregate(total=Sum('amount'))['total'] or 0
-        exp = base_transactions.filter(category_type="expense", date__year=year, date__month=month).aggregate(total=Sum('amount'))['total'] or 0
-        if label not in bar_months:  # prevent duplicate months if days overlap month boundaries
-            bar_months.append(label)
-            bar_income.append(float(inc))
-            bar_expenses.append(float(exp))
+    import calendar
+    last_6_months = last_n_months(6, today)
+    bar_rollup = monthly_rollup(
+        Transaction.objects.filter(user_id=user_id), last_6_months, group_by='category_type',
+    )
+
+    bar_months = [f"{calendar.month_abbr[month]} {year}" for year, month in last_6_months]
+    bar_income = [bar_rollup[key].get('income', 0.0) for key in last_6_months]
+    bar_expenses = [bar_rollup[key].get('expense', 0.0) for key in last_6_months]
 
     context = {
         "dates": dates,
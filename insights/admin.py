@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import SavingsGoal, AIInsightsLog
+from .models import SavingsGoal, AIInsightsLog, MaterializedInsight
 
 @admin.register(SavingsGoal)
 class SavingsGoalAdmin(admin.ModelAdmin):
@@ -22,3 +22,11 @@ class AIInsightsLogAdmin(admin.ModelAdmin):
     @admin.display(description='Insight Preview')
     def insight_preview(self, obj):
         return (obj.generated_insight[:100] + '…') if len(obj.generated_insight) > 100 else obj.generated_insight
+
+
+@admin.register(MaterializedInsight)
+class MaterializedInsightAdmin(admin.ModelAdmin):
+    list_display  = ('user', 'kind', 'data_version', 'computed_at')
+    list_filter   = ('kind',)
+    search_fields = ('user__username',)
+    readonly_fields = ('user', 'kind', 'payload', 'data_version', 'computed_at')
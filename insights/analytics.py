@@ -0,0 +1,157 @@
+"""
+INSIGHTS MODULE - ANALYTICS CONTEXT (insights/analytics.py)
+-----------------------------------------------------------
+Per-request container for a user's transaction frame and the aggregates that the
+ML models in `insights/utils.py` share. An endpoint builds one AnalyticsContext,
+passes it into every model function, and the frame is loaded and aggregated
+only once instead of once per model.
+
+Every frame load is also counted per request; `AnalyticsLoadMiddleware`
+(insights/middleware.py) reports the count in the `X-Analytics-Frame-Loads`
+response header.
+"""
+
+import contextvars
+import hashlib
+
+from django.utils.functional import cached_property
+
+_frame_loads = contextvars.ContextVar('insights_frame_loads', default=None)
+
+
+# ==========================================
+# 1. LOAD COUNTER
+# ==========================================
+
+def reset_frame_loads():
+    """Starts a fresh per-request count. Returns the token used to restore the previous one."""
+    return _frame_loads.set([0])
+
+
+def restore_frame_loads(token):
+    _frame_loads.reset(token)
+
+
+def record_frame_load():
+    """Called by get_user_transactions_df each time a user's frame is read from the store."""
+    counter = _frame_loads.get()
+    if counter is not None:
+        counter[0] += 1
+
+
+def frame_loads():
+    """Number of frame loads in the current request (0 outside a request)."""
+    counter = _frame_loads.get()
+    return counter[0] if counter is not None else 0
+
+
+# ==========================================
+# 2. ANALYTICS CONTEXT
+# ==========================================
+
+class AnalyticsContext:
+    """
+    Lazily loads the user's transaction frame once and derives the shared
+    daily, monthly and per-category aggregates from it on first use.
+    """
+
+    def __init__(self, user):
+        self.user = user
+
+    @cached_property
+    def df(self):
+        from insights.utils import get_user_transactions_df
+        return get_user_transactions_df(self.user)
+
+    @property
+    def empty(self):
+        return self.df.empty
+
+    @cached_property
+    def data_version(self):
+        """
+        Fingerprint of the user's latest transaction change. Creates and deletes
+        change the row count / id sum, edits bump the max `updated_at`.
+        """
+        if self.df.empty:
+            return 'empty'
+        raw = f"{len(self.df)}:{int(self.df['id'].sum())}:{self.df['updated_at'].max()}"
+        return hashlib.sha1(raw.encode()).hexdigest()[:16]
+
+    @cached_property
+    def expenses(self):
+        """Expense rows only."""
+        return self.df[self.df['is_expense']]
+
+    @cached_property
+    def daily(self):
+        """Total amount per calendar day (all types), as columns `date`, `amount`."""
+        return self.df.groupby('date')['amount'].sum().reset_index()
+
+    @cached_property
+    def daily_by_category(self):
+        """Date × category pivot of summed amounts (0 where a category had no spend that day)."""
+        return (
+            self.df.groupby(['date', 'category'], observed=True)['amount'].sum()
+            .unstack(fill_value=0.0)
+        )
+
+    @cached_property
+    def category_day_matrix(self):
+        """
+        Dense (categories × days) matrix over the user's whole date range, the
+        input of the batched forecast engines (see insights/forecasting.py).
+        """
+        from insights.forecasting import DailyMatrix
+        return DailyMatrix.from_pivot(self.daily_by_category)
+
+    @cached_property
+    def category_totals(self):
+        """All-time total amount per category, as columns `category`, `amount`."""
+        return self.df.groupby('category', observed=True)['amount'].sum().reset_index()
+
+    @cached_property
+    def current_month(self):
+        """Latest month that has data (the analysis 'current' month), as int yyyymm."""
+        return int(self.df['month'].max())
+
+    @cached_property
+    def previous_month(self):
+        year, month = divmod(self.current_month, 100)
+        return (year - 1) * 100 + 12 if month == 1 else self.current_month - 1
+
+    @cached_property
+    def monthly(self):
+        """Total amount per (month, type), e.g. monthly.get((current_month, 'Income'), 0)."""
+        return self.df.groupby(['month', 'type'], observed=True)['amount'].sum()
+
+    def month_total(self, month, type_):
+        return float(self.monthly.get((month, type_), 0.0))
+
+    @cached_property
+    def current_month_expense_by_category(self):
+        """Current-month expense total per category, largest first."""
+        mask = (self.df['month'] == self.current_month) & self.df['is_expense']
+        return (
+            self.df[mask].groupby('category', observed=True)['amount'].sum()
+            .sort_values(ascending=False)
+        )
+
+    @cached_property
+    def recent_expense_by_category(self):
+        """
+        Current- and previous-month expense of every expense category (columns
+        `current`, `previous`; categories in order of first appearance), from
+        one groupby on (category code, month).
+        """
+        expenses = self.expenses
+        codes = expenses['category_code'].unique()
+        recent = expenses[expenses['month'] >= self.previous_month]
+        totals = (
+            recent.groupby(['category_code', 'month'])['amount'].sum()
+            .unstack(fill_value=0.0)
+            .reindex(index=codes, columns=[self.current_month, self.previous_month], fill_value=0.0)
+        )
+        totals.columns = ['current', 'previous']
+        totals.index = self.df['category'].cat.categories[codes]
+        return totals
@@ -0,0 +1,108 @@
+"""
+INSIGHTS MODULE - DATA ACCESS (insights/data.py)
+------------------------------------------------
+Month × category × type totals for the insight endpoints, aggregated by the
+database (from the MonthlyCategorySpend rollup, transactions/rollups.py)
+rather than by pandas over the user's whole frame.
+
+`monthly_ledger(user)` runs one grouped query and returns a MonthlyLedger:
+the months that have data, the expense categories, and two float64 arrays
+(income per month, expense per month × category). Its size is bounded by
+months × categories, not by the number of transactions, so endpoints that
+only need totals never load the frame; the frame (AnalyticsContext) is left
+to the model-fitting code in insights/utils.py.
+
+Category and month conventions match the frame: uncategorized spend is
+'Other', and the "current" month is the latest month with any data.
+"""
+
+import numpy as np
+from django.db.models import Sum
+
+from transactions.store import UNCATEGORIZED
+
+
+class MonthlyLedger:
+    """
+    `months`: (year, month) pairs with data, oldest first.
+    `categories`: expense category names (columns of `expense`).
+    `income`: float64 array, income per month.
+    `expense`: float64 array (months × categories) of expense totals.
+    """
+
+    def __init__(self, months, categories, income, expense):
+        self.months = list(months)
+        self.categories = list(categories)
+        self.income = income
+        self.expense = expense
+        self._month_index = {key: i for i, key in enumerate(self.months)}
+        self._category_index = {name: j for j, name in enumerate(self.categories)}
+
+    @property
+    def empty(self):
+        return not self.months
+
+    @property
+    def current_month(self):
+        """Latest month that has data (the analysis 'current' month), or None."""
+        return self.months[-1] if self.months else None
+
+    @property
+    def previous_month(self):
+        if self.current_month is None:
+            return None
+        year, month = self.current_month
+        return (year - 1, 12) if month == 1 else (year, month - 1)
+
+    def month_income(self, month):
+        i = self._month_index.get(month)
+        return float(self.income[i]) if i is not None else 0.0
+
+    def month_expense(self, month, category=None):
+        """Expense total of a month, for one category or (by default) all of them."""
+        i = self._month_index.get(month)
+        if i is None:
+            return 0.0
+        if category is None:
+            return float(self.expense[i].sum())
+        j = self._category_index.get(category)
+        return float(self.expense[i, j]) if j is not None else 0.0
+
+    def has_expenses(self, category):
+        j = self._category_index.get(category)
+        return j is not None and bool(self.expense[:, j].any())
+
+    def expense_by_category(self, month):
+        """{category: total} of one month's spend, largest first, categories without spend omitted."""
+        i = self._month_index.get(month)
+        if i is None:
+            return {}
+        row = self.expense[i]
+        order = np.argsort(-row, kind='stable')
+        return {self.categories[j]: float(row[j]) for j in order if row[j] > 0}
+
+
+def monthly_ledger(user):
+    """A user's month × category × type totals from one grouped query on the monthly rollup."""
+    from transactions.models import MonthlyCategorySpend
+
+    rows = list(
+        MonthlyCategorySpend.objects.filter(user=user)
+        .values_list('year', 'month', 'category__name', 'category_type')
+        .annotate(amount=Sum('total'))
+        .order_by()
+    )
+    months = sorted({(year, month) for year, month, _, _, _ in rows})
+    categories = sorted({name or UNCATEGORIZED for _, _, name, type_, _ in rows if type_ == 'expense'})
+    month_index = {key: i for i, key in enumerate(months)}
+    category_index = {name: j for j, name in enumerate(categories)}
+
+    income = np.zeros(len(months), dtype='f8')
+    expense = np.zeros((len(months), len(categories)), dtype='f8')
+    for year, month, name, type_, amount in rows:
+        i = month_index[(year, month)]
+        if type_ == 'expense':
+            expense[i, category_index[name or UNCATEGORIZED]] += float(amount)
+        else:
+            income[i] += float(amount)
+    return MonthlyLedger(months, categories, income, expense)
@@ -0,0 +1,60 @@
+"""
+INSIGHTS MODULE - FIT WORKERS (insights/fit_workers.py)
+-------------------------------------------------------
+Functions executed inside the model-fitting process pool
+(see `run_fits` in insights/forecasting.py).
+
+Pool workers are started with `spawn`, so this module deliberately imports
+nothing from Django: a worker only needs NumPy, pandas and the model library.
+"""
+
+import logging
+
+import numpy as np
+
+
+def warm_worker():
+    """
+    Pool initializer. Imports Prophet (and through it cmdstanpy) once per
+    worker process, so individual fits don't pay the import cost.
+    """
+    logging.getLogger('cmdstanpy').setLevel(logging.WARNING)
+    try:
+        import prophet  # noqa: F401
+    except ImportError:
+        pass
+
+
+def fit_prophet(prophet_kwargs, ds, y, future_ds):
+    """Fits one Prophet model on (ds, y) and returns yhat for `future_ds` as a float array."""
+    import pandas as pd
+    from prophet import Prophet
+
+    m = Prophet(**prophet_kwargs)
+    m.fit(pd.DataFrame({'ds': pd.to_datetime(ds), 'y': y}))
+    forecast = m.predict(pd.DataFrame({'ds': pd.to_datetime(future_ds)}))
+    return forecast['yhat'].to_numpy(dtype='f8')
+
+
+def linear_extrapolation(ds, y, future_ds, lookback_days=60):
+    """
+    Least-squares trend line through the last `lookback_days` of daily spend
+    (days without spend count as zero), extended over `future_ds` and clipped
+    at zero. Fallback when a model fit fails or times out.
+    """
+    ds = np.asarray(ds, dtype='datetime64[D]')
+    future_ds = np.asarray(future_ds, dtype='datetime64[D]')
+    if len(ds) == 0:
+        return np.zeros(len(future_ds))
+
+    last = ds.max()
+    first = max(ds.min(), last - np.timedelta64(lookback_days - 1, 'D'))
+    n_days = int((last - first).astype(int)) + 1
+    daily = np.zeros(n_days)
+    keep = ds >= first
+    np.add.at(daily, (ds[keep] - first).astype(int), np.asarray(y, dtype='f8')[keep])
+
+    t = np.arange(n_days)
+    slope, intercept = np.polyfit(t, daily, 1) if n_days > 1 else (0.0, daily[0])
+    future_t = (future_ds - first).astype(int)
+    return np.clip(intercept + slope * future_t, 0, None)
@@ -0,0 +1,138 @@
+"""
+INSIGHTS MODULE - FORECAST CACHE (insights/forecast_cache.py)
+-------------------------------------------------------------
+Caches forecast outputs so repeated dashboard loads do not refit a model for
+every category on every request.
+
+Entries are keyed by (user, category, forecast config, data version), where the
+data version is a fingerprint of the user's latest transaction change
+(see AnalyticsContext.data_version). Any create, edit or delete produces a new
+version, so stale forecasts are never served; they simply age out.
+
+Two tiers:
+- An in-process LRU (bounded size + TTL) answers repeated hits in microseconds.
+- A shared Django cache backend (`FORECAST_CACHE_ALIAS`, file-based by default,
+  Redis in production) survives restarts and is shared between workers.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import InvalidCacheBackendError
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class ForecastCache:
+    """Two-tier (local LRU + shared backend) cache for forecast outputs."""
+
+    def __init__(self, alias=None, maxsize=None, ttl=None):
+        self.alias = alias
+        self.maxsize = maxsize if maxsize is not None else getattr(settings, 'FORECAST_CACHE_LRU_SIZE', 512)
+        self.ttl = ttl if ttl is not None else getattr(settings, 'FORECAST_CACHE_TTL', 6 * 60 * 60)
+        self._local = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def backend(self):
+        alias = self.alias or getattr(settings, 'FORECAST_CACHE_ALIAS', 'forecasts')
+        try:
+            return caches[alias]
+        except InvalidCacheBackendError:
+            return caches['default']
+
+    @staticmethod
+    def make_key(user_id, category, config, version):
+        config_hash = hashlib.sha1(json.dumps(config, sort_keys=True, default=str).encode()).hexdigest()[:12]
+        category_hash = hashlib.sha1(str(category).encode()).hexdigest()[:12]
+        return f"forecast:{user_id}:{category_hash}:{config_hash}:{version}"
+
+    # ── Local LRU tier ────────────────────────────────────────────────────
+    def _local_get(self, key):
+        with self._lock:
+            entry = self._local.get(key)
+            if entry is None:
+                return _MISSING
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._local[key]
+                return _MISSING
+            self._local.move_to_end(key)
+            return value
+
+    def _local_set(self, key, value):
+        with self._lock:
+            self._local[key] = (value, time.monotonic() + self.ttl)
+            self._local.move_to_end(key)
+            while len(self._local) > self.maxsize:
+                self._local.popitem(last=False)
+
+    # ── Public API ────────────────────────────────────────────────────────
+    def get(self, user_id, category, config, version):
+        """Returns the cached forecast for this key, or None on a miss."""
+        key = self.make_key(user_id, category, config, version)
+
+        value = self._local_get(key)
+        if value is not _MISSING:
+            self.hits += 1
+            return value
+
+        try:
+            value = self.backend.get(key, _MISSING)
+        except Exception as e:
+            logger.warning(f"[Forecast cache] Backend read failed: {e}")
+            value = _MISSING
+        if value is not _MISSING:
+            self.hits += 1
+            self._local_set(key, value)
+            return value
+
+        self.misses += 1
+        return None
+
+    def set(self, user_id, category, config, version, value):
+        key = self.make_key(user_id, category, config, version)
+        self._local_set(key, value)
+        try:
+            self.backend.set(key, value, self.ttl)
+        except Exception as e:
+            logger.warning(f"[Forecast cache] Backend write failed: {e}")
+
+    def get_or_compute(self, user_id, category, config, version, compute):
+        """
+        Returns the cached forecast for this key, calling `compute()` on a miss.
+        A `None` result (failed fit) is returned but not cached.
+        """
+        value = self.get(user_id, category, config, version)
+        if value is None:
+            value = compute()
+            if value is not None:
+                self.set(user_id, category, config, version, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._local.clear()
+        self.hits = self.misses = 0
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 3) if total else 0.0,
+            'local_entries': len(self._local),
+        }
+
+
+forecast_cache = ForecastCache()
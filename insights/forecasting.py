@@ -0,0 +1,411 @@
+"""
+INSIGHTS MODULE - FORECASTING ENGINES (insights/forecasting.py)
+---------------------------------------------------------------
+Pluggable daily-spend forecasters behind one interface. Every caller
+(`forecast_spending`, the overspend predictions and the budget trajectory)
+only needs "daily spend for the next N days", so engines are interchangeable:
+
+- `ets` (default): exponential smoothing with a day-of-week seasonal term,
+  written in NumPy. All of a user's series are fitted together as one
+  (series × days) matrix, so it costs a few milliseconds per request.
+- `prophet`: Facebook Prophet, one fit per series. Opt-in high-accuracy mode,
+  chosen via `INSIGHTS_FORECAST_ENGINE` or `?engine=prophet` on an endpoint.
+
+Forecasts go through `forecast_cache`, keyed per series, so only series
+whose data changed are refitted.
+
+Per-series engines can fan their fits out over a warm process pool
+(`INSIGHTS_FIT_WORKERS`), with a per-fit timeout (`INSIGHTS_FIT_TIMEOUT`)
+after which the series falls back to linear extrapolation. A running fit
+cannot be cancelled, so a timeout also replaces the pool and kills its
+workers; later requests never queue behind a hung fit.
+"""
+
+import logging
+import multiprocessing
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait as wait_for_futures
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+
+from insights import fit_workers
+from insights.forecast_cache import forecast_cache
+
+logger = logging.getLogger(__name__)
+
+
+# ==========================================
+# 1. MODEL-FITTING PROCESS POOL
+# ==========================================
+
+_fit_pool = None
+_fit_pool_lock = threading.Lock()
+
+
+def get_fit_pool():
+    """
+    Returns the shared fitting pool, or None when `INSIGHTS_FIT_WORKERS` is 0
+    (fit in the calling process). Workers are spawned once and stay warm.
+    """
+    global _fit_pool
+    workers = getattr(settings, 'INSIGHTS_FIT_WORKERS', 0)
+    if workers <= 0:
+        return None
+    with _fit_pool_lock:
+        if _fit_pool is None:
+            _fit_pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=fit_workers.warm_worker,
+            )
+        return _fit_pool
+
+
+def shutdown_fit_pool(wait=True):
+    """Stops the fitting pool; the next `get_fit_pool()` starts a fresh one."""
+    global _fit_pool
+    with _fit_pool_lock:
+        pool, _fit_pool = _fit_pool, None
+    if pool is not None:
+        pool.shutdown(wait=wait, cancel_futures=True)
+
+
+def _discard_fit_pool(pool):
+    """
+    Retires a pool whose fit overran its timeout: the next `get_fit_pool()`
+    spawns fresh workers, and the old ones are terminated rather than left
+    busy (`Future.cancel()` cannot stop a fit that is already running).
+    """
+    global _fit_pool
+    with _fit_pool_lock:
+        if _fit_pool is pool:
+            _fit_pool = None
+    processes = list((getattr(pool, '_processes', None) or {}).values())
+    pool.shutdown(wait=False, cancel_futures=True)
+    for process in processes:
+        process.terminate()
+
+
+def run_fits(fit_fn, jobs, fallback):
+    """
+    Runs `fit_fn(*args)` for every `{key: args}` job and returns `{key: result}`.
+    With a pool the fits run in parallel, at most one per worker in flight, and
+    each gets `INSIGHTS_FIT_TIMEOUT` seconds from its submission. A fit that
+    raises, returns None or misses its deadline is replaced by `fallback(key)`;
+    a missed deadline also swaps in a fresh pool, and the fits that were
+    running beside it are resubmitted there.
+    """
+    if not jobs:
+        return {}
+
+    pool = get_fit_pool()
+    results = {}
+    if pool is None:
+        for key, args in jobs.items():
+            try:
+                results[key] = fit_fn(*args)
+            except Exception as e:
+                logger.error(f"Model fit failed for {key}: {e}")
+            if results.get(key) is None:
+                results[key] = fallback(key)
+        return results
+
+    timeout = getattr(settings, 'INSIGHTS_FIT_TIMEOUT', 20)
+    in_flight = getattr(settings, 'INSIGHTS_FIT_WORKERS', 1)
+    queue = deque(jobs.items())
+    running = {}  # future -> (key, args, deadline)
+    while pool is not None and (queue or running):
+        while queue and len(running) < in_flight:
+            key, args = queue.popleft()
+            try:
+                running[pool.submit(fit_fn, *args)] = (key, args, time.monotonic() + timeout)
+            except (BrokenProcessPool, RuntimeError):
+                # Broken, or retired by another request's timeout: retry once on a fresh pool
+                _discard_fit_pool(pool)
+                pool = get_fit_pool()
+                running[pool.submit(fit_fn, *args)] = (key, args, time.monotonic() + timeout)
+
+        next_deadline = min(deadline for _, _, deadline in running.values())
+        done, _ = wait_for_futures(
+            running, timeout=max(next_deadline - time.monotonic(), 0), return_when=FIRST_COMPLETED,
+        )
+        for future in done:
+            key = running.pop(future)[0]
+            try:
+                results[key] = future.result()
+            except BrokenProcessPool:
+                logger.warning(f"Model fit for {key} lost its worker")
+            except Exception as e:
+                logger.error(f"Model fit failed for {key}: {e}")
+
+        now = time.monotonic()
+        expired = [future for future, (_, _, deadline) in running.items() if deadline <= now]
+        if expired:
+            for future in expired:
+                logger.warning(f"Model fit for {running.pop(future)[0]} timed out after {timeout}s")
+            # The overrunning fits keep their workers busy until killed: replace the pool
+            queue.extendleft((key, args) for key, args, _ in reversed(list(running.values())))
+            running.clear()
+            _discard_fit_pool(pool)
+            pool = get_fit_pool()
+
+    for key in jobs:
+        if results.get(key) is None:
+            results[key] = fallback(key)
+    return results
+
+
+# ==========================================
+# 2. ENGINES
+# ==========================================
+
+class DailyMatrix:
+    """
+    Dense (series × days) matrix of daily totals, with zero on days without
+    spend. `first_seen[i]` is the column of series i's first observation;
+    earlier columns are padding, not zero-spend days.
+    """
+
+    def __init__(self, keys, first_date, values, first_seen):
+        self.keys = list(keys)
+        self.first_date = pd.Timestamp(first_date).normalize()
+        self.values = values
+        self.first_seen = first_seen
+
+    @property
+    def n_days(self):
+        return self.values.shape[1]
+
+    @property
+    def dates(self):
+        return pd.date_range(self.first_date, periods=self.n_days)
+
+    @property
+    def observed_days(self):
+        """Number of days with spend, per series."""
+        return (self.values != 0).sum(axis=1)
+
+    @classmethod
+    def from_pivot(cls, pivot):
+        """From a date-indexed pivot with one column per series (e.g. AnalyticsContext.daily_by_category)."""
+        if pivot.empty:
+            return cls([], pd.Timestamp.today(), np.zeros((0, 0)), np.zeros(0, dtype=int))
+        full = pivot.reindex(pd.date_range(pivot.index.min(), pivot.index.max()), fill_value=0.0)
+        values = full.to_numpy(dtype='f8').T
+        return cls(full.columns, full.index[0], values, (values != 0).argmax(axis=1))
+
+    @classmethod
+    def from_histories(cls, histories):
+        """From `{key: date-indexed Series}` of observed daily totals."""
+        keys = [k for k, series in histories.items() if len(series)]
+        if not keys:
+            return cls([], pd.Timestamp.today(), np.zeros((0, 0)), np.zeros(0, dtype=int))
+        first = min(histories[k].index.min() for k in keys)
+        last = max(histories[k].index.max() for k in keys)
+        values = np.zeros((len(keys), (last - first).days + 1))
+        first_seen = np.zeros(len(keys), dtype=int)
+        for row, key in enumerate(keys):
+            offsets = (pd.DatetimeIndex(histories[key].index) - first).days.to_numpy()
+            np.add.at(values[row], offsets, histories[key].to_numpy(dtype='f8'))
+            first_seen[row] = offsets.min()
+        return cls(keys, first, values, first_seen)
+
+    def select(self, rows):
+        """Sub-matrix of the given row positions (or boolean mask)."""
+        rows = np.flatnonzero(rows) if np.asarray(rows).dtype == bool else np.asarray(rows, dtype=int)
+        return DailyMatrix([self.keys[i] for i in rows], self.first_date, self.values[rows], self.first_seen[rows])
+
+    def to_histories(self):
+        """Back to `{key: Series}` of the days with spend, for per-series engines."""
+        dates = self.dates
+        histories = {}
+        for row, key in enumerate(self.keys):
+            spent = self.values[row] != 0
+            histories[key] = pd.Series(self.values[row, spent], index=dates[spent])
+        return histories
+
+
+class ForecastEngine:
+    """
+    Base interface. `forecast()` receives `{key: pd.Series}` of observed daily
+    totals (date-indexed) and returns `{key: np.ndarray}` of `horizon` daily
+    predictions for the days `start, start + 1, ...`. Keys that cannot be
+    forecast are left out of the result.
+
+    `forecast_matrix()` takes the same data as a DailyMatrix; batched engines
+    override it, per-series engines inherit the conversion to histories.
+    """
+
+    name = None
+
+    def config(self):
+        """Parameters that change the output; part of every cache key."""
+        return {'engine': self.name}
+
+    def forecast(self, histories, start, horizon):
+        raise NotImplementedError
+
+    def forecast_matrix(self, matrix, start, horizon):
+        return self.forecast(matrix.to_histories(), start, horizon)
+
+
+class ExponentialSmoothingEngine(ForecastEngine):
+    """
+    Level = exponentially weighted mean of daily spend (days without spend
+    count as zero), plus an additive day-of-week offset shrunk towards zero
+    when a weekday has little weight behind it. Both are weighted sums, so
+    the whole user is fitted with two matrix products.
+    """
+
+    name = 'ets'
+
+    def __init__(self, halflife_days=28, seasonal_prior=1.0):
+        self.halflife_days = halflife_days
+        self.seasonal_prior = seasonal_prior
+
+    def config(self):
+        return {'engine': self.name, 'halflife_days': self.halflife_days, 'seasonal_prior': self.seasonal_prior}
+
+    def forecast(self, histories, start, horizon):
+        return self.forecast_matrix(DailyMatrix.from_histories(histories), start, horizon)
+
+    def forecast_matrix(self, matrix, start, horizon):
+        start = pd.Timestamp(start).normalize()
+        if not matrix.keys or horizon <= 0:
+            return {}
+
+        # Window ends the day before `start`; only the last ~8 half-lives carry weight worth keeping
+        end = start - pd.Timedelta(days=1)
+        first = max(matrix.first_date, end - pd.Timedelta(days=8 * self.halflife_days - 1))
+        n_days = (end - first).days + 1
+        if n_days <= 0:
+            return {}
+
+        offset = (first - matrix.first_date).days
+        values = np.zeros((len(matrix.keys), n_days))
+        copied = min(matrix.n_days - offset, n_days)
+        if copied > 0:
+            values[:, :copied] = matrix.values[:, offset:offset + copied]
+        observed = np.arange(n_days)[None, :] >= (matrix.first_seen - offset)[:, None]
+
+        decay = 0.5 ** ((n_days - 1 - np.arange(n_days)) / self.halflife_days)
+        weights = observed * decay
+        weighted = values * weights
+
+        total_weight = weights.sum(axis=1)
+        level = np.divide(weighted.sum(axis=1), total_weight, out=np.zeros(len(matrix.keys)), where=total_weight > 0)
+
+        weekdays = pd.date_range(first, periods=n_days).dayofweek.to_numpy()
+        onehot = np.eye(7)[weekdays]
+        dow_weight = weights @ onehot
+        dow_mean = np.divide(weighted @ onehot, dow_weight, out=np.repeat(level[:, None], 7, axis=1), where=dow_weight > 0)
+        seasonal = (dow_weight / (dow_weight + self.seasonal_prior)) * (dow_mean - level[:, None])
+
+        future_weekdays = pd.date_range(start, periods=horizon).dayofweek.to_numpy()
+        predictions = np.clip(level[:, None] + seasonal[:, future_weekdays], 0, None)
+        return {key: predictions[row] for row, key in enumerate(matrix.keys) if total_weight[row] > 0}
+
+
+class ProphetEngine(ForecastEngine):
+    """One Prophet fit per series (weekly seasonality only; history is daily)."""
+
+    name = 'prophet'
+
+    def __init__(self, **prophet_kwargs):
+        self.prophet_kwargs = {
+            'daily_seasonality': False, 'weekly_seasonality': True, 'yearly_seasonality': False,
+            **prophet_kwargs,
+        }
+
+    @staticmethod
+    def available():
+        try:
+            import prophet  # noqa: F401
+        except ImportError:
+            return False
+        return True
+
+    def config(self):
+        return {'engine': self.name, **self.prophet_kwargs}
+
+    def forecast(self, histories, start, horizon):
+        if horizon <= 0:
+            return {}
+        future_ds = pd.date_range(pd.Timestamp(start).normalize(), periods=horizon).to_numpy()
+        jobs, fallback_inputs = {}, {}
+        for key, series in histories.items():
+            if len(series) < 2:
+                continue
+            ds = pd.DatetimeIndex(series.index).to_numpy()
+            y = series.to_numpy(dtype='f8')
+            jobs[key] = (self.prophet_kwargs, ds, y, future_ds)
+            fallback_inputs[key] = (ds, y, future_ds)
+
+        # Fits that fail or time out are replaced with a linear trend
+        return run_fits(
+            fit_workers.fit_prophet, jobs,
+            fallback=lambda key: fit_workers.linear_extrapolation(*fallback_inputs[key]),
+        )
+
+
+# ==========================================
+# 3. ENGINE SELECTION & CACHED FORECASTS
+# ==========================================
+
+FORECAST_ENGINES = {
+    ExponentialSmoothingEngine.name: ExponentialSmoothingEngine,
+    ProphetEngine.name: ProphetEngine,
+}
+
+
+def get_engine(name=None):
+    """
+    Returns the engine called `name` (default: `INSIGHTS_FORECAST_ENGINE`).
+    Prophet falls back to the NumPy engine when it is not installed.
+    """
+    name = name or getattr(settings, 'INSIGHTS_FORECAST_ENGINE', ExponentialSmoothingEngine.name)
+    if name not in FORECAST_ENGINES:
+        raise ValueError(f"Unknown forecast engine '{name}'. Choose from: {', '.join(FORECAST_ENGINES)}")
+    if name == ProphetEngine.name and not ProphetEngine.available():
+        logger.warning("Prophet is not installed; using the 'ets' forecast engine instead.")
+        name = ExponentialSmoothingEngine.name
+    return FORECAST_ENGINES[name]()
+
+
+def daily_series(frame):
+    """Observed daily totals of a `date`/`amount` frame, as a date-indexed Series."""
+    return frame.groupby('date')['amount'].sum()
+
+
+def forecast_daily(engine, user_id, version, histories, start, horizon):
+    """
+    Runs `engine` over `histories` (a `{key: Series}` dict or a DailyMatrix),
+    serving per-series results from the forecast cache and fitting all
+    missing series in one batched call.
+    """
+    config = {**engine.config(), 'start': pd.Timestamp(start).date(), 'horizon': horizon}
+    keys = histories.keys if isinstance(histories, DailyMatrix) else list(histories)
+    results, missing = {}, []
+    for key in keys:
+        cached = forecast_cache.get(user_id, key, config, version)
+        if cached is None:
+            missing.append(key)
+        else:
+            results[key] = np.asarray(cached)
+
+    if missing:
+        if isinstance(histories, DailyMatrix):
+            wanted = set(missing)
+            subset = histories.select([i for i, key in enumerate(histories.keys) if key in wanted])
+            fitted = engine.forecast_matrix(subset, start, horizon)
+        else:
+            fitted = engine.forecast({key: histories[key] for key in missing}, start, horizon)
+        for key, values in fitted.items():
+            forecast_cache.set(user_id, key, config, version, [float(v) for v in values])
+            results[key] = np.asarray(values, dtype='f8')
+    return results
@@ -0,0 +1,151 @@
+"""
+Management Command: benchmark_forecast_engines
+==============================================
+Usage:
+    python manage.py benchmark_forecast_engines
+    python manage.py benchmark_forecast_engines --store
+    python manage.py benchmark_forecast_engines --store --users <uuid> <uuid>
+    python manage.py benchmark_forecast_engines --synthetic-users 50 --seed 42
+
+What it does:
+    Backtests every available forecast engine (insights/forecasting.py) on the
+    same data. For each user, the last `--holdout` days of expenses are hidden,
+    each category with at least 5 spend days before the cutoff is forecast
+    over the holdout window, and the forecast total is compared to the actual.
+
+    Reports per engine:
+        - fit time (all users, no forecast cache)
+        - MAE of the per-category holdout totals
+        - WAPE (sum of absolute errors / sum of actuals)
+
+    Data source defaults to a seeded synthetic ledger (weekly pattern + noise).
+    `--store` backtests on real ledgers instead, read per user from the
+    columnar store (transactions/store.py) the insights endpoints use.
+"""
+
+import time
+
+import numpy as np
+import pandas as pd
+from django.core.management.base import BaseCommand
+
+from insights.forecasting import FORECAST_ENGINES, ProphetEngine, daily_series
+
+SYNTHETIC_CATEGORIES = {
+    # category: (mean daily spend, weekend multiplier, probability of spending on a day)
+    'Food & Dining': (450.0, 1.6, 0.85),
+    'Transport': (180.0, 0.5, 0.7),
+    'Shopping': (900.0, 2.2, 0.25),
+    'Entertainment': (600.0, 2.5, 0.2),
+    'Bills & Utilities': (1500.0, 1.0, 0.08),
+}
+
+
+def synthetic_ledger(users, days, seed):
+    """Seeded synthetic expense ledger: weekday/weekend pattern, drift and gamma noise."""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(end=pd.Timestamp.today().normalize(), periods=days)
+    weekend = dates.dayofweek.to_numpy() >= 5
+    frames = []
+    for user in range(users):
+        scale = rng.uniform(0.5, 2.0)
+        for cat, (mean, weekend_mult, p_spend) in SYNTHETIC_CATEGORIES.items():
+            drift = np.linspace(1.0, rng.uniform(0.8, 1.25), days)
+            expected = mean * scale * drift * np.where(weekend, weekend_mult, 1.0)
+            spent = rng.random(days) < p_spend
+            amounts = rng.gamma(4.0, expected / 4.0)
+            frames.append(pd.DataFrame({
+                'user_id': f'synthetic-{user}', 'date': dates[spent],
+                'amount': amounts[spent].round(2), 'category': cat, 'type': 'Expense',
+            }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def store_ledger(user_ids=None):
+    """The ledgers of `user_ids` (default: every user with transactions) from the per-user store."""
+    from transactions.models import Transaction
+    from transactions.store import load_user_frame
+
+    if not user_ids:
+        user_ids = Transaction.objects.values_list('user_id', flat=True).distinct().iterator()
+    frames = []
+    for user_id in user_ids:
+        df = load_user_frame(user_id)
+        if not df.empty:
+            frames.append(
+                df[['date', 'amount', 'category', 'type']].astype({'category': str, 'type': str}).assign(user_id=str(user_id))
+            )
+    if not frames:
+        return pd.DataFrame(columns=['user_id', 'date', 'amount', 'category', 'type'])
+    return pd.concat(frames, ignore_index=True)
+
+
+class Command(BaseCommand):
+    help = "Backtest the insights forecast engines against each other for accuracy and speed."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--store', action='store_true', help="Use the real per-user ledgers instead of synthetic data.")
+        parser.add_argument('--users', nargs='+', help="With --store: only these user ids.")
+        parser.add_argument('--synthetic-users', type=int, default=25)
+        parser.add_argument('--days', type=int, default=180, help="Days of synthetic history per user.")
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--holdout', type=int, default=30, help="Days hidden from the engines.")
+        parser.add_argument('--engines', nargs='+', default=list(FORECAST_ENGINES))
+
+    def handle(self, *args, **options):
+        if options['store']:
+            ledger = store_ledger(options['users'])
+            source = f"the per-user store ({ledger['user_id'].nunique()} users)"
+        else:
+            ledger = synthetic_ledger(options['synthetic_users'], options['days'], options['seed'])
+            source = f"synthetic ({options['synthetic_users']} users, {options['days']} days, seed {options['seed']})"
+
+        holdout = options['holdout']
+        cases = self._build_cases(ledger[ledger['type'] == 'Expense'], holdout)
+        n_series = sum(len(histories) for histories, _, _ in cases)
+        if not n_series:
+            self.stdout.write(self.style.WARNING("⚠️  Not enough history to backtest (need 5+ spend days per category)."))
+            return
+
+        self.stdout.write(self.style.HTTP_INFO(
+            f"📈  Backtesting on {source}: {len(cases)} users, {n_series} category series, {holdout}-day holdout"
+        ))
+        self.stdout.write(f"{'engine':<10}{'fit time':>12}{'ms/series':>12}{'MAE':>12}{'WAPE':>10}")
+
+        for name in options['engines']:
+            if name == ProphetEngine.name and not ProphetEngine.available():
+                self.stdout.write(f"{name:<10}{'(not installed)':>34}")
+                continue
+            engine = FORECAST_ENGINES[name]()
+
+            errors, actual_total = [], 0.0
+            started = time.perf_counter()
+            for histories, cutoff, actuals in cases:
+                predicted = engine.forecast(histories, cutoff, holdout)
+                for cat, actual in actuals.items():
+                    errors.append(abs(float(predicted[cat].sum()) - actual) if cat in predicted else actual)
+                    actual_total += actual
+            elapsed = time.perf_counter() - started
+
+            mae = float(np.mean(errors))
+            wape = sum(errors) / actual_total if actual_total else 0.0
+            self.stdout.write(
+                f"{name:<10}{elapsed:>11.3f}s{elapsed * 1000 / n_series:>12.2f}{mae:>12.2f}{wape:>9.1%}"
+            )
+
+    @staticmethod
+    def _build_cases(expenses, holdout):
+        """Per user: (histories before the cutoff, cutoff date, actual holdout totals per category)."""
+        cases = []
+        for _, user_df in expenses.groupby('user_id'):
+            cutoff = user_df['date'].max() - pd.Timedelta(days=holdout - 1)
+            train, test = user_df[user_df['date'] < cutoff], user_df[user_df['date'] >= cutoff]
+            histories = {}
+            for cat, cat_df in train.groupby('category'):
+                series = daily_series(cat_df)
+                if len(series) >= 5:
+                    histories[cat] = series
+            if histories:
+                actuals = test.groupby('category')['amount'].sum().reindex(list(histories), fill_value=0.0)
+                cases.append((histories, cutoff, actuals.to_dict()))
+        return cases
@@ -26,10 +26,9 @@ from datetime import timedelta, datetime
 
 from django.core.management.base import BaseCommand
 from django.utils import timezone
-from django.db.models import Sum
 
 from insights.models import AIInsightsLog
-from transactions.models import Transaction
+from transactions.aggregates import category_spend
 
 logger = logging.getLogger(__name__)
 
@@ -55,6 +54,7 @@ class Command(BaseCommand):
             return
 
         evaluated = 0
+        spend_by_user = {}
         for log in pending_logs:
             ctx = log.context_snapshot or {}
             spend_at_advice = ctx.get("current_month_spending", 0.0)
@@ -68,18 +68,11 @@ class Command(BaseCommand):
             if not category:
                 continue
 
-            # Pull current month spending for this user+category
+            # Pull current month spending for this user+category (monthly rollup, once per user)
             today = datetime.today()
-            current_spend = float(
-                Transaction.objects.filter(
-                    user=log.user,
-                    category_type="expense",
-                    date__year=today.year,
-                    date__month=today.month,
-                ).filter(
-                    category__name=category,
-                ).aggregate(total=Sum("amount"))["total"] or 0.0
-            )
+            if log.user_id not in spend_by_user:
+                spend_by_user[log.user_id] = category_spend(log.user_id, today.year, today.month)
+            current_spend = spend_by_user[log.user_id].get(category, 0.0)
 
             # Compute pct change
             if spend_at_advice > 0:
@@ -0,0 +1,32 @@
+"""
+INSIGHTS MODULE - MIDDLEWARE (insights/middleware.py)
+-----------------------------------------------------
+Surfaces how many times a request loaded a user's transaction frame, so
+endpoints that re-read the store instead of sharing an AnalyticsContext stand out.
+"""
+
+import logging
+
+from insights.analytics import reset_frame_loads, restore_frame_loads, frame_loads
+
+logger = logging.getLogger(__name__)
+
+
+class AnalyticsLoadMiddleware:
+    """Adds an `X-Analytics-Frame-Loads` header to every response that loaded a frame."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = reset_frame_loads()
+        try:
+            response = self.get_response(request)
+            loads = frame_loads()
+        finally:
+            restore_frame_loads(token)
+
+        if loads:
+            response['X-Analytics-Frame-Loads'] = str(loads)
+            logger.info(f"[Analytics] {request.path} loaded the transaction frame {loads}x")
+        return response
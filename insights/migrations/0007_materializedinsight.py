@@ -0,0 +1,30 @@
+# Generated by Django 5.1.6 on 2026-10-18 05:53
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('insights', '0006_add_outcome_fields_to_aiinsightslog'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MaterializedInsight',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('ai_insights', 'AI Insights'), ('overspend_predictions', 'Overspend Predictions'), ('budget_trajectory', 'Budget Trajectory')], max_length=32)),
+                ('payload', models.JSONField(default=list)),
+                ('data_version', models.CharField(max_length=40)),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'kind'), name='unique_materialized_insight')],
+            },
+        ),
+    ]
@@ -40,6 +40,32 @@ class AIInsightsLog(models.Model):
     def __str__(self):
         return f"{self.user.username} - {self.feature_name} ({self.created_at.strftime('%Y-%m-%d')}) [{self.outcome_label}]"
 
+class MaterializedInsight(models.Model):
+    """
+    Precomputed output of an expensive insights endpoint (see insights/precompute.py).
+    `data_version` fingerprints the inputs the payload was built from; a row
+    whose version no longer matches is stale and gets recomputed.
+    """
+    KIND_CHOICES = [
+        ('ai_insights',           'AI Insights'),
+        ('overspend_predictions', 'Overspend Predictions'),
+        ('budget_trajectory',     'Budget Trajectory'),
+    ]
+
+    user         = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    kind         = models.CharField(max_length=32, choices=KIND_CHOICES)
+    payload      = models.JSONField(default=list)
+    data_version = models.CharField(max_length=40)
+    computed_at  = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'kind'], name='unique_materialized_insight'),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} - {self.kind} @ {self.data_version}"
+
 # ==========================================
 # 2. SAVINGS & GOALS MODELS
 # ==========================================
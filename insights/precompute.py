@@ -0,0 +1,122 @@
+"""
+INSIGHTS MODULE - PRECOMPUTE (insights/precompute.py)
+-----------------------------------------------------
+Serves the expensive insights endpoints (AI insights, overspend predictions,
+budget trajectory) from the MaterializedInsight table.
+
+Each kind is stored with a version fingerprint of its inputs: the user's
+transaction data version, their budgets, and (for month-to-date kinds) today's
+date. A request whose fingerprint matches the stored row is answered straight
+from the table; otherwise the payload is computed inline and written through,
+so a cache miss costs exactly what the endpoint used to cost.
+
+Rows are refreshed off the request path by the Celery tasks in insights/tasks.py.
+Only the default forecast engine is materialized; a request for another engine
+(e.g. `?engine=prophet`) is computed inline and relies on the forecast cache.
+"""
+
+import hashlib
+import json
+import logging
+from datetime import date
+
+import numpy as np
+
+from insights.analytics import AnalyticsContext
+from insights.forecasting import get_engine
+from insights.models import MaterializedInsight
+from insights.utils import (
+    get_advanced_ai_insights,
+    compute_overspend_predictions,
+    compute_budget_trajectory,
+)
+from transactions.models import Budget
+
+logger = logging.getLogger(__name__)
+
+# kind -> (compute function, depends on today's date, depends on budgets)
+INSIGHT_KINDS = {
+    'ai_insights': (get_advanced_ai_insights, False, False),
+    'overspend_predictions': (compute_overspend_predictions, True, True),
+    'budget_trajectory': (compute_budget_trajectory, True, True),
+}
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    return str(value)
+
+
+def _to_json(payload):
+    """Round-trips the payload through JSON so cached and fresh responses are identical."""
+    return json.loads(json.dumps(payload, default=_json_default))
+
+
+def insight_version(user, kind, ctx, engine):
+    """Fingerprint of everything the `kind` payload depends on."""
+    _, by_date, by_budgets = INSIGHT_KINDS[kind]
+    parts = [kind, ctx.data_version, json.dumps(engine.config(), sort_keys=True)]
+    if by_budgets:
+        parts.append(repr(list(
+            Budget.objects.filter(user=user).order_by('id').values_list('id', 'category', 'monthly_limit')
+        )))
+    if by_date:
+        parts.append(date.today().isoformat())
+    return hashlib.sha1('|'.join(parts).encode()).hexdigest()
+
+
+def refresh_insight(user, kind, ctx=None):
+    """Computes one kind with the default engine and writes it to the materialized table."""
+    ctx = ctx or AnalyticsContext(user)
+    engine = get_engine()
+    version = insight_version(user, kind, ctx, engine)
+    compute = INSIGHT_KINDS[kind][0]
+    payload = _to_json(compute(user, ctx, engine=engine))
+    MaterializedInsight.objects.update_or_create(
+        user=user, kind=kind,
+        defaults={'payload': payload, 'data_version': version},
+    )
+    return payload
+
+
+def get_or_compute_insight(user, kind, ctx=None, engine=None):
+    """
+    Returns the materialized payload for `kind` if it is still current,
+    otherwise computes it inline and stores it for the next request.
+    """
+    ctx = ctx or AnalyticsContext(user)
+    default_engine = get_engine()
+    if engine is not None and engine.config() != default_engine.config():
+        return _to_json(INSIGHT_KINDS[kind][0](user, ctx, engine=engine))
+
+    version = insight_version(user, kind, ctx, default_engine)
+    row = MaterializedInsight.objects.filter(user=user, kind=kind).only('payload', 'data_version').first()
+    if row is not None and row.data_version == version:
+        return row.payload
+
+    logger.debug(f"[Precompute] Miss for {kind} (user {user.pk}); computing inline")
+    return refresh_insight(user, kind, ctx)
+
+
+def precompute_user(user, kinds=None, stale_only=False):
+    """
+    Refreshes every (or the given) insight kind for one user off a single shared
+    frame. With `stale_only`, kinds whose stored row matches the current inputs
+    are skipped, so duplicate refresh tasks for the same data cost one frame load.
+    """
+    ctx = AnalyticsContext(user)
+    stored = {}
+    if stale_only:
+        engine = get_engine()
+        stored = dict(MaterializedInsight.objects.filter(user=user).values_list('kind', 'data_version'))
+    refreshed = 0
+    for kind in kinds or INSIGHT_KINDS:
+        if stale_only and stored.get(kind) == insight_version(user, kind, ctx, engine):
+            continue
+        try:
+            refresh_insight(user, kind, ctx)
+            refreshed += 1
+        except Exception as e:
+            logger.error(f"[Precompute] {kind} failed for user {user.pk}: {e}")
+    return refreshed
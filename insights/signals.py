@@ -1,26 +1,36 @@
 """
     Every time a new AIInsightsLog row is saved:
-    - Fire the export_ai_training_data management command in a
-      background thread so the training CSV stays fresh WITHOUT
-      blocking the HTTP response.
+    - Schedule the export_ai_training_data management command on the
+      coalescing job runner (backend/jobs.py) so the training CSV stays
+      fresh WITHOUT blocking the HTTP response; a burst of logs runs
+      one export.
 
     The export is skipped if no evaluated (non-pending) records
     exist yet, keeping the CSV clean.
+
+    Every time a Transaction or Budget is saved or deleted:
+    - Queue a Celery refresh of the owner's precomputed insights
+      (insights/tasks.py) once the DB transaction commits. A burst of
+      writes in one process publishes one task; duplicate tasks from
+      other processes find their rows current and skip the work.
 """
 
 import logging
-import threading
 
-from django.db.models.signals import post_save
+from django.conf import settings
+from django.db import transaction as db_transaction
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 
+from backend import jobs
 from insights.models import AIInsightsLog
+from transactions.models import Transaction, Budget
 
 logger = logging.getLogger(__name__)
 
 
 def _run_export():
-    """Runs in a daemon thread — fires the management command without blocking the web request."""
+    """Runs on the job runner — fires the management command without blocking the web request."""
     try:
         from django.core.management import call_command
         call_command("export_ai_training_data", all=True, verbosity=0)
@@ -36,6 +46,45 @@ def on_ai_insight_saved(sender, instance, created, **kwargs):
     AI insight is logged, keeping the feedback dataset up-to-date.
     """
     if created:
-        t = threading.Thread(target=_run_export, daemon=True)
-        t.start()
+        # One export per coalescing window, however many logs are written (backend/jobs.py)
+        jobs.schedule('export-ai-training-data', _run_export)
         logger.debug(f"[Signal] AIInsightsLog #{instance.pk} saved — export queued.")
+
+
+# ==========================================
+# INSIGHT PRECOMPUTE TRIGGERS
+# ==========================================
+
+def _publish_precompute(user_id, countdown):
+    """Publishes the refresh task; runs on the job runner so a slow or down broker never blocks a request."""
+    from insights.tasks import precompute_user_insights
+    try:
+        precompute_user_insights.apply_async(args=[str(user_id)], countdown=countdown, retry=False)
+    except Exception as e:
+        logger.warning(f"[Precompute] Could not queue insight refresh for user {user_id}: {e}")
+
+
+def schedule_insight_precompute(user_id):
+    """
+    Queues one background refresh of the user's MaterializedInsight rows after
+    the surrounding DB transaction commits. Writes in this process within the
+    job runner's coalescing window share one published task. There is no
+    cross-process "already queued" flag (the default cache is per process):
+    every task re-checks each row's data version and skips current ones.
+    """
+    if not getattr(settings, 'INSIGHTS_PRECOMPUTE_ON_WRITE', True):
+        return
+    countdown = getattr(settings, 'INSIGHTS_PRECOMPUTE_COUNTDOWN', 30)
+
+    def _enqueue():
+        # Published off the request thread so a slow or down broker never blocks it
+        jobs.schedule(f'insights-precompute:{user_id}', _publish_precompute, user_id, countdown)
+
+    db_transaction.on_commit(_enqueue)
+
+
+@receiver([post_save, post_delete], sender=Transaction)
+@receiver([post_save, post_delete], sender=Budget)
+def on_insight_inputs_changed(sender, instance, **kwargs):
+    """Transactions and budgets feed every materialized insight kind."""
+    schedule_insight_precompute(instance.user_id)
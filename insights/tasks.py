@@ -0,0 +1,38 @@
+from celery import shared_task
+from django.contrib.auth import get_user_model
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(ignore_result=True)
+def precompute_user_insights(user_id):
+    """
+    Refreshes the stale MaterializedInsight rows of one user.
+    Queued by insights/signals.py whenever the user's transactions or budgets
+    change; a run queued for data another run already materialized is a no-op.
+    """
+    from insights.precompute import precompute_user
+
+    user = get_user_model().objects.filter(pk=user_id).first()
+    if user is None:
+        return 0
+    refreshed = precompute_user(user, stale_only=True)
+    logger.info(f"[Precompute] Refreshed {refreshed} insights for user {user_id}")
+    return refreshed
+
+
+@shared_task
+def precompute_all_insights():
+    """
+    Nightly sweep: queues a refresh for every user with transactions, so the
+    date-dependent insights (month-to-date trajectory, overspend) roll over.
+    """
+    from transactions.models import Transaction
+
+    user_ids = Transaction.objects.values_list('user_id', flat=True).distinct()
+    queued = 0
+    for user_id in user_ids.iterator():
+        precompute_user_insights.delay(str(user_id))
+        queued += 1
+    return f"Queued insight precompute for {queued} users."
@@ -1,10 +1,32 @@
 import json
-from django.test import TestCase, Client
+import threading
+import time
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import IsolationForest
+from django.core.cache import cache, caches
+from django.db import connection
+from django.test import TestCase, Client, override_settings, tag
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth import get_user_model
 from django.urls import reverse
-from insights.models import BudgetInsight, SavingsGoal
+from rest_framework.test import APIClient
+from backend import jobs
+from backend.jobs import JobScheduler
+from backend.testing import TempDirMixin
+from insights.analytics import AnalyticsContext
+from insights.data import monthly_ledger
+from insights.fit_workers import linear_extrapolation
+from insights.forecast_cache import ForecastCache
+from insights.forecasting import ExponentialSmoothingEngine, get_fit_pool, run_fits, shutdown_fit_pool
+from insights.models import AIInsightsLog, BudgetInsight, MaterializedInsight, SavingsGoal
+from insights.precompute import precompute_user
+from insights.tasks import precompute_user_insights
+from insights.utils import detect_anomalies
 from transactions.models import Transaction, Category, Budget as TransactionsBudget, BudgetHistory
-from datetime import datetime
+from datetime import date, datetime, timedelta
 from django.utils.timezone import now
 from rest_framework_simplejwt.tokens import RefreshToken
 from decimal import Decimal
@@ -90,3 +112,414 @@ class InsightsViewLogicalTests(TestCase):
         # Check database directly for the logical update
         food_budget.refresh_from_db()
         self.assertEqual(food_budget.monthly_limit, Decimal('650.00'))
+
+
+class AnalyticsContextTests(TempDirMixin, TestCase):
+    """The insights endpoints share one transaction frame load per request."""
+
+    temp_dir_settings = {'TRANSACTION_STORE_DIR': None}
+
+    def setUp(self):
+        super().setUp()
+        self.client = Client()
+        self.user = User.objects.create_user(username='ctxuser', email='ctx@example.com', password='pw')
+        refresh = RefreshToken.for_user(self.user)
+        self.client.defaults['HTTP_AUTHORIZATION'] = f'Bearer {refresh.access_token}'
+
+        food = Category.objects.create(user=self.user, name="Food")
+        start = date.today() - timedelta(days=40)
+        for i in range(30):
+            Transaction.objects.create(
+                user=self.user, amount=100 + (900 if i == 20 else i), category=food,
+                category_type='expense', date=start + timedelta(days=i),
+            )
+
+    def test_ai_insights_loads_frame_once(self):
+        response = self.client.get(reverse('ai-insights'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Analytics-Frame-Loads'], '1')
+
+    def test_category_detail_loads_frame_once(self):
+        response = self.client.get(reverse('category-insight-detail'), {'category': 'Food'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Analytics-Frame-Loads'], '1')
+
+
+class ForecastCacheTests(TestCase):
+    """Fitted forecasts are reused until the user's data version changes."""
+
+    def setUp(self):
+        caches['default'].clear()
+        self.cache = ForecastCache(alias='default', maxsize=2, ttl=60)
+        self.calls = 0
+
+    def _fit(self):
+        self.calls += 1
+        return 123.45
+
+    def test_repeat_hits_skip_the_fit(self):
+        config = {'model': 'prophet', 'horizon': 30}
+        for _ in range(3):
+            self.assertEqual(self.cache.get_or_compute('u1', 'Food', config, 'v1', self._fit), 123.45)
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(self.cache.stats()['hits'], 2)
+
+    def test_new_data_version_or_config_refits(self):
+        self.cache.get_or_compute('u1', 'Food', {'horizon': 30}, 'v1', self._fit)
+        self.cache.get_or_compute('u1', 'Food', {'horizon': 30}, 'v2', self._fit)
+        self.cache.get_or_compute('u1', 'Food', {'horizon': 7}, 'v2', self._fit)
+        self.assertEqual(self.calls, 3)
+
+    def test_local_tier_is_bounded_lru(self):
+        for cat in ('Food', 'Rent', 'Travel'):
+            self.cache.get_or_compute('u1', cat, {}, 'v1', self._fit)
+        self.assertEqual(self.cache.stats()['local_entries'], 2)
+
+
+class MaterializedInsightTests(TempDirMixin, TestCase):
+    """Expensive insights are served from precomputed rows until their inputs change."""
+
+    temp_dir_settings = {'TRANSACTION_STORE_DIR': None}
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.client = Client()
+        self.user = User.objects.create_user(username='mvuser', email='mv@example.com', password='pw')
+        refresh = RefreshToken.for_user(self.user)
+        self.client.defaults['HTTP_AUTHORIZATION'] = f'Bearer {refresh.access_token}'
+
+        self.food = Category.objects.create(user=self.user, name="Food")
+        for i in range(12):
+            Transaction.objects.create(
+                user=self.user, amount=50 + i, category=self.food,
+                category_type='expense', date=date.today() - timedelta(days=i),
+            )
+        TransactionsBudget.objects.create(user=self.user, category='Food', monthly_limit=Decimal('1000'))
+
+    def test_views_serve_precomputed_rows(self):
+        self.assertEqual(precompute_user(self.user), 3)
+        self.assertEqual(MaterializedInsight.objects.filter(user=self.user).count(), 3)
+
+        with mock.patch('insights.precompute.refresh_insight') as refresh:
+            for name in ('ai-insights', 'overspend-predictions', 'budget-trajectory'):
+                response = self.client.get(reverse(name))
+                self.assertEqual(response.status_code, 200)
+            refresh.assert_not_called()
+
+        stored = MaterializedInsight.objects.get(user=self.user, kind='overspend_predictions')
+        self.assertEqual(stored.payload[0]['category'], 'Food')
+
+    def test_budget_change_triggers_inline_recompute(self):
+        precompute_user(self.user)
+        TransactionsBudget.objects.filter(user=self.user).update(monthly_limit=Decimal('10'))
+        response = self.client.get(reverse('overspend-predictions'))
+        self.assertEqual(response.json()[0]['limit'], 10.0)
+
+    def test_burst_of_writes_queues_one_refresh(self):
+        jobs.flush()
+        with mock.patch('insights.signals._publish_precompute') as publish:
+            with self.captureOnCommitCallbacks(execute=True):
+                for i in range(5):
+                    Transaction.objects.create(
+                        user=self.user, amount=10, category=self.food,
+                        category_type='expense', date=date.today(),
+                    )
+            jobs.flush()
+        self.assertEqual(publish.call_count, 1)
+
+    def test_refresh_task_skips_current_rows_only(self):
+        precompute_user(self.user)
+        self.assertEqual(precompute_user_insights(str(self.user.id)), 0)  # duplicate run: nothing to do
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Transaction.objects.create(
+                user=self.user, amount=999, category=self.food, category_type='expense', date=date.today(),
+            )
+        self.assertEqual(precompute_user_insights(str(self.user.id)), 3)
+
+
+class DetectAnomaliesBenchmark(TestCase):
+    """
+    Micro-benchmark of the anomaly attribution path on synthetic frames.
+    Run alone with: python manage.py test insights --tag=benchmark
+    """
+
+    SIZES = (1_000, 10_000, 100_000)
+    CATEGORIES = ['Food', 'Rent', 'Travel', 'Shopping', 'Bills', 'Health', 'Fun', 'Other']
+
+    def _context(self, n_rows):
+        rng = np.random.default_rng(42)
+        days = max(n_rows // 20, 30)
+        amounts = rng.gamma(2.0, 150.0, n_rows)
+        amounts[rng.choice(n_rows, n_rows // 200, replace=False)] *= 25  # spikes
+        ctx = AnalyticsContext(user=None)
+        ctx.df = pd.DataFrame({
+            'id': np.arange(n_rows),
+            'date': pd.Timestamp('2020-01-01') + pd.to_timedelta(rng.integers(0, days, n_rows), unit='D'),
+            'amount': amounts,
+            'category': pd.Categorical(rng.choice(self.CATEGORIES, n_rows)),
+            'type': pd.Categorical(['Expense'] * n_rows, categories=['Expense', 'Income']),
+        })
+        return ctx
+
+    def test_attribution_matches_per_day_groupby(self):
+        ctx = self._context(self.SIZES[0])
+        anomalies = detect_anomalies(None, ctx)
+        self.assertTrue(anomalies)
+
+        # Reference: the original per-day filter + groupby attribution
+        df, daily = ctx.df, ctx.daily.copy()
+        daily['anomaly'] = IsolationForest(contamination=0.05, random_state=42).fit_predict(daily[['amount']])
+        expected = []
+        for day in daily.loc[daily['anomaly'] == -1, 'date']:
+            totals = df[df['date'] == day].groupby('category', observed=True)['amount'].sum()
+            expected.append((totals.idxmax(), round(totals.max(), 6)))
+        self.assertEqual([(a['category'], round(a['data_point'], 6)) for a in anomalies], expected)
+
+    @tag('benchmark')
+    def test_runtime_by_size(self):
+        timings = {}
+        for n_rows in self.SIZES:
+            ctx = self._context(n_rows)
+            _ = ctx.df  # exclude frame construction from the timing
+            start = time.perf_counter()
+            detect_anomalies(None, ctx)
+            timings[n_rows] = time.perf_counter() - start
+
+        print("\n[benchmark] detect_anomalies: " + ", ".join(f"{n:,} rows {t * 1000:.0f}ms" for n, t in timings.items()))
+        self.assertLess(timings[100_000], 5.0)
+
+
+class ForecastEngineTests(TestCase):
+    """The NumPy engine fits every series at once and picks up weekly seasonality."""
+
+    def test_ets_recovers_weekday_pattern_for_every_series(self):
+        dates = pd.date_range('2026-01-05', periods=84)  # 12 full weeks, Monday first
+        weekend = dates.dayofweek >= 5
+        histories = {
+            'Food': pd.Series(np.where(weekend, 300.0, 100.0), index=dates),
+            'Rent': pd.Series([1000.0], index=[dates[0]]),
+        }
+        start = dates[-1] + pd.Timedelta(days=1)
+        result = ExponentialSmoothingEngine().forecast(histories, start, 7)
+
+        self.assertEqual(set(result), {'Food', 'Rent'})
+        food = result['Food']
+        self.assertEqual(len(food), 7)
+        self.assertAlmostEqual(food[:5].mean(), 100.0, delta=15)
+        self.assertAlmostEqual(food[5:].mean(), 300.0, delta=30)
+        self.assertTrue((result['Rent'] >= 0).all())
+
+    def test_unknown_engine_is_rejected(self):
+        user = User.objects.create_user(username='enguser', email='eng@example.com', password='pw')
+        client = Client()
+        client.defaults['HTTP_AUTHORIZATION'] = f'Bearer {RefreshToken.for_user(user).access_token}'
+        response = client.get(reverse('overspend-predictions'), {'engine': 'bogus'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_matrix_path_matches_per_series_histories(self):
+        rng = np.random.default_rng(7)
+        n_rows = 5_000
+        ctx = AnalyticsContext(user=None)
+        ctx.df = pd.DataFrame({
+            'date': pd.Timestamp('2025-01-01') + pd.to_timedelta(rng.integers(0, 365, n_rows), unit='D'),
+            'amount': rng.gamma(2.0, 100.0, n_rows),
+            'category': pd.Categorical(rng.choice([f'Cat {i}' for i in range(24)], n_rows)),
+        })
+        engine, start = ExponentialSmoothingEngine(), pd.Timestamp('2026-01-01')
+
+        batched = engine.forecast_matrix(ctx.category_day_matrix, start, 30)
+        per_series = engine.forecast(
+            {cat: g.groupby('date')['amount'].sum() for cat, g in ctx.df.groupby('category', observed=True)},
+            start, 30,
+        )
+        self.assertEqual(len(batched), 24)
+        for cat, values in per_series.items():
+            np.testing.assert_allclose(batched[cat], values)
+
+
+class FitPoolTests(TestCase):
+    """Per-series fits fan out over the process pool and time out to a fallback."""
+
+    def tearDown(self):
+        shutdown_fit_pool(wait=False)
+
+    def test_pool_runs_fits_and_falls_back_on_timeout(self):
+        with override_settings(INSIGHTS_FIT_WORKERS=2, INSIGHTS_FIT_TIMEOUT=5):
+            shutdown_fit_pool()
+            # Warm the workers so spawn time doesn't count against the timeout below
+            ok = run_fits(np.full, {'Food': ((3,), 2.0), 'Rent': ((3,), 9.0)}, fallback=lambda key: None)
+            np.testing.assert_array_equal(ok['Food'], [2.0, 2.0, 2.0])
+            np.testing.assert_array_equal(ok['Rent'], [9.0, 9.0, 9.0])
+
+        with override_settings(INSIGHTS_FIT_WORKERS=2, INSIGHTS_FIT_TIMEOUT=0.5):
+            # time.sleep returns None (a failed fit) and the 3s sleep blows the deadline
+            result = run_fits(time.sleep, {'Slow': (3,), 'Fast': (0,)}, fallback=lambda key: f'linear:{key}')
+        self.assertEqual(result, {'Slow': 'linear:Slow', 'Fast': 'linear:Fast'})
+
+    def test_timed_out_fit_does_not_block_the_next_request(self):
+        with override_settings(INSIGHTS_FIT_WORKERS=1, INSIGHTS_FIT_TIMEOUT=0.5):
+            shutdown_fit_pool()
+            run_fits(np.full, {'Warm': ((1,), 0.0)}, fallback=lambda key: None)
+            hung = get_fit_pool()
+            started = time.perf_counter()
+            self.assertEqual(run_fits(time.sleep, {'Hung': (30,)}, fallback=lambda key: 'linear'), {'Hung': 'linear'})
+            self.assertIsNot(get_fit_pool(), hung)
+
+        with override_settings(INSIGHTS_FIT_WORKERS=1, INSIGHTS_FIT_TIMEOUT=10):
+            ok = run_fits(np.full, {'Food': ((2,), 4.0), 'Rent': ((2,), 5.0)}, fallback=lambda key: None)
+        np.testing.assert_array_equal(ok['Rent'], [5.0, 5.0])
+        self.assertLess(time.perf_counter() - started, 15)  # the hung 30s fit was killed, not waited for
+
+    def test_linear_extrapolation_follows_trend(self):
+        ds = np.arange('2026-01-01', '2026-01-31', dtype='datetime64[D]')
+        y = np.arange(30, dtype='f8') * 10 + 100
+        future = np.arange('2026-01-31', '2026-02-03', dtype='datetime64[D]')
+        np.testing.assert_allclose(linear_extrapolation(ds, y, future), [400.0, 410.0, 420.0])
+
+
+class BudgetSuggestionQueryTests(TestCase):
+    """ai_budget_suggestions reads every current limit in one query, however many categories."""
+
+    def test_query_count_does_not_grow_with_categories(self):
+        user = User.objects.create_user(username='suggest', password='pw')
+        client = APIClient()
+        client.force_authenticate(user)
+        counts, created = [], 0
+        for n in (2, 6):
+            for i in range(created, n):
+                cat = Category.objects.create(user=user, name=f'Cat {i}')
+                Transaction.objects.create(user=user, amount=100 + i, category=cat, category_type='expense', date=now().date())
+                TransactionsBudget.objects.create(user=user, category=f'Cat {i}', monthly_limit=500)
+            created = n
+            client.get(reverse('ai-budget-suggestions'))  # warm the user's columnar partition
+            with CaptureQueriesContext(connection) as ctx:
+                res = client.get(reverse('ai-budget-suggestions'))
+            counts.append(len(ctx))
+        self.assertEqual(counts[0], counts[1])
+        self.assertEqual(len(res.json()['suggestions']), 6)
+        self.assertTrue(all(s['current_limit'] == 500.0 for s in res.json()['suggestions']))
+
+
+class MonthlyLedgerTests(TestCase):
+    """Month x category totals come from one SQL query, not from the user's frame."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='ledger', email='ledger@example.com', password='pw')
+        food = Category.objects.create(user=self.user, name='Food')
+        rent = Category.objects.create(user=self.user, name='Rent')
+        for amount, cat, type_, day in [
+            (100, food, 'expense', '2026-02-10'), (40, None, 'expense', '2026-02-11'),
+            (1000, None, 'income', '2026-03-01'), (250, food, 'expense', '2026-03-02'),
+            (700, rent, 'expense', '2026-03-03'), (80, food, 'expense', '2026-03-04'),
+        ]:
+            Transaction.objects.create(user=self.user, amount=amount, category=cat, category_type=type_, date=day)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_ledger_totals(self):
+        with self.assertNumQueries(1):
+            ledger = monthly_ledger(self.user)
+        self.assertEqual(ledger.months, [(2026, 2), (2026, 3)])
+        self.assertEqual(ledger.current_month, (2026, 3))
+        self.assertEqual(ledger.expense.shape, (2, 3))
+        self.assertEqual(ledger.month_income((2026, 3)), 1000.0)
+        self.assertEqual(ledger.month_expense((2026, 3)), 1030.0)
+        self.assertEqual(ledger.month_expense((2026, 2), 'Other'), 40.0)
+        self.assertEqual(list(ledger.expense_by_category((2026, 3)).items()), [('Rent', 700.0), ('Food', 330.0)])
+        self.assertFalse(ledger.has_expenses('Travel'))
+
+    def test_category_detail_uses_sql_month_totals(self):
+        with mock.patch('insights.utils.generate_category_llm_insight', return_value='ok') as llm:
+            res = self.client.get(reverse('category-insight-detail'), {'category': 'Food'})
+        self.assertEqual(res.status_code, 200)
+        data = llm.call_args[0][0]
+        self.assertEqual((data['current_month_spending'], data['previous_month_spending']), (330.0, 100.0))
+        self.assertEqual(data['percentage_change'], 230.0)
+
+    def test_monthly_review_summary(self):
+        with mock.patch('insights.utils.generate_monthly_xai_report', return_value={}) as report:
+            self.client.get(reverse('monthly-review'))
+        summary = report.call_args[0][0]
+        self.assertEqual(summary['top_categories'], ['Rent', 'Food'])
+        self.assertEqual((summary['current_month_income'], summary['previous_month_spending']), (1000.0, 140.0))
+
+
+class RecentExpenseByCategoryTests(TestCase):
+    def test_current_and_previous_month_per_category(self):
+        frame = pd.DataFrame({
+            'amount': [100.0, 40.0, 250.0, 80.0, 999.0, 5.0],
+            'category': pd.Categorical(['Food', 'Rent', 'Food', 'Food', 'Salary', 'Rent']),
+            'month': pd.array([202512, 202512, 202601, 202601, 202601, 202510], dtype='int32'),
+            'is_expense': [True, True, True, True, False, True],
+        })
+        frame['category_code'] = frame['category'].cat.codes
+        ctx = AnalyticsContext(user=None)
+        with mock.patch.object(AnalyticsContext, 'df', frame):
+            self.assertEqual((ctx.current_month, ctx.previous_month), (202601, 202512))
+            recent = ctx.recent_expense_by_category
+        self.assertEqual(list(recent.index), ['Food', 'Rent'])
+        self.assertEqual(recent.loc['Food'].tolist(), [330.0, 100.0])
+        self.assertEqual(recent.loc['Rent'].tolist(), [0.0, 40.0])
+
+
+class JobRunnerTests(TestCase):
+    """Signal-driven work goes through the coalescing runner in backend/jobs.py."""
+
+    def test_burst_of_insight_logs_runs_one_export(self):
+        jobs.flush()
+        user = User.objects.create_user(username='burst', email='burst@example.com', password='pw')
+        before = jobs.stats()
+        with mock.patch('insights.signals._run_export') as export:
+            for i in range(1000):
+                AIInsightsLog.objects.create(user=user, feature_name='burst', generated_insight=f'#{i}')
+            self.assertEqual(export.call_count, 0)
+            self.assertEqual(jobs.stats()['pending'], 1)
+            self.assertEqual(jobs.flush(), 1)
+        self.assertEqual(export.call_count, 1)
+        after = jobs.stats()
+        self.assertEqual(after['coalesced'] - before['coalesced'], 999)
+        self.assertEqual(after['pending'], 0)
+
+    def test_same_key_never_runs_concurrently(self):
+        scheduler = JobScheduler(max_workers=4, window=0.05)
+        release, active, peak, calls = threading.Event(), [0], [0], []
+
+        def work(n):
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+            calls.append(n)
+            release.wait(2)
+            active[0] -= 1
+
+        scheduler.schedule('k', work, 1, delay=0)
+        scheduler.schedule('k', work, 2, delay=0)  # arrives while the first run is busy
+        release.set()
+        for _ in range(100):  # the follow-up run waits out the window before it is queued
+            if scheduler.stats()['completed'] == 2:
+                break
+            threading.Event().wait(0.05)
+        self.assertEqual((sorted(calls), peak[0]), ([1, 2], 1))
+
+    def test_countdowns_share_one_timer_thread_and_flush_cancels_them(self):
+        scheduler = JobScheduler(max_workers=2, window=0.2)
+        done = []
+        threads = threading.active_count()
+        for i in range(50):
+            scheduler.schedule(f'k{i}', done.append, i)
+        self.assertEqual(threading.active_count() - threads, 1)
+        self.assertEqual(scheduler.stats()['pending'], 50)
+
+        self.assertEqual(scheduler.flush(), 50)
+        threading.Event().wait(0.3)  # past the window: the flushed countdowns must not run again
+        self.assertTrue(scheduler.wait_idle(2))
+        self.assertEqual(sorted(done), list(range(50)))
+
+        scheduler.schedule('late', done.append, 'late', delay=0.05)
+        for _ in range(100):
+            if 'late' in done:
+                break
+            threading.Event().wait(0.02)
+        self.assertTrue(scheduler.wait_idle(2))
+        self.assertEqual(done.count('late'), 1)
@@ -6,7 +6,7 @@ It houses the Machine Learning models, API integrations (Gemini), and Pandas dat
 
 Main Features:
 - Isolation Forest (Anomaly Detection)
-- Prophet (Time-Series Forecasting)
+- Exponential smoothing / Prophet (Time-Series Forecasting)
 - XGBoost (Budget Reallocation heuristic simulation)
 - Gemini 2.0 (LLM Analysis & Subscriptions extraction)
 """
@@ -14,6 +14,9 @@ Main Features:
 import pandas as pd
 from datetime import datetime, timedelta
 from transactions.models import Transaction, Budget
+from transactions.store import load_user_frame
+from insights.analytics import AnalyticsContext, record_frame_load
+from insights.forecasting import get_engine, daily_series, forecast_daily
 from django.db.models import Sum
 from django.conf import settings
 import numpy as np
@@ -27,31 +30,18 @@ warnings.filterwarnings("ignore")
 
 logger = logging.getLogger(__name__)
 
-# Import ML Libraries
-try:
-    from sklearn.ensemble import IsolationForest
-except ImportError:
-    IsolationForest = None
+# ML libraries (sklearn, xgboost, google.generativeai) are imported inside the
+# functions that use them: importing this module from the URLconf must not pull
+# them into every web and Celery process at startup.
 
-try:
-    from prophet import Prophet
-except ImportError:
-    Prophet = None
 
-try:
-    import xgboost as xgb
-except ImportError:
-    xgb = None
-
-try:
-    import google.generativeai as genai
-except ImportError:
-    genai = None
-
-# Configure Gemini if API key exists in settings
-GEMINI_API_KEY = getattr(settings, 'GEMINI_API_KEY', None)
-if genai and GEMINI_API_KEY:
-    genai.configure(api_key=GEMINI_API_KEY)
+def _load_genai():
+    """The Gemini SDK, or None when it is not installed."""
+    try:
+        import google.generativeai as genai
+    except ImportError:
+        return None
+    return genai
 
 
 # ==========================================
@@ -59,76 +49,62 @@ if genai and GEMINI_API_KEY:
 # ==========================================
 
 def get_user_transactions_df(user):
-    """Fetches user transactions from the global real-time CSV export."""
-    import os
-    from django.conf import settings
-    
-    file_path = os.path.join(settings.BASE_DIR, 'media', 'datasets', 'all_transactions.csv')
-    
-    if not os.path.exists(file_path):
-        return pd.DataFrame()
-        
+    """
+    Fetches the user's transactions from their per-user columnar partition
+    (see transactions/store.py). Only this user's rows are read from disk.
+    """
+    record_frame_load()
     try:
-        # Read the consolidated database CSV
-        df = pd.read_csv(file_path)
+        return load_user_frame(user.id)
     except Exception as e:
-        logger.error(f"Failed to read unified CSV: {e}")
-        return pd.DataFrame()
-        
-    if df.empty:
+        logger.error(f"Failed to load transaction partition for user {user.id}: {e}")
         return pd.DataFrame()
 
-    # CRITICAL: Securely isolate the Dataframe to ONLY contain this specific user's transactions
-    df['user_id'] = df['user_id'].astype(str)
-    df = df[df['user_id'] == str(user.id)].copy()
-    
-    if df.empty:
-        return pd.DataFrame()
-
-    
-    df["category"] = df["category"].fillna("Uncategorized")
-    # Titlecase the type to consistently match queries like 'Expense' or 'Income'
-    df["type"] = df["type"].str.capitalize()
-    df["date"] = pd.to_datetime(df["date"])
-    df["amount"] = df["amount"].astype(float)
-    return df
-
 
 # ==========================================
 # 2. MACHINE LEARNING MODELS
 # ==========================================
 
-def detect_anomalies(user):
+def detect_anomalies(user, ctx=None):
     """
     Model 1: Isolation Forest for Anomaly Detection.
     Detects irregular spending spikes.
     """
-    df = get_user_transactions_df(user)
+    ctx = ctx or AnalyticsContext(user)
+    df = ctx.df
     anomalies_list = []
     
-    if df.empty or len(df) < 10 or IsolationForest is None:
+    if df.empty or len(df) < 10:
+        return anomalies_list
+    try:
+        from sklearn.ensemble import IsolationForest
+    except ImportError:
         return anomalies_list
 
-    # Group by date to get daily spending
-    daily_spend = df.groupby("date")["amount"].sum().reset_index()
+    # Daily spending (shared aggregate; copied because we add a column)
+    daily_spend = ctx.daily.copy()
     
     # Train Isolation Forest
     model = IsolationForest(contamination=0.05, random_state=42)
     daily_spend["anomaly"] = model.fit_predict(daily_spend[["amount"]])
     
     # -1 indicates an anomaly (outlier spike)
-    anomalous_days = daily_spend[daily_spend["anomaly"] == -1]
-    
-    for _, row in anomalous_days.iterrows():
-        # Find the category that caused the spike on this day
-        day_transactions = df[df["date"] == row["date"]]
-        top_category = day_transactions.groupby("category")["amount"].sum().idxmax()
-        top_amount = day_transactions.groupby("category")["amount"].sum().max()
-        
+    anomalous_dates = daily_spend.loc[daily_spend["anomaly"] == -1, "date"]
+    if anomalous_dates.empty:
+        return anomalies_list
+
+    # Category that caused each spike: one argmax over the date × category pivot
+    day_matrix = ctx.daily_by_category.loc[anomalous_dates]
+    values = day_matrix.to_numpy()
+    top_idx = values.argmax(axis=1)
+    top_categories = day_matrix.columns[top_idx]
+    top_amounts = values[np.arange(len(values)), top_idx]
+
+    for day, top_category, top_amount in zip(anomalous_dates, top_categories, top_amounts):
         anomalies_list.append({
             "type": "Anomaly",
             "title": f"Unusual Spending Spike: {top_category}",
-            "description": f"You spent ₹{top_amount:.2f} on {top_category} on {row['date'].strftime('%b %d')}, which is unusually high.",
+            "description": f"You spent ₹{top_amount:.2f} on {top_category} on {day.strftime('%b %d')}, which is unusually high.",
             "category": top_category,
             "data_point": float(top_amount)
         })
@@ -136,51 +112,54 @@ def detect_anomalies(user):
     return anomalies_list
 
 
-def forecast_spending(user):
+SPENDING_FORECAST_HORIZON = 30  # days
+
+
+def forecast_spending(user, ctx=None, engine=None):
     """
-    Model 2: Prophet Time-Series Forecasting.
-    Predicts spending trajectory.
+    Model 2: Time-Series Forecasting (see insights/forecasting.py).
+    Predicts each category's spend over the next 30 days. The user's frame is
+    pivoted once into a (categories × days) matrix and every category is
+    forecast in one batched engine call (NumPy smoothing by default, Prophet
+    when selected).
     """
-    df = get_user_transactions_df(user)
+    ctx = ctx or AnalyticsContext(user)
+    df = ctx.df
     forecasts = []
-    
-    if df.empty or Prophet is None:
+
+    if df.empty:
         return forecasts
 
-    # Forecast per category
-    categories = df["category"].unique()
-    for cat in categories:
-        cat_df = df[df["category"] == cat][["date", "amount"]]
-        cat_daily = cat_df.groupby("date")["amount"].sum().reset_index()
-        
-        if len(cat_daily) < 5:
+    # Every category with 5+ spend days, as rows of one dense (categories × days) matrix
+    engine = engine or get_engine()
+    matrix = ctx.category_day_matrix
+    matrix = matrix.select(matrix.observed_days >= 5)
+
+    # Horizon starts the day after the user's latest transaction
+    start = df["date"].max() + pd.Timedelta(days=1)
+    try:
+        predicted = forecast_daily(engine, user.id, ctx.data_version, matrix, start, SPENDING_FORECAST_HORIZON)
+    except Exception as e:
+        logger.error(f"Forecast engine '{engine.name}' failed: {e}")
+        return forecasts
+
+    for cat in matrix.keys:
+        if cat not in predicted:
             continue
-            
-        prophet_df = cat_daily.rename(columns={"date": "ds", "amount": "y"})
-        
-        try:
-            m = Prophet(daily_seasonality=True, yearly_seasonality=False)
-            m.fit(prophet_df)
-            future = m.make_future_dataframe(periods=30)
-            forecast = m.predict(future)
-            
-            # Predict sum for next 30 days
-            next_30_days_sum = forecast.tail(30)['yhat'].sum()
-            if next_30_days_sum > 0:
-                forecasts.append({
-                    "type": "Forecast",
-                    "title": f"Spending Forecast: {cat}",
-                    "description": f"Based on your trends, we project you will spend ₹{next_30_days_sum:.2f} on {cat} in the next 30 days.",
-                    "category": cat,
-                    "data_point": float(next_30_days_sum)
-                })
-        except Exception as e:
-            logger.error(f"Prophet failed for {cat}: {e}")
-            
+        next_30_days_sum = float(predicted[cat].sum())
+        if next_30_days_sum > 0:
+            forecasts.append({
+                "type": "Forecast",
+                "title": f"Spending Forecast: {cat}",
+                "description": f"Based on your trends, we project you will spend ₹{next_30_days_sum:.2f} on {cat} in the next 30 days.",
+                "category": cat,
+                "data_point": next_30_days_sum
+            })
+
     return forecasts
 
 
-def suggest_smart_budgets(user):
+def suggest_smart_budgets(user, ctx=None):
     """
     Model 3: XGBoost / Gradient Boosted Trees for Budget Reallocation.
     Evaluates profile against quantitative heuristics to shape optimal budgets.
@@ -190,10 +169,15 @@ def suggest_smart_budgets(user):
     as multipliers for the risk score, making recommendations progressively
     smarter as more AIInsightsLog evaluations accumulate.
     """
-    df = get_user_transactions_df(user)
+    ctx = ctx or AnalyticsContext(user)
+    df = ctx.df
     suggestions = []
 
-    if df.empty or xgb is None:
+    if df.empty:
+        return suggestions
+    try:
+        import xgboost as xgb
+    except ImportError:
         return suggestions
 
     # ── Load feedback CSV for outcome-based risk weighting ────────────────────
@@ -219,7 +203,7 @@ def suggest_smart_budgets(user):
     except Exception as e:
         logger.warning(f"[Feedback Loop] Could not load training CSV: {e}")
 
-    category_summary = df.groupby("category")["amount"].sum().reset_index()
+    category_summary = ctx.category_totals.copy()
 
     try:
         dtrain = xgb.DMatrix(category_summary[['amount']])
@@ -439,7 +423,6 @@ def generate_monthly_xai_report(user_data_summary, user=None):
     from insights.models import AIInsightsLog
     from django.utils import timezone
     from datetime import timedelta
-    import google.generativeai as genai
 
     feature_name = 'Monthly XAI Review'
 
@@ -477,7 +460,8 @@ def generate_monthly_xai_report(user_data_summary, user=None):
                 memory_context = f"--- HISTORICAL ACCOUNTABILITY ---\n{memory_context_str}\n"
 
     api_key = getattr(settings, 'GEMINI_API_KEY', None)
-    if not api_key or not genai:
+    genai = _load_genai() if api_key else None
+    if not genai:
         return generate_rule_based_monthly_report(user_data_summary, user=user)
 
     genai.configure(api_key=api_key)
@@ -581,11 +565,11 @@ def generate_monthly_xai_report(user_data_summary, user=None):
         }
 
 
-def extract_subscriptions(user):
+def extract_subscriptions(user, ctx=None):
     """
     Calls Gemini to analyze the last 90 days of transactions and figure out subscriptions.
     """
-    df = get_user_transactions_df(user)
+    df = (ctx or AnalyticsContext(user)).df
     if df.empty:
         return []
 
@@ -609,7 +593,8 @@ def extract_subscriptions(user):
         tx_list = random.sample(tx_list, 100)
         
     api_key = getattr(settings, 'GEMINI_API_KEY', None)
-    if not api_key or not genai:
+    genai = _load_genai() if api_key else None
+    if not genai:
         return []
 
     genai.configure(api_key=api_key)
@@ -690,14 +675,9 @@ If no, reference the prior advice and push harder with a more direct recommendat
 """
 
     api_key = getattr(settings, 'GEMINI_API_KEY', None)
-    
-    try:
-        import google.generativeai as genai
-        genai_loaded = True
-    except Exception:
-        genai_loaded = False
+    genai = _load_genai() if api_key else None
 
-    if not genai_loaded or not api_key:
+    if not genai:
         result = generate_rule_based_insight(category_data)
         if user:
             AIInsightsLog.objects.create(
@@ -762,35 +742,30 @@ Format with Markdown bolding. Do not use raw JSON.
         return result
 
 
-def get_advanced_ai_insights(user):
-    """Orchestrates category-by-category AI analysis for the Dashboard using the CSV export."""
-    df = get_user_transactions_df(user)
+def get_advanced_ai_insights(user, ctx=None, engine=None):
+    """
+    Orchestrates category-by-category AI analysis for the Dashboard.
+    The user's frame is loaded once and shared with every model via `ctx`.
+    """
+    ctx = ctx or AnalyticsContext(user)
+    df = ctx.df
     if df.empty:
         return []
 
     # Get ML aggregates
-    anomalies = detect_anomalies(user)
-    forecasts = forecast_spending(user)
-    budgets = suggest_smart_budgets(user)
+    anomalies = detect_anomalies(user, ctx)
+    forecasts = forecast_spending(user, ctx, engine)
+    budgets = suggest_smart_budgets(user, ctx)
     
     anomaly_map = {a['category']: a for a in anomalies}
     forecast_map = {f['category']: f for f in forecasts}
     budget_map = {b['category']: b for b in budgets}
     
-    # Process per expense category
-    categories = df[df['type'] == 'Expense']['category'].unique()
+    # Current/previous month totals of every expense category, from one groupby
+    recent = ctx.recent_expense_by_category
     results = []
-    
-    current_month_str = df['date'].dt.to_period('M').max()
-    prev_month_str = current_month_str - 1
 
-    for cat in categories:
-        cat_df = df[(df['category'] == cat) & (df['type'] == 'Expense')]
-        if cat_df.empty:
-            continue
-            
-        curr_total = cat_df[cat_df['date'].dt.to_period('M') == current_month_str]['amount'].sum()
-        prev_total = cat_df[cat_df['date'].dt.to_period('M') == prev_month_str]['amount'].sum()
+    for cat, curr_total, prev_total in zip(recent.index, recent['current'], recent['previous']):
         pct_change = ((curr_total - prev_total) / prev_total * 100) if prev_total > 0 else (100 if curr_total > 0 else 0)
         
         category_data = {
@@ -824,3 +799,195 @@ def get_advanced_ai_insights(user):
         })
         
     return results
+
+
+# ==========================================
+# 4. BUDGET ADVISORY MODELS
+# Shared by the insights views and the Celery precompute tasks (insights/tasks.py)
+# ==========================================
+
+def compute_budget_trajectory(user, ctx=None, today=None, engine=None):
+    """
+    Zero-Based Budget Trajectory data: cumulative actual spend for the current
+    month plus a forecast (or linear) projection to month-end. Shared by the
+    `get_budget_trajectory` view and the Celery precompute task.
+    """
+    ctx = ctx or AnalyticsContext(user)
+    today = today or datetime.today()
+    current_month = today.month
+    current_year = today.year
+    days_elapsed = today.day
+
+    # Total days in month
+    import calendar
+    total_days = calendar.monthrange(current_year, current_month)[1]
+
+    # Prepare daily expense data for this month from ORM (fast, no CSV needed)
+    from transactions.aggregates import month_bounds
+    month_start, month_end = month_bounds(current_year, current_month)
+    daily_qs = (
+        Transaction.objects.filter(
+            user=user, category_type='expense',
+            date__gte=month_start, date__lt=month_end
+        )
+        .values('date')
+        .annotate(total=Sum('amount'))
+        .order_by('date')
+    )
+    daily_map = {entry['date'].day: float(entry['total']) for entry in daily_qs}
+
+    # Build cumulative actual spend series
+    cumulative = 0.0
+    actual = []
+    for day in range(1, total_days + 1):
+        if day <= days_elapsed:
+            cumulative += daily_map.get(day, 0.0)
+            actual.append(round(cumulative, 2))
+        else:
+            actual.append(None)  # No data yet for future days
+
+    # Forecast the remaining days of the month from the last 60 days of spend.
+    # The engine only runs if there's enough history, otherwise we fall back
+    # to linear extrapolation of the month-to-date burn rate.
+    predicted = [None] * total_days
+    horizon = total_days - days_elapsed
+
+    try:
+        df = ctx.df
+        if not df.empty and len(df) >= 10 and horizon > 0:
+            engine = engine or get_engine()
+            sixty_days_ago = pd.Timestamp(today).normalize() - pd.Timedelta(days=60)
+            hist_df = df[df['is_expense'] & (df['date'] >= sixty_days_ago)]
+            if len(hist_df) >= 5:
+                start = datetime(current_year, current_month, days_elapsed) + timedelta(days=1)
+                forecast = forecast_daily(
+                    engine, user.id, ctx.data_version,
+                    {'__all_expenses__': daily_series(hist_df)}, start, horizon,
+                ).get('__all_expenses__')
+
+                if forecast is not None:
+                    # Convert to cumulative, starting from the last actual cumulative value
+                    last_actual = actual[days_elapsed - 1] or 0.0
+                    pred_cum = last_actual
+
+                    # Set anchor point at day_elapsed (same as last actual)
+                    predicted[days_elapsed - 1] = round(last_actual, 2)
+                    for offset, yhat in enumerate(forecast):
+                        pred_cum += max(0.0, float(yhat))
+                        predicted[days_elapsed + offset] = round(pred_cum, 2)
+    except Exception as e:
+        logger.error(f"Trajectory forecast failed, using linear extrapolation: {e}")
+
+    # Linear extrapolation fallback if the engine didn't populate predictions
+    if all(v is None for v in predicted[days_elapsed:]):
+        last_actual_val = actual[days_elapsed - 1] or 0.0
+        daily_avg = last_actual_val / days_elapsed if days_elapsed > 0 else 0
+        predicted[days_elapsed - 1] = round(last_actual_val, 2)  # anchor
+        running = last_actual_val
+        for day in range(days_elapsed, total_days):
+            running += daily_avg
+            predicted[day] = round(running, 2)
+
+    # Budget cap (total monthly limit)
+    total_budget = float(
+        Budget.objects.filter(user=user).aggregate(
+            total=Sum('monthly_limit')
+        )['total'] or 0
+    )
+
+    return {
+        'days': [f'Day {i}' for i in range(1, total_days + 1)],
+        'actual': actual,
+        'predicted': predicted,
+        'budget_limit': total_budget,
+    }
+
+
+def compute_overspend_predictions(user, ctx=None, today=None, engine=None):
+    """
+    Per-budget month-end spend predictions (forecast engine with linear
+    extrapolation fallback). Shared by the `overspend_predictions` view and the Celery
+    precompute task.
+    """
+    today = today or datetime.today()
+    current_month = today.month
+    current_year = today.year
+    days_elapsed = max(today.day, 1)
+
+    import calendar
+    total_days = calendar.monthrange(current_year, current_month)[1]
+    days_remaining = total_days - days_elapsed
+
+    budgets = Budget.objects.filter(user=user)
+    if not budgets.exists():
+        return []
+
+    # Get this month's actual spend per category (monthly rollup)
+    from transactions.aggregates import category_spend
+    actual_spend = category_spend(user, current_year, current_month)
+
+    # One frame load shared by every budget's forecast; every budgeted category
+    # with enough history is forecast in a single batched engine call.
+    ctx = ctx or AnalyticsContext(user)
+    remaining_forecasts = {}
+    try:
+        df = ctx.df
+        if not df.empty and days_remaining > 0:
+            engine = engine or get_engine()
+            budget_categories = set(budgets.values_list('category', flat=True))
+            counts = df['category'].value_counts()
+            matrix = ctx.category_day_matrix
+            histories = matrix.select([
+                row for row, cat in enumerate(matrix.keys)
+                if cat in budget_categories and counts.get(cat, 0) >= 10
+            ])
+            start = datetime(current_year, current_month, days_elapsed) + timedelta(days=1)
+            remaining_forecasts = forecast_daily(engine, user.id, ctx.data_version, histories, start, days_remaining)
+    except Exception as e:
+        logger.error(f"Overspend forecast failed, using linear extrapolation: {e}")
+
+    predictions = []
+    for budget in budgets:
+        cat = budget.category
+        limit = float(budget.monthly_limit)
+        spent = actual_spend.get(cat, 0.0)
+
+        # Linear extrapolation: daily burn rate × remaining days
+        daily_rate = spent / days_elapsed if days_elapsed > 0 else 0
+        predicted_eom = round(spent + (daily_rate * days_remaining), 2)
+
+        # Forecast engine result is more accurate when there was enough history
+        if cat in remaining_forecasts:
+            predicted_eom = round(spent + float(remaining_forecasts[cat].clip(min=0).sum()), 2)
+
+        will_exceed = predicted_eom > limit
+        overspend_amt = round(predicted_eom - limit, 2) if will_exceed else 0.0
+        pct_predicted = round((predicted_eom / limit) * 100, 1) if limit > 0 else 0
+
+        # Risk levels: safe / warning / danger / exceeded
+        if spent >= limit:
+            risk_level = 'exceeded'
+        elif pct_predicted >= 100:
+            risk_level = 'danger'
+        elif pct_predicted >= 80:
+            risk_level = 'warning'
+        else:
+            risk_level = 'safe'
+
+        predictions.append({
+            'category': cat,
+            'limit': limit,
+            'actual_spent': spent,
+            'predicted_eom': predicted_eom,
+            'pct_predicted': pct_predicted,
+            'will_exceed': will_exceed,
+            'overspend_amount': overspend_amt,
+            'risk_level': risk_level,
+            'days_remaining': days_remaining,
+        })
+
+    # Sort: most at-risk first
+    risk_order = {'exceeded': 0, 'danger': 1, 'warning': 2, 'safe': 3}
+    predictions.sort(key=lambda x: risk_order.get(x['risk_level'], 4))
+
+    return predictions
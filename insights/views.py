@@ -11,15 +11,23 @@ It is organized into four main sections:
 
 from django.http import JsonResponse
 from django.contrib.auth.decorators import login_required
-from insights.utils import get_advanced_ai_insights
+from insights.utils import _load_genai
+from insights.analytics import AnalyticsContext
+from insights.data import monthly_ledger
+from insights.precompute import get_or_compute_insight
+from insights.forecasting import get_engine
 from django.views.decorators.csrf import csrf_exempt
 import json
 from django.db.models import Sum, Avg
 from .models import BudgetInsight, SavingsGoal, AIInsightsLog
 from transactions.models import Budget as TransactionsBudget, BudgetHistory, Transaction
+from transactions.aggregates import (
+    ledger_totals, last_n_months, monthly_rollup, monthly_budget_limits, category_spend, year_bounds,
+)
 from rest_framework import generics
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
+from backend.instrumentation import query_budget
 from rest_framework.response import Response
 
 from django.utils.timezone import now
@@ -31,22 +39,17 @@ from users.models import Profile, FinancialData
 from .serializers import BudgetInsightSerializer
 import pandas as pd
 
-# Optional ML library imports (guarded so server starts even if not installed)
-try:
-    from prophet import Prophet
-except ImportError:
-    Prophet = None
-
-try:
-    import google.generativeai as genai
-except ImportError:
-    genai = None
-
 # ==========================================
 # 1. AI & FORECASTING INSIGHTS
 # These endpoints handle Machine Learning and Gemini LLM features
 # ==========================================
 
+def _requested_engine(request):
+    """Forecast engine from `?engine=` (ets / prophet), or None for the configured default."""
+    name = request.query_params.get('engine')
+    return get_engine(name) if name else None
+
+
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
@@ -54,8 +57,14 @@ def ai_insights(request):
     """
     Returns category-wise ML insights. LLM summaries are NOT generated here.
     They are fetched lazily via the category_insight_detail endpoint on user click.
+    Served from the precomputed MaterializedInsight row when it is still current.
+    Optional `?engine=prophet` forecasts with Prophet instead of the default engine.
     """
-    insights = get_advanced_ai_insights(request.user)
+    try:
+        engine = _requested_engine(request)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    insights = get_or_compute_insight(request.user, 'ai_insights', engine=engine)
 
     if not insights:
         insights.append({
@@ -76,22 +85,23 @@ def monthly_xai_review(request):
     """
     Generates a full Explainable AI Summary covering the entire month.
     """
-    from insights.utils import get_user_transactions_df, generate_monthly_xai_report
+    from insights.utils import generate_monthly_xai_report
     user = request.user
-    df = get_user_transactions_df(user)
+    # Month/category/type totals come from SQL; the frame is only loaded for anomaly detection
+    ledger = monthly_ledger(user)
     
-    if df.empty:
+    if ledger.empty:
         return Response({"error": "No transaction data available for analysis."}, status=400)
         
-    current_month_str = df['date'].dt.to_period('M').max()
-    prev_month_str = current_month_str - 1
+    current_month = ledger.current_month
+    prev_month = ledger.previous_month
 
     # Extract Income and Spending
-    curr_inc = df[(df['date'].dt.to_period('M') == current_month_str) & (df['type'] == 'Income')]['amount'].sum()
-    curr_exp = df[(df['date'].dt.to_period('M') == current_month_str) & (df['type'] == 'Expense')]['amount'].sum()
-    
-    prev_inc = df[(df['date'].dt.to_period('M') == prev_month_str) & (df['type'] == 'Income')]['amount'].sum()
-    prev_exp = df[(df['date'].dt.to_period('M') == prev_month_str) & (df['type'] == 'Expense')]['amount'].sum()
+    curr_inc = ledger.month_income(current_month)
+    curr_exp = ledger.month_expense(current_month)
+
+    prev_inc = ledger.month_income(prev_month)
+    prev_exp = ledger.month_expense(prev_month)
     
     # Financial Health Calculation (Mirrors frontend logic)
     savings_rate = round(((curr_inc - curr_exp) / curr_inc) * 100, 2) if curr_inc > 0 else 0
@@ -100,11 +110,11 @@ def monthly_xai_review(request):
     spending_score = min(50, max(0, ((100 - spending_ratio) / 20) * 50))
     health_score = int(max(0, min(100, savings_score + spending_score)))
     
-    # Top 3 Categories (for quick reference)
-    top_cats = df[(df['date'].dt.to_period('M') == current_month_str) & (df['type'] == 'Expense')].groupby('category')['amount'].sum().nlargest(3).index.tolist()
+    # Full Category Breakdown (for deep behavioral analysis), largest first
+    cat_breakdown = ledger.expense_by_category(current_month)
 
-    # Full Category Breakdown (for deep behavioral analysis)
-    cat_breakdown = df[(df['date'].dt.to_period('M') == current_month_str) & (df['type'] == 'Expense')].groupby('category')['amount'].sum().to_dict()
+    # Top 3 Categories (for quick reference)
+    top_cats = list(cat_breakdown)[:3]
 
     # User Profile Data (for personalization)
     profile = Profile.objects.filter(user=user).first()
@@ -127,7 +137,7 @@ def monthly_xai_review(request):
 
     # Anomalies
     from insights.utils import detect_anomalies
-    anomalies = detect_anomalies(user)
+    anomalies = detect_anomalies(user, AnalyticsContext(user))
 
     user_data_summary = {
         'current_month_income': float(curr_inc),
@@ -163,14 +173,10 @@ def wellness_analyzer(request):
     NEEDS = {'Rent & Housing', 'Bills & Utilities', 'Food & Dining', 'Health & Medical', 'EMI & Loans', 'Transport', 'Education'}
     SAVINGS = {'Investments', 'Savings', 'Emergency Fund'}
     
-    expenses = Transaction.objects.filter(
-        user=user, category_type='expense', date__year=current_year, date__month=current_month
-    ).values('category__name').annotate(total=Sum('amount'))
+    expenses = category_spend(user, current_year, current_month)
     
     needs_tot = wants_tot = sav_tot = 0.0
-    for e in expenses:
-        amt = float(e['total'])
-        cat = e['category__name']
+    for cat, amt in expenses.items():
         if cat in NEEDS:
             needs_tot += amt
         elif cat in SAVINGS:
@@ -204,11 +210,7 @@ def category_burn_rate(request):
     # We'll just borrow the logic from overspend_predictions but format it for the new UI
     budgets = TransactionsBudget.objects.filter(user=user)
     
-    daily_qs = Transaction.objects.filter(
-        user=user, category_type='expense', date__year=current_year, date__month=current_month
-    ).values('category__name').annotate(total=Sum('amount'))
-    
-    actual_spend = {item['category__name']: float(item['total']) for item in daily_qs}
+    actual_spend = category_spend(user, current_year, current_month)
     
     rates = []
     for budget in budgets:
@@ -248,14 +250,11 @@ def peer_benchmarking(request):
     current_year = today.year
     
     # User's top 3 categories
-    expenses = Transaction.objects.filter(
-        user=user, category_type='expense', date__year=current_year, date__month=current_month
-    ).values('category__name').annotate(total=Sum('amount')).order_by('-total')[:3]
+    spend = category_spend(user, current_year, current_month)
+    expenses = sorted(spend.items(), key=lambda item: -item[1])[:3]
     
     stats = []
-    for e in expenses:
-        cat = e['category__name']
-        amt = float(e['total'])
+    for cat, amt in expenses:
         # Simple heuristic average for peer benchmark (to visualize logic independently of real DB scaling)
         # Realistic demographic peer averages usually hover around +/- 15% of actual, but structured dynamically
         import random
@@ -279,9 +278,10 @@ def get_anomaly_heatmap(request):
     """
     Returns daily spending with anomaly markers.
     """
-    from insights.utils import get_user_transactions_df, detect_anomalies
+    from insights.utils import detect_anomalies
     user = request.user
-    df = get_user_transactions_df(user)
+    ctx = AnalyticsContext(user)
+    df = ctx.df
     
     if df.empty:
         return Response([])
@@ -294,10 +294,10 @@ def get_anomaly_heatmap(request):
         return Response([])
         
     # Get daily aggregates
-    daily_spend = df[df['type'] == 'Expense'].groupby(df['date'].dt.strftime('%Y-%m-%d'))['amount'].sum().to_dict()
+    daily_spend = df[df['is_expense']].groupby(df['date'].dt.strftime('%Y-%m-%d'))['amount'].sum().to_dict()
     
     # Run the isolation forest
-    anomalies = detect_anomalies(user)
+    anomalies = detect_anomalies(user, ctx)
     anomaly_dates = [a['title'] for a in anomalies] # Extracted purely for marker
     
     # We rebuild this for the heatmap UI format [date, amount, is_anomaly]
@@ -326,6 +326,7 @@ def get_anomaly_heatmap(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@query_budget(2)
 def get_analysis_summary(request):
     """
     Powers the 3 top metric cards on the Analysis page:
@@ -338,21 +339,10 @@ def get_analysis_summary(request):
     current_month = today.month
     current_year = today.year
 
-    # 1. Total Expenses this month
-    monthly_expenses = float(
-        Transaction.objects.filter(
-            user=user, category_type='expense',
-            date__year=current_year, date__month=current_month
-        ).aggregate(total=Sum('amount'))['total'] or 0
-    )
-
-    # 2. Total monthly income this month
-    monthly_income = float(
-        Transaction.objects.filter(
-            user=user, category_type='income',
-            date__year=current_year, date__month=current_month
-        ).aggregate(total=Sum('amount'))['total'] or 0
-    )
+    # 1-2. Total expenses and income this month (one query)
+    this_month = ledger_totals(user, months=[(current_year, current_month)])['months'][(current_year, current_month)]
+    monthly_expenses = this_month['expense']
+    monthly_income = this_month['income']
 
     # 3. Total active budget across all categories
     total_budget = float(
@@ -383,6 +373,7 @@ def get_analysis_summary(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@query_budget(3)
 def get_spending_trends(request):
     """
     Returns last 6 months of:
@@ -390,47 +381,19 @@ def get_spending_trends(request):
     - budget limits (dashed line)
     Used to draw the Spending vs Budget Trends ECharts bar chart.
     """
+    import calendar
     user = request.user
-    today = datetime.today()
-
-    months_labels = []
-    actual_spends = []
-    budget_limits = []
-
-    for i in range(5, -1, -1):
-        # Walk back i months from today
-        month = (today.month - 1 - i) % 12 + 1
-        year = today.year + ((today.month - 1 - i) // 12)
+    months = last_n_months(6)
 
-        import calendar
-        label = calendar.month_abbr[month]
+    # One grouped query for the expenses, at most two for the budget lines
+    spends = monthly_rollup(Transaction.objects.filter(user=user, category_type='expense'), months)
+    # Sum of all active budget limits for that month from BudgetHistory,
+    # falling back to current budget limits if no history exists yet
+    limits = monthly_budget_limits(user, months)
 
-        # Actual total expenses for this month
-        actual = float(
-            Transaction.objects.filter(
-                user=user, category_type='expense',
-                date__year=year, date__month=month
-            ).aggregate(total=Sum('amount'))['total'] or 0
-        )
-
-        # Sum of all active budget limits for that month from BudgetHistory
-        # Fall back to current budget limits if no history exists yet
-        hist_budget = float(
-            BudgetHistory.objects.filter(
-                user=user, year=year, month=month
-            ).aggregate(total=Sum('previous_limit'))['total'] or 0
-        )
-        if hist_budget == 0:
-            # Use current active limits as fallback
-            hist_budget = float(
-                TransactionsBudget.objects.filter(user=user).aggregate(
-                    total=Sum('monthly_limit')
-                )['total'] or 0
-            )
-
-        months_labels.append(label)
-        actual_spends.append(actual)
-        budget_limits.append(hist_budget)
+    months_labels = [calendar.month_abbr[month] for _, month in months]
+    actual_spends = [spends[key] for key in months]
+    budget_limits = [limits[key] for key in months]
     return Response({
         'months': months_labels,
         'actual_spends': actual_spends,
@@ -440,44 +403,34 @@ def get_spending_trends(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@query_budget(1)
 def get_category_spending_trends(request):
     """
     Returns last 6 months of spending broken down by top 4 categories + "Other".
     Used for a Stacked Bar Chart.
     """
+    import calendar
     user = request.user
-    today = datetime.today()
-
-    months_labels = []
-    month_filters = []
+    month_filters = last_n_months(6)
+    months_labels = [calendar.month_abbr[month] for _, month in month_filters]
 
-    for i in range(5, -1, -1):
-        month = (today.month - 1 - i) % 12 + 1
-        year = today.year + ((today.month - 1 - i) // 12)
-        import calendar
-        months_labels.append(calendar.month_abbr[month])
-        month_filters.append((year, month))
+    # One query: expenses per (month, category) over the whole window
+    rollup = monthly_rollup(
+        Transaction.objects.filter(user=user, category_type='expense'), month_filters, group_by='category__name',
+    )
 
-    start_year, start_month = month_filters[0]
-    start_date = datetime(start_year, start_month, 1)
-    
-    top_qs = (Transaction.objects.filter(
-        user=user, category_type='expense', date__gte=start_date
-    ).values('category__name').annotate(total=Sum('amount')).order_by('-total')[:4])
-    
-    top_cats = [item['category__name'] for item in top_qs if item['category__name']]
+    totals = {}
+    for by_category in rollup.values():
+        for cat, amt in by_category.items():
+            totals[cat] = totals.get(cat, 0.0) + amt
+    ranked = sorted(totals, key=totals.get, reverse=True)[:4]
+    top_cats = [cat for cat in ranked if cat]
 
     series_data = {cat: [0]*6 for cat in top_cats}
     series_data['Other'] = [0]*6
 
-    for idx, (yr, mo) in enumerate(month_filters):
-        qs = Transaction.objects.filter(
-            user=user, category_type='expense', date__year=yr, date__month=mo
-        ).values('category__name').annotate(total=Sum('amount'))
-        
-        for item in qs:
-            cat = item['category__name']
-            amt = float(item['total'] or 0)
+    for idx, key in enumerate(month_filters):
+        for cat, amt in rollup[key].items():
             if cat in top_cats:
                 series_data[cat][idx] += amt
             else:
@@ -508,112 +461,17 @@ def get_budget_trajectory(request):
     Powers the Zero-Based Budget Trajectory chart.
     Returns:
     - `actual`: Cumulative real spend for each day of the current month up to today
-    - `predicted`: Prophet ML predicted cumulative spend for remaining days
+    - `predicted`: Forecast cumulative spend for remaining days (`?engine=prophet` for Prophet)
     - `days`: Day labels ['Day 1', 'Day 2', ...]
     - `budget_limit`: Total monthly budget cap (the green reference line)
+    Served from the precomputed MaterializedInsight row when it is still current.
     """
-    from insights.utils import get_user_transactions_df
-    user = request.user
-    today = datetime.today()
-    current_month = today.month
-    current_year = today.year
-    days_elapsed = today.day
-
-    # Total days in month
-    import calendar
-    total_days = calendar.monthrange(current_year, current_month)[1]
-
-    # Prepare daily expense data for this month from ORM (fast, no CSV needed)
-    daily_qs = (
-        Transaction.objects.filter(
-            user=user, category_type='expense',
-            date__year=current_year, date__month=current_month
-        )
-        .values('date')
-        .annotate(total=Sum('amount'))
-        .order_by('date')
-    )
-    daily_map = {entry['date'].day: float(entry['total']) for entry in daily_qs}
-
-    # Build cumulative actual spend series
-    cumulative = 0.0
-    actual = []
-    for day in range(1, total_days + 1):
-        if day <= days_elapsed:
-            cumulative += daily_map.get(day, 0.0)
-            actual.append(round(cumulative, 2))
-        else:
-            actual.append(None)  # No data yet for future days
-
-    # Build ML prediction from day_elapsed onward using linear extrapolation
-    # Use the daily average burn rate from days elapsed so far as the base rate
-    # Prophet forecasting only runs if there's enough history, otherwise we fall back
-    predicted = [None] * total_days
-
     try:
-        df = get_user_transactions_df(user)
-        if not df.empty and len(df) >= 10:
-            try:
-                from prophet import Prophet
-                # Use last 60 days of daily spend to build a reliable Prophet model
-                sixty_days_ago = pd.Timestamp.now() - pd.Timedelta(days=60)
-                hist_df = df[(df['type'] == 'Expense') & (df['date'] >= sixty_days_ago)].copy()
-                if len(hist_df) >= 5:
-                    daily_hist = hist_df.groupby(hist_df['date'].dt.date)['amount'].sum().reset_index()
-                    daily_hist.columns = ['ds', 'y']
-                    daily_hist['ds'] = pd.to_datetime(daily_hist['ds'])
-
-                    m = Prophet(daily_seasonality=False, yearly_seasonality=False, weekly_seasonality=True)
-                    m.fit(daily_hist)
-
-                    # Predict the remaining days this month
-                    future_dates = pd.date_range(
-                        start=datetime(current_year, current_month, days_elapsed),
-                        end=datetime(current_year, current_month, total_days)
-                    )
-                    future_df = pd.DataFrame({'ds': future_dates})
-                    forecast = m.predict(future_df)
-
-                    # Convert to cumulative, starting from the last actual cumulative value
-                    last_actual = actual[days_elapsed - 1] or 0.0
-                    pred_cum = last_actual
-
-                    # Set anchor point at day_elapsed (same as last actual)
-                    predicted[days_elapsed - 1] = round(last_actual, 2)
-                    for idx, row in forecast.iloc[1:].iterrows():
-                        pred_cum += max(0, row['yhat'])
-                        day_num = row['ds'].day
-                        if 1 <= day_num <= total_days:
-                            predicted[day_num - 1] = round(pred_cum, 2)
-            except Exception:
-                # Prophet unavailable, fall back to linear extrapolation
-                pass
-    except Exception:
-        pass
-
-    # Linear extrapolation fallback if Prophet didn't populate predictions
-    if all(v is None for v in predicted[days_elapsed:]):
-        last_actual_val = actual[days_elapsed - 1] or 0.0
-        daily_avg = last_actual_val / days_elapsed if days_elapsed > 0 else 0
-        predicted[days_elapsed - 1] = round(last_actual_val, 2)  # anchor
-        running = last_actual_val
-        for day in range(days_elapsed, total_days):
-            running += daily_avg
-            predicted[day] = round(running, 2)
-
-    # Budget cap (total monthly limit)
-    total_budget = float(
-        TransactionsBudget.objects.filter(user=user).aggregate(
-            total=Sum('monthly_limit')
-        )['total'] or 0
-    )
-
-    return Response({
-        'days': [f'Day {i}' for i in range(1, total_days + 1)],
-        'actual': actual,
-        'predicted': predicted,
-        'budget_limit': total_budget,
-    }, status=status.HTTP_200_OK)
+        engine = _requested_engine(request)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    data = get_or_compute_insight(request.user, 'budget_trajectory', engine=engine)
+    return Response(data, status=status.HTTP_200_OK)
 
 
 # ==========================================
@@ -625,6 +483,7 @@ def get_budget_trajectory(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@query_budget(3)  # grouped 3-month spend, current limits, and the ledger read when the partition is rebuilt
 def ai_budget_suggestions(request):
     """
     Feature 1 — AI Suggest All Budgets.
@@ -634,7 +493,7 @@ def ai_budget_suggestions(request):
 
     Returns: [{category, suggested_limit, current_avg_spend, reason}]
     """
-    from insights.utils import get_user_transactions_df, suggest_smart_budgets
+    from insights.utils import suggest_smart_budgets
     user = request.user
     today = datetime.today()
 
@@ -665,9 +524,13 @@ def ai_budget_suggestions(request):
     xgb_map = {s['category']: s for s in xgb_suggestions}
 
     # ------- 3. Build response -------
+    # One query for every current limit; lowest id wins, as .first() did per category
+    current_limits = dict(
+        TransactionsBudget.objects.filter(user=user).order_by('-id').values_list('category', 'monthly_limit')
+    )
     suggestions = []
     for cat, avg in sorted(avg_spend.items(), key=lambda x: -x[1]):
-        current_budget = TransactionsBudget.objects.filter(user=user, category=cat).first()
+        current_limit = current_limits.get(cat)
 
         # Suggest 90% of 3-month avg (10% saving target), clamp to a min of ₹100
         suggested = max(round(avg * 0.90, 0), 100)
@@ -683,7 +546,7 @@ def ai_budget_suggestions(request):
             'category': cat,
             'suggested_limit': suggested,
             'current_avg_spend': avg,
-            'current_limit': float(current_budget.monthly_limit) if current_budget else None,
+            'current_limit': float(current_limit) if current_limit is not None else None,
             'reason': reason,
         })
 
@@ -795,10 +658,10 @@ def ai_budget_planner(request):
     api_key = getattr(settings, 'GEMINI_API_KEY', None)
     summary = f"Your ₹{monthly_income:,.0f} income has been split using the 50/30/20 rule, adjusted for your real spending patterns."
     try:
-        if api_key and genai:
-            import google.generativeai as genai_local
-            genai_local.configure(api_key=api_key)
-            model = genai_local.GenerativeModel('gemini-2.0-flash')
+        genai = _load_genai() if api_key else None
+        if genai:
+            genai.configure(api_key=api_key)
+            model = genai.GenerativeModel('gemini-2.0-flash')
             prompt = f"""
 You are a personal finance advisor. A user with ₹{monthly_income:,.0f} monthly income wants a budget plan.
 Their historical spending: {cat_totals}
@@ -824,98 +687,19 @@ Keep it under 50 words. Do NOT use markdown.
 def overspend_predictions(request):
     """
     Feature 3 — Overspending Predictions per budget.
-    For each active budget, uses Prophet (with linear extrapolation fallback)
+    For each active budget, uses the forecast engine (NumPy smoothing by default,
+    `?engine=prophet` for Prophet; linear extrapolation fallback)
     to predict whether the user will exceed their monthly limit by month-end.
 
     Returns: [{category, limit, actual_spent, predicted_eom, will_exceed,
                overspend_amount, risk_level, days_remaining}]
+    Served from the precomputed MaterializedInsight row when it is still current.
     """
-    user = request.user
-    today = datetime.today()
-    current_month = today.month
-    current_year = today.year
-    days_elapsed = max(today.day, 1)
-
-    import calendar
-    total_days = calendar.monthrange(current_year, current_month)[1]
-    days_remaining = total_days - days_elapsed
-
-    budgets = TransactionsBudget.objects.filter(user=user)
-    if not budgets.exists():
-        return Response([], status=status.HTTP_200_OK)
-
-    # Get this month's actual spend per category
-    daily_qs = (
-        Transaction.objects.filter(
-            user=user,
-            category_type='expense',
-            date__year=current_year,
-            date__month=current_month
-        )
-        .values('category__name')
-        .annotate(total=Sum('amount'))
-    )
-    actual_spend = {item['category__name']: float(item['total']) for item in daily_qs}
-
-    predictions = []
-    for budget in budgets:
-        cat = budget.category
-        limit = float(budget.monthly_limit)
-        spent = actual_spend.get(cat, 0.0)
-
-        # Linear extrapolation: daily burn rate × remaining days
-        daily_rate = spent / days_elapsed if days_elapsed > 0 else 0
-        predicted_eom = round(spent + (daily_rate * days_remaining), 2)
-
-        # Try Prophet for more accurate prediction (only if enough history)
-        try:
-            from insights.utils import get_user_transactions_df
-            df = get_user_transactions_df(user)
-            if not df.empty and Prophet is not None:
-                cat_df = df[df['category'] == cat].copy()
-                if len(cat_df) >= 10:
-                    daily_cat = cat_df.groupby(cat_df['date'].dt.date)['amount'].sum().reset_index()
-                    daily_cat.columns = ['ds', 'y']
-                    daily_cat['ds'] = pd.to_datetime(daily_cat['ds'])
-                    m = Prophet(daily_seasonality=False, weekly_seasonality=True, yearly_seasonality=False)
-                    m.fit(daily_cat)
-                    future = m.make_future_dataframe(periods=days_remaining + 1)
-                    forecast = m.predict(future)
-                    remaining_forecast = forecast.tail(days_remaining)['yhat'].clip(lower=0).sum()
-                    predicted_eom = round(spent + float(remaining_forecast), 2)
-        except Exception:
-            pass  # Stick with linear extrapolation
-
-        will_exceed = predicted_eom > limit
-        overspend_amt = round(predicted_eom - limit, 2) if will_exceed else 0.0
-        pct_predicted = round((predicted_eom / limit) * 100, 1) if limit > 0 else 0
-
-        # Risk levels: safe / warning / danger / exceeded
-        if spent >= limit:
-            risk_level = 'exceeded'
-        elif pct_predicted >= 100:
-            risk_level = 'danger'
-        elif pct_predicted >= 80:
-            risk_level = 'warning'
-        else:
-            risk_level = 'safe'
-
-        predictions.append({
-            'category': cat,
-            'limit': limit,
-            'actual_spent': spent,
-            'predicted_eom': predicted_eom,
-            'pct_predicted': pct_predicted,
-            'will_exceed': will_exceed,
-            'overspend_amount': overspend_amt,
-            'risk_level': risk_level,
-            'days_remaining': days_remaining,
-        })
-
-    # Sort: most at-risk first
-    risk_order = {'exceeded': 0, 'danger': 1, 'warning': 2, 'safe': 3}
-    predictions.sort(key=lambda x: risk_order.get(x['risk_level'], 4))
-
+    try:
+        engine = _requested_engine(request)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    predictions = get_or_compute_insight(request.user, 'overspend_predictions', engine=engine)
     return Response(predictions, status=status.HTTP_200_OK)
 
 
@@ -926,33 +710,29 @@ def category_insight_detail(request):
     On-demand LLM insight for a SINGLE category (called when user clicks 'View Details').
     Only fires one Gemini API call, preventing free-tier quota exhaustion.
     """
-    from insights.utils import get_user_transactions_df, generate_category_llm_insight, detect_anomalies, forecast_spending, suggest_smart_budgets
-    import pandas as pd
+    from insights.utils import generate_category_llm_insight, detect_anomalies, forecast_spending, suggest_smart_budgets
     
     category = request.GET.get('category', '').strip()
     if not category:
         return Response({'error': 'Category name is required.'}, status=400)
 
     user = request.user
-    df = get_user_transactions_df(user)
-    if df.empty:
+    # Month totals from SQL; the frame is only loaded for the models below
+    ledger = monthly_ledger(user)
+    if ledger.empty:
         return Response({'llm_details': 'No transaction data found for analysis.'})
 
-    # Filter to just this category's expenses
-    cat_df = df[(df['category'] == category) & (df['type'] == 'Expense')]
-    if cat_df.empty:
+    if not ledger.has_expenses(category):
         return Response({'llm_details': f'No expense data found for category: {category}'})
 
-    current_month_str = df['date'].dt.to_period('M').max()
-    prev_month_str = current_month_str - 1
-
-    curr_total = cat_df[cat_df['date'].dt.to_period('M') == current_month_str]['amount'].sum()
-    prev_total = cat_df[cat_df['date'].dt.to_period('M') == prev_month_str]['amount'].sum()
+    curr_total = ledger.month_expense(ledger.current_month, category)
+    prev_total = ledger.month_expense(ledger.previous_month, category)
     pct_change = ((curr_total - prev_total) / prev_total * 100) if prev_total > 0 else (100 if curr_total > 0 else 0)
 
-    anomalies = detect_anomalies(user)
-    forecasts = forecast_spending(user)
-    budgets = suggest_smart_budgets(user)
+    ctx = AnalyticsContext(user)
+    anomalies = detect_anomalies(user, ctx)
+    forecasts = forecast_spending(user, ctx)
+    budgets = suggest_smart_budgets(user, ctx)
 
     anomaly_map = {a['category']: a for a in anomalies}
     forecast_map = {f['category']: f for f in forecasts}
@@ -1089,7 +869,10 @@ def get_savings_projections(request):
     current_budget_total = float(budget_agg['total'] or 0)
     
     # Estimate average monthly spend to find average savings
-    spend_agg = Transaction.objects.filter(user=user, date__year=current_year).aggregate(avg=Avg('amount'))
+    year_start, year_end = year_bounds(current_year)
+    spend_agg = Transaction.objects.filter(
+        user=user, date__gte=year_start, date__lt=year_end,
+    ).aggregate(avg=Avg('amount'))
     avg_spent = float(spend_agg['avg'] or 0)
     
     projected_monthly_savings = current_budget_total - avg_spent
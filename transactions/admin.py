@@ -32,3 +32,29 @@ class DeletedTransactionAdmin(admin.ModelAdmin):
     list_display = ('user', 'amount', 'category_name', 'deleted_at')
     search_fields = ('user__username', 'category_name')
     list_filter = ('category_type', 'deleted_at')
+
+from .models import CategoryRule
+
+
+# Registering the CategoryRule model
+@admin.register(CategoryRule)
+class CategoryRuleAdmin(admin.ModelAdmin):
+    list_display = ('user', 'pattern', 'category', 'updated_at')
+    search_fields = ('user__username', 'pattern', 'category')
+
+from .models import MonthlyCategorySpend, BudgetAlertState
+
+
+# Registering the MonthlyCategorySpend rollup (read-mostly; rebuilt by a management command)
+@admin.register(MonthlyCategorySpend)
+class MonthlyCategorySpendAdmin(admin.ModelAdmin):
+    list_display = ('user', 'year', 'month', 'category', 'category_type', 'total', 'count')
+    search_fields = ('user__username',)
+    list_filter = ('category_type', 'year')
+
+
+# Registering the per-month budget alert dedup state
+@admin.register(BudgetAlertState)
+class BudgetAlertStateAdmin(admin.ModelAdmin):
+    list_display = ('budget', 'year', 'month', 'threshold', 'updated_at')
+    search_fields = ('budget__user__username', 'budget__category')
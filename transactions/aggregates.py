@@ -0,0 +1,155 @@
+"""
+TRANSACTIONS MODULE - LEDGER AGGREGATES (transactions/aggregates.py)
+--------------------------------------------------------------------
+Shared SQL aggregations behind the dashboard and analysis endpoints.
+
+`ledger_totals` answers every income/expense bucket an endpoint needs (all
+time plus any number of calendar months) in ONE conditional-aggregation
+query, `SUM(amount) FILTER (WHERE ...)` per bucket, instead of one
+aggregate query per bucket.
+
+`monthly_rollup` serves the 6-month trend charts: one query grouped by
+TruncMonth (and optionally a second field), with empty months filled in
+Python rather than queried one by one.
+
+`category_spend` reads "spend per category for month X" from the
+MonthlyCategorySpend rollup (transactions/rollups.py).
+"""
+
+from datetime import date
+
+from django.db.models import Count, Q, Sum
+
+from .models import Transaction
+
+CATEGORY_TYPES = ('income', 'expense')
+
+
+def month_bounds(year, month):
+    """[first day, first day of the next month) as dates, for sargable range filters."""
+    first = date(year, month, 1)
+    return first, date(year + month // 12, month % 12 + 1, 1)
+
+
+def year_bounds(year):
+    """[1 January, 1 January of the next year) as dates."""
+    return date(year, 1, 1), date(year + 1, 1, 1)
+
+
+def previous_month(year, month):
+    return (year - 1, 12) if month == 1 else (year, month - 1)
+
+
+def ledger_totals(user, months=()):
+    """
+    Income/expense totals of a user's ledger in a single query.
+
+    `months` is an iterable of (year, month) pairs. Returns::
+
+        {
+            'count': <all-time number of transactions>,
+            'income': <all-time income>, 'expense': <all-time expense>,
+            'months': {(year, month): {'income': ..., 'expense': ...}, ...},
+        }
+
+    All amounts are floats (0.0 for empty buckets).
+    """
+    months = list(dict.fromkeys(months))
+    aggregates = {'count': Count('id')}
+    for type_ in CATEGORY_TYPES:
+        aggregates[type_] = Sum('amount', filter=Q(category_type=type_))
+        for i, (year, month) in enumerate(months):
+            start, end = month_bounds(year, month)
+            aggregates[f'm{i}_{type_}'] = Sum(
+                'amount', filter=Q(category_type=type_, date__gte=start, date__lt=end),
+            )
+
+    row = Transaction.objects.filter(user=user).aggregate(**aggregates)
+    return {
+        'count': row['count'],
+        **{type_: float(row[type_] or 0) for type_ in CATEGORY_TYPES},
+        'months': {
+            key: {type_: float(row[f'm{i}_{type_}'] or 0) for type_ in CATEGORY_TYPES}
+            for i, key in enumerate(months)
+        },
+    }
+
+
+def last_n_months(n, today=None):
+    """The last `n` calendar months as (year, month) pairs, oldest first, ending with today's month."""
+    today = today or date.today()
+    return [
+        (today.year + (today.month - 1 - i) // 12, (today.month - 1 - i) % 12 + 1)
+        for i in range(n - 1, -1, -1)
+    ]
+
+
+def monthly_rollup(queryset, months, group_by=None):
+    """
+    Sums `amount` per calendar month (and per `group_by` field, if given) in
+    ONE query grouped on TruncMonth('date'), restricted to the span of
+    `months`. Months without rows are filled in here rather than queried.
+
+    Returns {(year, month): total} or, with `group_by`,
+    {(year, month): {group value: total}}, in the order of `months`.
+    """
+    from django.db.models.functions import TruncMonth
+
+    months = list(months)
+    start = month_bounds(*min(months))[0]
+    end = month_bounds(*max(months))[1]
+    fields = ['month'] + ([group_by] if group_by else [])
+    rows = (
+        queryset.filter(date__gte=start, date__lt=end)
+        .annotate(month=TruncMonth('date'))
+        .values(*fields)
+        .annotate(total=Sum('amount'))
+        .order_by()
+    )
+
+    rollup = {key: ({} if group_by else 0.0) for key in months}
+    for row in rows:
+        key = (row['month'].year, row['month'].month)
+        if key not in rollup:
+            continue
+        if group_by:
+            rollup[key][row[group_by]] = rollup[key].get(row[group_by], 0.0) + float(row['total'] or 0)
+        else:
+            rollup[key] += float(row['total'] or 0)
+    return rollup
+
+
+def monthly_budget_limits(user, months):
+    """
+    Total budget limit per month from BudgetHistory (one grouped query). Months
+    without history fall back to the user's current limits, fetched once.
+    """
+    from .models import Budget, BudgetHistory
+
+    months = list(months)
+    years = {year for year, _ in months}
+    history = {
+        (row['year'], row['month']): float(row['total'] or 0)
+        for row in BudgetHistory.objects.filter(user=user, year__in=years)
+        .values('year', 'month').annotate(total=Sum('previous_limit')).order_by()
+    }
+    limits = {key: history.get(key, 0.0) for key in months}
+    if any(value == 0 for value in limits.values()):
+        current = float(Budget.objects.filter(user=user).aggregate(total=Sum('monthly_limit'))['total'] or 0)
+        limits = {key: value or current for key, value in limits.items()}
+    return limits
+
+
+def category_spend(user, year, month, category_type='expense'):
+    """
+    {category name: total} for one calendar month, read from the
+    MonthlyCategorySpend rollup instead of the raw ledger. Uncategorized
+    spend is keyed by None.
+    """
+    from .models import MonthlyCategorySpend
+
+    rows = (
+        MonthlyCategorySpend.objects.filter(user=user, year=year, month=month, category_type=category_type)
+        .values('category__name').annotate(amount=Sum('total')).order_by()
+    )
+    return {row['category__name']: float(row['amount']) for row in rows}
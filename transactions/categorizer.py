@@ -1,9 +1,12 @@
-import joblib
 import logging
 import os
-import google.generativeai as genai
+import threading
+import time
+from collections import OrderedDict
 from django.conf import settings
 
+from .merchants import normalize_description, match_known
+
 logger = logging.getLogger(__name__)
 
 # ── Expanded category list (22 categories) ─────────────────────────────────
@@ -18,30 +21,161 @@ AVAILABLE_CATEGORIES = [
     "Rental Income", "Bonus", "Other Income",
 ]
 
-# ── Load Naive Bayes fallback model ────────────────────────────────────────
-try:
-    classifier = joblib.load(os.path.join(settings.BASE_DIR, "transaction_classifier.pkl"))
-    vectorizer = joblib.load(os.path.join(settings.BASE_DIR, "transaction_vectorizer.pkl"))
-    logger.info("Naive Bayes categorizer loaded successfully.")
-except Exception as e:
-    classifier = None
-    vectorizer = None
-    logger.warning(f"Failed to load Naive Bayes model: {e}")
+# ── Naive Bayes model registry ─────────────────────────────────────────────
+# joblib / scikit-learn are only imported when the first prediction needs the
+# model, so Django startup (every manage.py command, every worker) stays light.
+class CategorizerRegistry:
+    """
+    Single process-wide holder of the Naive Bayes classifier and TF-IDF
+    vectorizer. Loads lazily on first use, and reloads when the pickles on
+    disk change (checked at most every `CATEGORIZER_RELOAD_CHECK` seconds),
+    so a retrain picked up by `categorizer_train.py` needs no restart.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.classifier = None
+        self.vectorizer = None
+        self.loaded = False
+        self.load_time = None    # seconds spent unpickling, last load
+        self.loaded_at = None    # epoch seconds of the last load
+        self.reloads = 0
+        self._mtimes = None
+        self._checked_at = 0.0
+
+    @staticmethod
+    def paths():
+        base = settings.BASE_DIR
+        return (
+            getattr(settings, "CATEGORIZER_MODEL_PATH", os.path.join(base, "transaction_classifier.pkl")),
+            getattr(settings, "CATEGORIZER_VECTORIZER_PATH", os.path.join(base, "transaction_vectorizer.pkl")),
+        )
+
+    def _disk_mtimes(self):
+        try:
+            return tuple(os.path.getmtime(p) for p in self.paths())
+        except OSError:
+            return None
+
+    def _load(self):
+        import joblib
+
+        model_path, vectorizer_path = self.paths()
+        started = time.perf_counter()
+        try:
+            classifier = joblib.load(model_path)
+            vectorizer = joblib.load(vectorizer_path)
+        except Exception as e:
+            logger.warning(f"Failed to load Naive Bayes model: {e}")
+            classifier = vectorizer = None
+        if self.classifier is not None and not _compatible(classifier, vectorizer):
+            # Caught between the two renames of a retrain: keep serving the old
+            # pair and leave the recorded mtimes alone so the next check retries
+            logger.info("Naive Bayes model files are mid-swap; keeping the current model.")
+            return
+        self.classifier, self.vectorizer = classifier, vectorizer
+        self.load_time = time.perf_counter() - started
+        self.loaded_at = time.time()
+        self._mtimes = self._disk_mtimes()
+        self._checked_at = time.monotonic()
+        if self.loaded:
+            self.reloads += 1
+        self.loaded = True
+        if classifier is not None:
+            logger.info(f"Naive Bayes categorizer loaded in {self.load_time * 1000:.0f} ms.")
+
+    def get(self):
+        """Returns `(classifier, vectorizer)`, loading or hot-reloading them if needed."""
+        if self.loaded and time.monotonic() - self._checked_at < getattr(settings, "CATEGORIZER_RELOAD_CHECK", 30):
+            return self.classifier, self.vectorizer
+        with self._lock:
+            if not self.loaded:
+                self._load()
+            elif time.monotonic() - self._checked_at >= getattr(settings, "CATEGORIZER_RELOAD_CHECK", 30):
+                self._checked_at = time.monotonic()
+                if self._disk_mtimes() != self._mtimes:
+                    logger.info("Naive Bayes model changed on disk; reloading.")
+                    self._load()
+                    prediction_cache.clear()
+            return self.classifier, self.vectorizer
+
+    def swap(self, classifier, vectorizer):
+        """Atomically replaces the served pair with one trained in this process."""
+        with self._lock:
+            self.classifier, self.vectorizer = classifier, vectorizer
+            self.loaded_at = time.time()
+            self._mtimes = self._disk_mtimes()
+            self._checked_at = time.monotonic()
+            self.loaded = True
+            self.reloads += 1
+        prediction_cache.clear()
+
+    def reload(self):
+        """Forces a reload from disk (e.g. right after retraining) and drops cached predictions."""
+        with self._lock:
+            self._load()
+        prediction_cache.clear()
+        return self.classifier is not None
+
+    def stats(self):
+        return {
+            "loaded": self.loaded and self.classifier is not None,
+            "load_time_ms": round(self.load_time * 1000, 1) if self.load_time is not None else None,
+            "loaded_at": self.loaded_at,
+            "reloads": self.reloads,
+        }
+
+
+def _compatible(classifier, vectorizer):
+    """True when the vectorizer produces the feature width the classifier was fit on."""
+    if classifier is None or vectorizer is None:
+        return False
+    width = getattr(vectorizer, "n_features", None) or len(getattr(vectorizer, "vocabulary_", ()))
+    return getattr(classifier, "n_features_in_", width) == width
+
+
+registry = CategorizerRegistry()
+
+
+# ── Gemini client (created once, reused) ───────────────────────────────────
+_gemini_model = None
+_gemini_lock = threading.Lock()
+
+
+def _get_gemini_model():
+    """
+    Configures the Gemini client on first use and returns the shared model,
+    or None when no API key is set. `GEMINI_API_ENDPOINT` points it at another
+    host (e.g. a local stub server) over the REST transport.
+    """
+    global _gemini_model
+    api_key = getattr(settings, "GEMINI_API_KEY", None)
+    if not api_key:
+        return None
+    with _gemini_lock:
+        if _gemini_model is None:
+            import google.generativeai as genai
+
+            endpoint = getattr(settings, "GEMINI_API_ENDPOINT", "")
+            if endpoint:
+                genai.configure(api_key=api_key, transport="rest", client_options={"api_endpoint": endpoint})
+            else:
+                genai.configure(api_key=api_key)
+            _gemini_model = genai.GenerativeModel("gemini-2.0-flash")
+        return _gemini_model
 
 
 def _gemini_categorize(description: str) -> str | None:
     """
     Calls Gemini API to classify a transaction description.
-    Returns a category string if successful, None otherwise.
+    Returns a category string if successful, None otherwise (including when
+    the call exceeds the `GEMINI_CATEGORIZE_TIMEOUT` latency budget).
     """
     try:
-        api_key = getattr(settings, "GEMINI_API_KEY", None)
-        if not api_key:
+        model = _get_gemini_model()
+        if model is None:
             return None
 
-        genai.configure(api_key=api_key)
-        model = genai.GenerativeModel("gemini-2.0-flash")
-
         categories_str = ", ".join(AVAILABLE_CATEGORIES)
         prompt = (
             f"You are a financial transaction categorizer.\n"
@@ -51,7 +185,9 @@ def _gemini_categorize(description: str) -> str | None:
             f"Reply with ONLY the category name, nothing else."
         )
 
-        response = model.generate_content(prompt)
+        response = model.generate_content(
+            prompt, request_options={"timeout": getattr(settings, "GEMINI_CATEGORIZE_TIMEOUT", 3.0)}
+        )
         predicted = response.text.strip().strip('"').strip("'")
 
         # Validate that Gemini returned a known category
@@ -72,34 +208,145 @@ def _gemini_categorize(description: str) -> str | None:
         return None
 
 
-def _naive_bayes_categorize(description: str) -> str | None:
-    """Uses the trained Naive Bayes + TF-IDF model."""
-    if vectorizer and classifier:
+# ── Normalized-description LRU cache ────────────────────────────────────────
+# Merchants repeat endlessly ("SWIGGY*ORDER 8812", "Swiggy order 8813"), so Naive
+# Bayes predictions are cached on the normalized text the model actually sees.
+class _PredictionCache:
+    """Thread-safe bounded LRU of normalized description → category."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            return None
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        self.hits = self.misses = 0
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            "entries": len(self._entries),
+        }
+
+
+prediction_cache = _PredictionCache(getattr(settings, "CATEGORIZER_CACHE_SIZE", 10000))
+
+
+def categorize_many(descriptions, user=None) -> list[str]:
+    """
+    Batch categorization. Each description first goes through the merchant
+    fast path (the user's override rules, then the global merchant index; see
+    transactions/merchants.py). Of the rest, cached descriptions are answered
+    from the LRU and the remaining unique ones go through ONE sparse
+    `vectorizer.transform` and ONE Naive Bayes `predict`. Returns one category
+    per input ('Other' for blanks or when the model is unavailable), in order.
+    """
+    user_id = getattr(user, "pk", None)
+    normalized = [normalize_description(d) for d in descriptions]
+    results = [None] * len(normalized)
+    pending = {}
+    for i, text in enumerate(normalized):
+        if not text:
+            results[i] = "Other"
+            continue
+        known, _ = match_known(text, user_id)
+        if known:
+            results[i] = known
+            continue
+        cached = prediction_cache.get(text)
+        if cached is not None:
+            results[i] = cached
+        else:
+            pending.setdefault(text, []).append(i)
+
+    classifier, vectorizer = registry.get() if pending else (None, None)
+    if pending and vectorizer is not None and classifier is not None:
+        texts = list(pending)
         try:
-            X_new = vectorizer.transform([description])
-            return classifier.predict(X_new)[0]
+            predictions = classifier.predict(vectorizer.transform(texts))
+            for text, category in zip(texts, predictions):
+                category = str(category)
+                prediction_cache.set(text, category)
+                for i in pending[text]:
+                    results[i] = category
         except Exception as e:
-            logger.error(f"[NAIVE BAYES] Prediction failed: {e}")
-    return None
+            logger.error(f"[NAIVE BAYES] Batch prediction failed: {e}")
+
+    return [r or "Other" for r in results]
+
+
+def _naive_bayes_categorize(description: str) -> str | None:
+    """One description through categorize_many (merchant index, prediction cache, model); None if blank."""
+    if not normalize_description(description):
+        return None
+    return categorize_many([description])[0]
 
 
-def categorize_transaction(description: str) -> str:
+def categorize_transaction(description: str, user=None) -> str:
     """
-    Main entry point.
-    Priority: Gemini API → Naive Bayes → 'Other'
+    Main entry point. Answers immediately:
+    user override rule → merchant index → Naive Bayes → 'Other'.
+    Gemini only refines saved transactions in the background
+    (see queue_category_refinement).
     """
-    if not description or not description.strip():
-        return "Other"
+    # The batch path with a batch of one, so both share the rules, the LRU and the model call
+    return categorize_many([description], user=user)[0]
 
-    # 1. Try Gemini (fast, no retry — immediate fallback on any error)
-    result = _gemini_categorize(description)
-    if result:
-        return result
 
-    # 2. Fall back to Naive Bayes
-    result = _naive_bayes_categorize(description)
-    if result:
-        return result
+# ── Async Gemini refinement ────────────────────────────────────────────────
+
+def _publish_refinement(pairs):
+    from .tasks import refine_transaction_categories
+    try:
+        refine_transaction_categories.apply_async(args=[pairs], retry=False)
+    except Exception as e:
+        logger.warning(f"[GEMINI CATEGORIZER] Could not queue refinement: {e}")
+
+
+def queue_category_refinement(transactions) -> bool:
+    """
+    Queues one background Gemini pass over freshly auto-categorized
+    transactions, after the surrounding DB transaction commits. The task
+    patches each category when Gemini disagrees with Naive Bayes, unless the
+    user has changed it in the meantime. Descriptions answered by a user rule
+    or the merchant index are authoritative and never sent to Gemini.
+    No-op without a Gemini API key.
+    """
+    if not getattr(settings, "GEMINI_API_KEY", None):
+        return False
+    pairs = [
+        [t.pk, t.category_id] for t in transactions
+        if t.pk and t.description and match_known(normalize_description(t.description), t.user_id, record_stats=False)[0] is None
+    ]
+    if not pairs:
+        return False
 
-    # 3. Default
-    return "Other"
+    from django.db import transaction as db_transaction
+    from backend import jobs
+    db_transaction.on_commit(lambda: jobs.schedule(
+        f"gemini-refinement:{pairs[0][0]}", _publish_refinement, pairs, delay=0,
+    ))
+    return True
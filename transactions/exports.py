@@ -0,0 +1,25 @@
+"""
+TRANSACTIONS MODULE - EXPORT BUILDERS (transactions/exports.py)
+---------------------------------------------------------------
+Row source for the per-user transaction CSV export, consumed by
+backend/exports.py as a streamed response or a background file.
+"""
+
+from backend.exports import EXPORT_CHUNK_SIZE
+from .models import Transaction
+
+
+def transactions(params):
+    """One user's ledger, oldest first, optionally limited to [start_date, end_date]."""
+    qs = Transaction.objects.filter(user_id=params["user_id"])
+    if params.get("start_date"):
+        qs = qs.filter(date__gte=params["start_date"])
+    if params.get("end_date"):
+        qs = qs.filter(date__lte=params["end_date"])
+
+    rows = (
+        qs.order_by("date", "id")
+        .values_list("date", "description", "category__name", "category_type", "amount")
+        .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    )
+    return ["Date", "Description", "Category", "Type", "Amount"], rows
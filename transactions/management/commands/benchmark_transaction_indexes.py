@@ -0,0 +1,147 @@
+"""
+Management Command: benchmark_transaction_indexes
+=================================================
+Usage:
+    python manage.py benchmark_transaction_indexes
+    python manage.py benchmark_transaction_indexes --users 50 --rows-per-user 2000 --seed 7
+    python manage.py benchmark_transaction_indexes --plans
+
+What it does:
+    Seeds a synthetic ledger inside a transaction that is rolled back at the
+    end, then times the dominant Transaction queries twice: once with the
+    composite indexes dropped (same transaction, so they come back on
+    rollback) and once with them in place. The month filter is run both as
+    `date__year` + `date__month` and as the [first day, next first day) range
+    the views use: Django turns `__year` into a range, but `__month` stays a
+    per-row EXTRACT that the index cannot answer.
+
+    `--plans` also prints the database's EXPLAIN output for every case. Works
+    on SQLite and PostgreSQL (EXPLAIN ANALYZE there).
+"""
+
+import random
+import time
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction as db_transaction
+
+from transactions.aggregates import month_bounds
+from transactions.models import Category, Transaction
+
+CATEGORIES = ['Food & Dining', 'Transport', 'Shopping', 'Entertainment', 'Bills & Utilities']
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Compare query plans and timings of the hot Transaction queries with and without composite indexes."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=20)
+        parser.add_argument('--rows-per-user', type=int, default=1000)
+        parser.add_argument('--days', type=int, default=730, help="Days of history per user.")
+        parser.add_argument('--repeat', type=int, default=20, help="Runs per query (best time is reported).")
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--plans', action='store_true', help="Print the EXPLAIN output of every query.")
+
+    def handle(self, *args, **options):
+        try:
+            with db_transaction.atomic():
+                user, category, year, month = self._seed(options)
+                cases = self._cases(user, category, year, month)
+                self.stdout.write(self.style.HTTP_INFO(
+                    f"🗂️  {connection.vendor}: {options['users']} users x {options['rows_per_user']} rows, "
+                    f"best of {options['repeat']}"
+                ))
+                self.stdout.write(f"{'query':<34}{'no index':>12}{'indexed':>12}")
+
+                results = {}
+                for label in ('no index', 'indexed'):
+                    if label == 'no index':
+                        self._drop_indexes()
+                    else:
+                        self._create_indexes()
+                    for name, queryset in cases.items():
+                        results.setdefault(name, {})[label] = self._time(queryset, options['repeat'])
+                        if options['plans']:
+                            self.stdout.write(f"\n-- {name} ({label})\n{self._explain(queryset)}\n")
+
+                for name, timings in results.items():
+                    self.stdout.write(
+                        f"{name:<34}{timings['no index'] * 1000:>10.2f}ms{timings['indexed'] * 1000:>10.2f}ms"
+                    )
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _seed(self, options):
+        rng = random.Random(options['seed'])
+        today = date.today()
+        users = [
+            get_user_model().objects.create_user(
+                username=f'bench-index-{i}', email=f'bench-index-{i}@example.invalid', password=None,
+            )
+            for i in range(options['users'])
+        ]
+        rows = []
+        for user in users:
+            categories = [Category.objects.create(user=user, name=name) for name in CATEGORIES]
+            for _ in range(options['rows_per_user']):
+                rows.append(Transaction(
+                    user=user, amount=round(rng.uniform(10, 5000), 2), category=rng.choice(categories),
+                    category_type='income' if rng.random() < 0.1 else 'expense',
+                    date=today - timedelta(days=rng.randrange(options['days'])),
+                ))
+        # bulk_create skips save(), so the monthly rollup is not touched (it is rolled back anyway)
+        Transaction.objects.bulk_create(rows, batch_size=5000)
+        self._analyze()
+        return users[0], categories[0], today.year, today.month
+
+    @staticmethod
+    def _cases(user, category, year, month):
+        start, end = month_bounds(year, month)
+        rows = Transaction.objects.filter(user=user)
+        return {
+            'month expenses (year/month)': rows.filter(category_type='expense', date__year=year, date__month=month),
+            'month expenses (date range)': rows.filter(category_type='expense', date__gte=start, date__lt=end),
+            'category in month (date range)': rows.filter(category=category, date__gte=start, date__lt=end),
+            'latest 10': rows.order_by('-date', '-created_at')[:10],
+        }
+
+    @staticmethod
+    def _time(queryset, repeat):
+        best = float('inf')
+        for _ in range(repeat):
+            started = time.perf_counter()
+            list(queryset.values_list('id', 'amount'))
+            best = min(best, time.perf_counter() - started)
+        return best
+
+    @staticmethod
+    def _explain(queryset):
+        if connection.vendor == 'postgresql':
+            return queryset.explain(analyze=True)
+        return queryset.explain()
+
+    @staticmethod
+    def _analyze():
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    @staticmethod
+    def _drop_indexes():
+        with connection.cursor() as cursor:
+            for index in Transaction._meta.indexes:
+                cursor.execute(f'DROP INDEX IF EXISTS {connection.ops.quote_name(index.name)}')
+
+    def _create_indexes(self):
+        quote = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            for index in Transaction._meta.indexes:
+                columns = ', '.join(quote(Transaction._meta.get_field(field).column) for field in index.fields)
+                cursor.execute(f'CREATE INDEX {quote(index.name)} ON {quote(Transaction._meta.db_table)} ({columns})')
+        self._analyze()
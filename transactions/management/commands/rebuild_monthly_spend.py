@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from django.contrib.auth import get_user_model
+from transactions.rollups import rebuild_user_rollup
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the MonthlyCategorySpend rollup from the transaction ledger."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user",
+            help="Only rebuild the rollup of the user with this UUID.",
+        )
+
+    def handle(self, *args, **options):
+        users = User.objects.all()
+        if options.get("user"):
+            users = users.filter(id=options["user"])
+
+        rebuilt = buckets = 0
+        for user_id in users.values_list('id', flat=True).iterator():
+            buckets += rebuild_user_rollup(user_id)
+            rebuilt += 1
+
+        self.stdout.write(
+            self.style.SUCCESS(f"✅ Rebuilt the monthly spend rollup of {rebuilt} users ({buckets} buckets)")
+        )
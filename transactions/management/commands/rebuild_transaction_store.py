@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from django.contrib.auth import get_user_model
+from transactions.store import write_user_partition, get_store_dir
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the per-user columnar transaction partitions read by the insights models."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user",
+            help="Only rebuild the partition of the user with this UUID.",
+        )
+
+    def handle(self, *args, **options):
+        users = User.objects.all()
+        if options.get("user"):
+            users = users.filter(id=options["user"])
+
+        rebuilt = 0
+        for user_id in users.values_list('id', flat=True).iterator():
+            write_user_partition(user_id)
+            rebuilt += 1
+
+        self.stdout.write(
+            self.style.SUCCESS(f"✅ Rebuilt {rebuilt} partitions in {get_store_dir()}")
+        )
@@ -0,0 +1,41 @@
+"""
+Management Command: train_categorizer
+=====================================
+Usage:
+    python manage.py train_categorizer
+    python manage.py train_categorizer --full
+    python manage.py train_categorizer --chunk-size 20000
+
+What it does:
+    Incrementally trains the online transaction categorizer
+    (transactions/training.py): labels created or corrected since the last
+    checkpoint are streamed from the database in chunks and folded into the
+    model with `partial_fit`, then the model is swapped in atomically.
+    `--full` retrains from `categories_dataset.csv` plus the whole ledger.
+
+    `categorizer_train.py` remains the from-scratch TF-IDF trainer; running it
+    replaces the online model, and the next run of this command starts over
+    with a full run.
+"""
+
+from django.core.management.base import BaseCommand
+
+from transactions.training import DEFAULT_CHUNK_SIZE, train_incremental
+
+
+class Command(BaseCommand):
+    help = "Incrementally trains the transaction categorizer on labels added since the last checkpoint."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--full", action="store_true", help="Retrain from the seed dataset and the whole ledger.")
+        parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        result = train_incremental(full=options["full"], chunk_size=options["chunk_size"])
+        if result["swapped"]:
+            self.stdout.write(self.style.SUCCESS(
+                f"✅ {result['mode'].capitalize()} run trained on {result['samples']} samples "
+                f"({result['total_samples']} total); model swapped in."
+            ))
+        else:
+            self.stdout.write("No new labels since the last checkpoint; model unchanged.")
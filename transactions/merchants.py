@@ -0,0 +1,251 @@
+"""
+TRANSACTIONS MODULE - MERCHANT INDEX (transactions/merchants.py)
+----------------------------------------------------------------
+Fast path of the categorizer: most descriptions name a known merchant
+("UBER *TRIP 8812", "Netflix.com"), so they are matched against a compiled
+Aho-Corasick automaton before TF-IDF / Naive Bayes or Gemini are touched.
+
+Two indexes, checked in this order:
+1. Per-user override rules (CategoryRule), learned from the user's own
+   category corrections. Always take precedence.
+2. The global merchant index, built once from `categories_dataset.csv`.
+
+Patterns match whole words of the normalized description; when several
+match, the longest (most specific) one wins, e.g. "amazon prime" over "amazon".
+"""
+
+import csv
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+
+from django.conf import settings
+from django.db.models import Count, Max
+
+logger = logging.getLogger(__name__)
+
+_NON_WORD = re.compile(r"[^a-z&]+")
+
+
+def normalize_description(description: str) -> str:
+    """Lowercases, drops digits/punctuation (order ids, UPI refs) and collapses whitespace."""
+    return " ".join(_NON_WORD.sub(" ", (description or "").lower()).split())
+
+
+# ==========================================
+# 1. AHO-CORASICK AUTOMATON
+# ==========================================
+
+class MerchantIndex:
+    """
+    Aho-Corasick automaton over normalized patterns. A single left-to-right
+    pass over the description finds every pattern it contains, independent of
+    how many patterns are indexed.
+    """
+
+    def __init__(self, patterns):
+        # Patterns are padded with spaces so they only match whole words
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [None]  # (pattern length, category) of the longest pattern ending here
+        self.size = 0
+        for pattern, category in patterns.items():
+            pattern = normalize_description(pattern)
+            if pattern:
+                self._add(f" {pattern} ", category)
+        self._link()
+
+    def _add(self, word, category):
+        node = 0
+        for ch in word:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(None)
+            node = nxt
+        if self._out[node] is None:
+            self.size += 1
+        self._out[node] = (len(word), category)
+
+    def _link(self):
+        """Breadth-first fail links; each node inherits the longest output reachable through them."""
+        queue = deque(self._goto[0].values())  # depth-1 nodes fail to the root
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(ch, 0)
+                inherited = self._out[self._fail[child]]
+                if inherited and (self._out[child] is None or inherited[0] > self._out[child][0]):
+                    self._out[child] = inherited
+
+    def match(self, normalized):
+        """Category of the longest pattern found in an already-normalized description, or None."""
+        if not normalized or self.size == 0:
+            return None
+        best = None
+        node = 0
+        for ch in f" {normalized} ":
+            while node and ch not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(ch, 0)
+            out = self._out[node]
+            if out and (best is None or out[0] > best[0]):
+                best = out
+        return best[1] if best else None
+
+
+# ==========================================
+# 2. GLOBAL MERCHANT INDEX & PER-USER RULES
+# ==========================================
+
+_merchant_index = None
+_user_indexes = OrderedDict()  # user_id -> (rules version, checked at, MerchantIndex), least recent first
+_lock = threading.Lock()
+
+
+def _dataset_path():
+    return getattr(settings, "MERCHANT_DATASET_PATH", os.path.join(settings.BASE_DIR, "categories_dataset.csv"))
+
+
+def get_merchant_index():
+    """Builds the global index from `categories_dataset.csv` on first use."""
+    global _merchant_index
+    with _lock:
+        if _merchant_index is None:
+            patterns = {}
+            try:
+                with open(_dataset_path(), newline="", encoding="utf-8") as f:
+                    for row in csv.DictReader(f):
+                        if row.get("Transaction") and row.get("Category"):
+                            patterns[row["Transaction"]] = row["Category"].strip()
+            except OSError as e:
+                logger.warning(f"[MERCHANT INDEX] Could not read merchant dataset: {e}")
+            _merchant_index = MerchantIndex(patterns)
+            logger.info(f"[MERCHANT INDEX] Compiled {_merchant_index.size} merchant patterns.")
+        return _merchant_index
+
+
+def _rules_version(user_id):
+    """(count, latest updated_at) of the user's rules: moves on every add, edit and delete."""
+    from .models import CategoryRule
+
+    stats = CategoryRule.objects.filter(user_id=user_id).aggregate(count=Count("id"), latest=Max("updated_at"))
+    return stats["count"], stats["latest"]
+
+
+def bump_user_rules(user_id):
+    """
+    Drops this process's compiled rule index of one user (called when their
+    rules change). Other processes pick the change up from the database within
+    CATEGORY_RULES_RECHECK seconds (see get_user_index).
+    """
+    with _lock:
+        _user_indexes.pop(user_id, None)
+
+
+def get_user_index(user_id):
+    """
+    The user's compiled override rules. The rules version comes from the
+    database, so a rule saved by any worker reaches every other one; it is
+    re-read at most every CATEGORY_RULES_RECHECK seconds per user, and the
+    index is recompiled only when it moved. At most CATEGORY_RULES_INDEX_SIZE
+    users' indexes are kept, least recently used evicted first.
+    """
+    now = time.monotonic()
+    with _lock:
+        cached = _user_indexes.get(user_id)
+    if cached and now - cached[1] < getattr(settings, "CATEGORY_RULES_RECHECK", 5):
+        index = cached[2]
+        version, checked_at = cached[0], cached[1]
+    else:
+        from .models import CategoryRule
+
+        version, checked_at = _rules_version(user_id), now
+        if cached and cached[0] == version:
+            index = cached[2]
+        else:
+            index = MerchantIndex(dict(CategoryRule.objects.filter(user_id=user_id).values_list("pattern", "category")))
+
+    with _lock:
+        _user_indexes[user_id] = (version, checked_at, index)
+        _user_indexes.move_to_end(user_id)
+        while len(_user_indexes) > getattr(settings, "CATEGORY_RULES_INDEX_SIZE", 1000):
+            _user_indexes.popitem(last=False)
+    return index
+
+
+def record_correction(user_id, description, category_name):
+    """
+    Stores a confirmed correction as a per-user override rule for the whole
+    normalized description. Returns the rule, or None if nothing matchable remains.
+    """
+    from .models import CategoryRule
+
+    pattern = normalize_description(description)
+    if len(pattern) < 3 or not category_name:
+        return None
+    rule, _ = CategoryRule.objects.update_or_create(
+        user_id=user_id, pattern=pattern[:255], defaults={"category": category_name},
+    )
+    return rule
+
+
+# ==========================================
+# 3. FAST-PATH LOOKUP & HIT-RATE METRICS
+# ==========================================
+
+class _FastPathStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.lookups = self.rule_hits = self.merchant_hits = 0
+
+    def record(self, source):
+        with self._lock:
+            self.lookups += 1
+            if source == "rule":
+                self.rule_hits += 1
+            elif source == "merchant":
+                self.merchant_hits += 1
+
+    def snapshot(self):
+        hits = self.rule_hits + self.merchant_hits
+        return {
+            "lookups": self.lookups,
+            "rule_hits": self.rule_hits,
+            "merchant_hits": self.merchant_hits,
+            "hit_rate": round(hits / self.lookups, 3) if self.lookups else 0.0,
+        }
+
+
+fast_path_stats = _FastPathStats()
+
+
+def match_known(normalized, user_id=None, record_stats=True):
+    """
+    Returns `(category, source)` for an already-normalized description, with
+    source 'rule' (user override) or 'merchant' (global index), or (None, None).
+    """
+    category, source = None, None
+    if normalized:
+        if user_id is not None:
+            category = get_user_index(user_id).match(normalized)
+            source = "rule" if category else None
+        if category is None:
+            category = get_merchant_index().match(normalized)
+            source = "merchant" if category else None
+    if record_stats:
+        fast_path_stats.record(source)
+    return category, source
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.6 on 2026-10-18 06:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0007_transaction_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BudgetAlertState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveSmallIntegerField()),
+                ('month', models.PositiveSmallIntegerField()),
+                ('threshold', models.PositiveSmallIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('budget', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='alert_states', to='transactions.budget')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('budget', 'year', 'month'), name='unique_budget_alert_state')],
+            },
+        ),
+    ]
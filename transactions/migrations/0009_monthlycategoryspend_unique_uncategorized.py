@@ -0,0 +1,39 @@
+# Generated by Django 5.1.6 on 2026-10-18 07:25
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def merge_uncategorized_buckets(apps, schema_editor):
+    """Folds duplicate uncategorized buckets (one per user, month and type) into one before the constraint."""
+    MonthlyCategorySpend = apps.get_model('transactions', 'MonthlyCategorySpend')
+    duplicated = (
+        MonthlyCategorySpend.objects.filter(category__isnull=True)
+        .values('user_id', 'year', 'month', 'category_type')
+        .annotate(n=Count('id')).filter(n__gt=1).order_by()
+    )
+    for group in duplicated:
+        group.pop('n')
+        keep, *extra = MonthlyCategorySpend.objects.filter(category__isnull=True, **group).order_by('id')
+        for bucket in extra:
+            keep.total += bucket.total
+            keep.count += bucket.count
+            bucket.delete()
+        keep.save(update_fields=['total', 'count'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0008_budgetalertstate'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_uncategorized_buckets, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='monthlycategoryspend',
+            constraint=models.UniqueConstraint(condition=models.Q(('category__isnull', True)), fields=('user', 'year', 'month', 'category_type'), name='unique_monthly_uncategorized_spend'),
+        ),
+    ]
@@ -44,9 +44,31 @@ class Transaction(models.Model):
     created_at = models.DateTimeField(default=datetime.now)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        # Every hot query is "this user's rows in a date range" (optionally of one
+        # type or category) or "this user's latest rows"; filter on date ranges
+        # (aggregates.month_bounds), not date__month, so these can be used.
+        indexes = [
+            models.Index(fields=['user', 'date', 'created_at'], name='txn_user_date_idx'),
+            models.Index(fields=['user', 'category_type', 'date'], name='txn_user_type_date_idx'),
+            models.Index(fields=['user', 'category', 'date'], name='txn_user_category_date_idx'),
+        ]
+
     def __str__(self):
         return f"{self.user.username} - {self.amount} ({self.category})"
 
+    def save(self, *args, **kwargs):
+        # The MonthlyCategorySpend rollup moves in the same DB transaction as the row
+        # (deletes are handled by a post_delete receiver, already inside the delete's transaction)
+        from django.db import transaction as db_transaction
+        from .rollups import apply_change, row_state, stored_state
+
+        with db_transaction.atomic():
+            before = None if self._state.adding else stored_state(self.pk)
+            self._stored_state = before  # for post_save receivers: the bucket the row left
+            super().save(*args, **kwargs)
+            apply_change(before, row_state(self))
+
 class DeletedTransaction(models.Model):
     """Log of deleted transactions for auditing or recovery purposes."""
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
@@ -60,6 +82,23 @@ class DeletedTransaction(models.Model):
     def __str__(self):
         return f"Deleted: {self.user.username} - {self.amount} ({self.category_name})"
 
+class CategoryRule(models.Model):
+    """
+    Per-user override learned from a confirmed correction: descriptions that
+    contain `pattern` (normalized, see transactions/merchants.py) are put in
+    `category` before the merchant index or any ML model is consulted.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='category_rules')
+    pattern = models.CharField(max_length=255)
+    category = models.CharField(max_length=100)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('user', 'pattern')
+
+    def __str__(self):
+        return f"{self.user.username}: '{self.pattern}' → {self.category}"
+
 
 # ==========================================
 # 2. BUDGETING MODULE
@@ -87,6 +126,37 @@ class BudgetHistory(models.Model):
         unique_together = ('user', 'category', 'month', 'year')  # Prevents duplicate records
 
 
+class MonthlyCategorySpend(models.Model):
+    """
+    Rollup of the ledger: total amount per (user, year, month, category, type).
+    Maintained incrementally on every Transaction write (transactions/rollups.py),
+    rebuilt with `manage.py rebuild_monthly_spend`.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='monthly_spend')
+    year = models.PositiveSmallIntegerField()
+    month = models.PositiveSmallIntegerField()
+    category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, blank=True)
+    category_type = models.CharField(max_length=50)
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'year', 'month', 'category', 'category_type'], name='unique_monthly_category_spend',
+            ),
+            # NULLs are distinct in the constraint above, so the uncategorized bucket needs its own
+            # (a partial index: nulls_distinct=False is PostgreSQL 15+ only, SQLite ignores it)
+            models.UniqueConstraint(
+                fields=['user', 'year', 'month', 'category_type'], condition=models.Q(category__isnull=True),
+                name='unique_monthly_uncategorized_spend',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} {self.year}-{self.month:02d} {self.category} ({self.category_type}): {self.total}"
+
+
 # ==========================================
 # 3. ALERTS & NOTIFICATIONS MODULE
 # Deprecated/isolated alerts specifically for transaction anomalies.
@@ -103,5 +173,26 @@ class alerts(models.Model):
     def __str__(self):
         return f"{self.user.username} - {self.message}"
 
+
+class BudgetAlertState(models.Model):
+    """
+    Highest usage threshold (percent) already alerted for a budget in a given
+    month, so repeated writes raise one alert per threshold crossing
+    (see check_budget_alert in transactions/utils.py).
+    """
+    budget = models.ForeignKey(Budget, on_delete=models.CASCADE, related_name='alert_states')
+    year = models.PositiveSmallIntegerField()
+    month = models.PositiveSmallIntegerField()
+    threshold = models.PositiveSmallIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['budget', 'year', 'month'], name='unique_budget_alert_state'),
+        ]
+
+    def __str__(self):
+        return f"{self.budget.category} {self.year}-{self.month:02d}: {self.threshold}%"
+
 # Force load signals to guarantee the post_save correctly registers
 import transactions.signals
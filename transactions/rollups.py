@@ -0,0 +1,93 @@
+"""
+TRANSACTIONS MODULE - MONTHLY SPEND ROLLUP (transactions/rollups.py)
+--------------------------------------------------------------------
+Keeps MonthlyCategorySpend in step with the ledger, one delta at a time:
+
+- `Transaction.save()` reads the stored row (for updates), saves, and moves
+  the amount from the old (month, category, type) bucket to the new one, all
+  inside one DB transaction. Amount, date, category and type changes are all
+  just "remove old state, add new state".
+- Deletes (including cascades) go through the `post_delete` receiver in
+  transactions/signals.py, which runs inside the delete's transaction.
+
+Bulk writes that bypass `save()` (`bulk_create`, `QuerySet.update`) must call
+`rebuild_user_rollup` for the affected users afterwards.
+"""
+
+from datetime import date
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction as db_transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import ExtractMonth, ExtractYear
+
+from .models import MonthlyCategorySpend, Transaction
+
+
+def _as_date(value):
+    return date.fromisoformat(value) if isinstance(value, str) else value
+
+
+def row_state(txn):
+    """(bucket key, amount) of an in-memory Transaction."""
+    day = _as_date(txn.date)
+    key = (txn.user_id, day.year, day.month, txn.category_id, txn.category_type)
+    return key, Decimal(str(txn.amount))
+
+
+def stored_state(pk):
+    """(bucket key, amount) of a Transaction as currently stored, or None."""
+    row = Transaction.objects.filter(pk=pk).values_list(
+        'user_id', 'date', 'category_id', 'category_type', 'amount',
+    ).first()
+    if row is None:
+        return None
+    user_id, day, category_id, category_type, amount = row
+    return (user_id, day.year, day.month, category_id, category_type), amount
+
+
+def _add(key, amount, count):
+    user_id, year, month, category_id, category_type = key
+    bucket = MonthlyCategorySpend.objects.filter(
+        user_id=user_id, year=year, month=month, category_id=category_id, category_type=category_type,
+    )
+    if bucket.update(total=F('total') + amount, count=F('count') + count):
+        bucket.filter(count__lte=0).delete()
+        return
+    if count <= 0:
+        return  # removing from a bucket that was never built; a rebuild will reconcile it
+    try:
+        with db_transaction.atomic():
+            MonthlyCategorySpend.objects.create(
+                user_id=user_id, year=year, month=month, category_id=category_id,
+                category_type=category_type, total=amount, count=count,
+            )
+    except IntegrityError:
+        # A concurrent write created the bucket first
+        bucket.update(total=F('total') + amount, count=F('count') + count)
+
+
+def apply_change(before, after):
+    """Moves a row's contribution from its `before` state to its `after` state (either may be None)."""
+    if before == after:
+        return
+    if before is not None:
+        _add(before[0], -before[1], -1)
+    if after is not None:
+        _add(after[0], after[1], 1)
+
+
+def rebuild_user_rollup(user_id):
+    """Recomputes one user's rollup from the ledger in one grouped query. Returns the number of buckets."""
+    rows = (
+        Transaction.objects.filter(user_id=user_id)
+        .annotate(year=ExtractYear('date'), month=ExtractMonth('date'))
+        .values('year', 'month', 'category_id', 'category_type')
+        .annotate(total=Sum('amount'), count=Count('id'))
+        .order_by()
+    )
+    buckets = [MonthlyCategorySpend(user_id=user_id, **row) for row in rows]
+    with db_transaction.atomic():
+        MonthlyCategorySpend.objects.filter(user_id=user_id).delete()
+        MonthlyCategorySpend.objects.bulk_create(buckets)
+    return len(buckets)
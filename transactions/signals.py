@@ -1,41 +1,111 @@
 # transactions/signals.py
-import threading
-from django.db.models.signals import post_save, post_delete
+import logging
+from django.db import transaction as db_transaction
+from django.db.models.signals import post_save, post_delete, pre_delete
 from django.dispatch import receiver
-from .models import Transaction
-from .utils import check_budget_alert, export_all_transactions_to_csv
-
-# Global variables for debouncing
-_export_timer = None
-_EXPORT_COOLDOWN_SECONDS = 15.0
-
-def _trigger_export():
-    try:
-        export_all_transactions_to_csv()
-    except Exception as e:
-        print(f"❌ ERROR in _trigger_export CSV write: {e}")
-        import logging
-        logging.getLogger(__name__).error(f"Failed to export consolidated CSV: {e}")
-
-def schedule_csv_export():
+from django.utils import timezone
+from backend import jobs
+from .models import Transaction, Category, CategoryRule, MonthlyCategorySpend
+from .merchants import bump_user_rules
+from .utils import check_budget_alert
+from .store import upsert_entry, tombstone_entry, append_entries, compact_user_partition
+
+logger = logging.getLogger(__name__)
+
+
+def schedule_partition_compaction(user_id):
+    """
+    Queues a background compaction of the user's partition on the shared job
+    runner (backend/jobs.py). A burst of writes within the coalescing window
+    is folded in one pass.
+    """
+    jobs.schedule(f'compact-partition:{user_id}', compact_user_partition, user_id)
+
+
+def _log_change(user_id, *entries):
+    """
+    Appends to the owner's change log once the surrounding DB transaction commits,
+    so rolled-back writes never reach the insights store.
+    """
+    def _append():
+        try:
+            append_entries(user_id, entries)
+            schedule_partition_compaction(user_id)
+        except Exception as e:
+            logger.error(f"Failed to log change for transactions {[entry['id'] for entry in entries]}: {e}")
+
+    db_transaction.on_commit(_append)
+
+
+def _check_budgets(instance, before, after):
     """
-    Schedules an asynchronous export of all transactions to a CSV file.
-    Runs immediately to ensure the Insights ML models have up-to-date real-time data.
+    Re-evaluates the budgets a write moved spend in or out of. Budgets are per
+    category name and per current month, so only the expense categories of
+    the row's buckets before and after, when in this month, can change.
     """
-    print("🔔 SIGNAL FIRED: CSV Export starting...")
-    _trigger_export()
-    print("✅ CSV Export finished.")
+    if before == after:
+        return
+    today = timezone.localdate()
+    category_ids = {
+        category_id
+        for (_, year, month, category_id, category_type), _ in filter(None, (before, after))
+        if category_type == 'expense' and category_id and (year, month) == (today.year, today.month)
+    }
+    if not category_ids:
+        return
+    if category_ids == {instance.category_id}:
+        names = [instance.category.name]
+    else:
+        names = list(Category.objects.filter(pk__in=category_ids).values_list('name', flat=True))
+    check_budget_alert(instance.user, categories=names)
 
 
 @receiver(post_save, sender=Transaction)
 def transaction_saved(sender, instance, created, **kwargs):
-    if created and instance.category_type == 'expense':
-        check_budget_alert(instance.user)
-    
-    # Schedule debounced global CSV export
-    schedule_csv_export()
+    from .rollups import row_state
+    _check_budgets(instance, getattr(instance, '_stored_state', None), row_state(instance))
+
+    _log_change(instance.user_id, upsert_entry(instance))
 
 @receiver(post_delete, sender=Transaction)
 def transaction_deleted(sender, instance, **kwargs):
-    # Schedule debounced global CSV export
-    schedule_csv_export()
+    from .rollups import apply_change, row_state
+    # Runs inside the delete's DB transaction (saves update the rollup in Transaction.save)
+    before = row_state(instance)
+    apply_change(before, None)
+    # Spend going down re-arms the thresholds it drops below, so the next crossing alerts again
+    _check_budgets(instance, before, None)
+    _log_change(instance.user_id, tombstone_entry(instance))
+
+
+@receiver(pre_delete, sender=Category)
+def category_deleting(sender, instance, **kwargs):
+    # on_delete=SET_NULL is a queryset update that sends no post_save: remember the rows it will touch
+    instance._orphaned_ids = list(Transaction.objects.filter(category=instance).values_list('id', flat=True))
+    # Its rollup buckets would collide with the uncategorized ones when nulled; category_deleted rebuilds them
+    MonthlyCategorySpend.objects.filter(category=instance).delete()
+
+
+@receiver(post_delete, sender=Category)
+def category_deleted(sender, instance, **kwargs):
+    # The user's transactions were just moved to "no category" in SQL; merge their buckets
+    from .rollups import rebuild_user_rollup
+    rebuild_user_rollup(instance.user_id)
+
+    # ...and log them as uncategorized, or the partition keeps the deleted name until a full rewrite
+    orphaned = getattr(instance, '_orphaned_ids', None)
+    if orphaned:
+        # A new updated_at moves the insights data_version fingerprint (count, id sum and
+        # max updated_at are otherwise unchanged), so cached forecasts and insights rebuild
+        Transaction.objects.filter(pk__in=orphaned).update(updated_at=timezone.now())
+        _log_change(instance.user_id, *(
+            upsert_entry(txn) for txn in Transaction.objects.filter(pk__in=orphaned).order_by('date', 'created_at')
+        ))
+        from insights.signals import schedule_insight_precompute
+        schedule_insight_precompute(instance.user_id)
+
+
+@receiver([post_save, post_delete], sender=CategoryRule)
+def category_rules_changed(sender, instance, **kwargs):
+    # Recompile the user's override index on next lookup
+    bump_user_rules(instance.user_id)
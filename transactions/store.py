@@ -0,0 +1,308 @@
+"""
+TRANSACTIONS MODULE - COLUMNAR STORE (transactions/store.py)
+------------------------------------------------------------
+Per-user partitioned copy of the ledger that feeds the insights ML models.
+Each user's transactions live in their own NumPy file under
+`TRANSACTION_STORE_DIR/<user uuid>.npy`, so an insights request only ever reads
+the requesting user's rows instead of scanning a platform-wide CSV.
+
+Partitions are plain structured `.npy` arrays: they load with typed columns
+(datetime64 dates, float64 amounts) and are opened with `mmap_mode='r'`, so
+gunicorn workers reading the same user share the OS page cache.
+
+Writes never rewrite a partition inline. Every save/delete appends one line to
+the user's change log (`<uuid>.log`): an upsert carrying the row and its
+`updated_at`, or a tombstone for deletes. Readers overlay the log on the base
+partition, and `compact_user_partition()` folds the log back into the base file
+in the background.
+"""
+
+import json
+import logging
+import os
+import tempfile
+from datetime import timezone as dt_timezone
+
+import numpy as np
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+TYPE_LABELS = ['Expense', 'Income']
+# Label of transactions without a category; the same one the old all_transactions.csv export wrote
+UNCATEGORIZED = 'Other'
+
+
+def get_store_dir():
+    """Returns the directory holding the per-user partitions, creating it on first use."""
+    store_dir = getattr(
+        settings, 'TRANSACTION_STORE_DIR',
+        os.path.join(settings.BASE_DIR, 'media', 'datasets', 'users'),
+    )
+    os.makedirs(store_dir, exist_ok=True)
+    return store_dir
+
+
+def partition_path(user_id):
+    """Path of the partition file for a single user (keyed by the user's UUID)."""
+    return os.path.join(get_store_dir(), f"{user_id}.npy")
+
+
+def journal_path(user_id):
+    """Path of the append-only change log that is overlaid on the user's partition."""
+    return os.path.join(get_store_dir(), f"{user_id}.log")
+
+
+def _compacting_path(user_id):
+    """A change log that a running compaction has taken ownership of."""
+    return journal_path(user_id) + '.compacting'
+
+
+def _to_utc_naive(value):
+    """datetime64 cannot hold tz info, so aware timestamps are normalised to naive UTC."""
+    if value is None:
+        return np.datetime64('NaT')
+    if value.tzinfo is not None:
+        value = value.astimezone(dt_timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def build_partition(rows):
+    """
+    Builds a structured array from `(id, date, amount, category_name, category_type,
+    description, updated_at)` rows, as returned by `user_partition_rows()`.
+    String columns are sized to the widest value in this user's data.
+    """
+    rows = list(rows)
+    category_width = max((len(r[3] or UNCATEGORIZED) for r in rows), default=1)
+    description_width = max((len(r[5] or '') for r in rows), default=1) or 1
+
+    dtype = np.dtype([
+        ('id', 'i8'),
+        ('date', 'datetime64[D]'),
+        ('amount', 'f8'),
+        ('category', f'U{category_width}'),
+        ('type', 'U7'),
+        ('description', f'U{description_width}'),
+        ('updated_at', 'datetime64[us]'),
+    ])
+    partition = np.empty(len(rows), dtype=dtype)
+    if not rows:
+        return partition
+
+    ids, dates, amounts, categories, types, descriptions, updated = zip(*rows)
+    partition['id'] = ids
+    partition['date'] = np.array(dates, dtype='datetime64[D]')
+    partition['amount'] = np.array([float(a) for a in amounts], dtype='f8')
+    partition['category'] = [c or UNCATEGORIZED for c in categories]
+    partition['type'] = [(t or 'expense').capitalize() for t in types]
+    partition['description'] = [d or '' for d in descriptions]
+    partition['updated_at'] = np.array([_to_utc_naive(u) for u in updated], dtype='datetime64[us]')
+    return partition
+
+
+def user_partition_rows(user_id):
+    """Streams the raw ledger rows for one user in the column order of the partition."""
+    from .models import Transaction
+
+    return (
+        Transaction.objects.filter(user_id=user_id)
+        .order_by('date', 'created_at')
+        .values_list('id', 'date', 'amount', 'category__name', 'category_type', 'description', 'updated_at')
+        .iterator(chunk_size=2000)
+    )
+
+
+def save_partition(user_id, partition):
+    """Atomically replaces a user's partition file (write to temp file + os.replace)."""
+    path = partition_path(user_id)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            np.save(f, partition, allow_pickle=False)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return path
+
+
+def write_user_partition(user_id):
+    """
+    Rebuilds a single user's partition from the database. Pending change-log
+    entries are left alone: they are idempotent against the fresh base.
+    """
+    return save_partition(user_id, build_partition(user_partition_rows(user_id)))
+
+
+# ==========================================
+# CHANGE LOG (append-only upserts & tombstones)
+# ==========================================
+
+def upsert_entry(instance):
+    """Change-log entry for a created/updated Transaction."""
+    return {
+        'op': 'upsert',
+        'id': instance.pk,
+        'date': str(instance.date),
+        'amount': float(instance.amount),
+        'category': instance.category.name if instance.category_id else UNCATEGORIZED,
+        'type': instance.category_type,
+        'description': instance.description or '',
+        'updated_at': str(np.datetime64(_to_utc_naive(instance.updated_at), 'us')),
+    }
+
+
+def tombstone_entry(instance):
+    """Change-log entry that drops a deleted Transaction before the next compaction."""
+    return {'op': 'delete', 'id': instance.pk}
+
+
+def append_entries(user_id, entries):
+    """Appends entries to the user's change log (a single O_APPEND write)."""
+    with open(journal_path(user_id), 'a', encoding='utf-8') as f:
+        f.write(''.join(json.dumps(entry) + '\n' for entry in entries))
+
+
+def _read_log(log_path):
+    entries = []
+    if not os.path.exists(log_path):
+        return entries
+    with open(log_path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                # A torn final line from a crashed writer is skipped, not fatal
+                logger.warning(f"Skipping malformed change-log line in {log_path}")
+    return entries
+
+
+def read_journal(user_id):
+    """Returns pending change-log entries in write order (compacting log first)."""
+    return _read_log(_compacting_path(user_id)) + _read_log(journal_path(user_id))
+
+
+def _common_dtype(a, b):
+    """Widest string widths of two partitions so they can be concatenated."""
+    fields = []
+    for name in a.dtype.names:
+        da, db = a.dtype[name], b.dtype[name]
+        fields.append((name, max(da, db, key=lambda d: d.itemsize) if da.kind == 'U' else da))
+    return np.dtype(fields)
+
+
+def apply_journal(partition, entries):
+    """
+    Overlays change-log entries on a base partition. The last entry per id wins;
+    an upsert older than the base row's `updated_at` is stale and ignored.
+    """
+    if not entries:
+        return partition
+
+    latest = {}
+    for entry in entries:
+        latest[entry['id']] = entry
+
+    base_updated = {}
+    if len(partition):
+        touched = np.isin(partition['id'], list(latest))
+        base_updated = dict(zip(partition['id'][touched].tolist(), partition['updated_at'][touched]))
+
+    dropped, upserts = [], []
+    for row_id, entry in latest.items():
+        if entry['op'] == 'delete':
+            dropped.append(row_id)
+            continue
+        updated_at = np.datetime64(entry['updated_at'], 'us')
+        if row_id in base_updated and base_updated[row_id] > updated_at:
+            continue
+        dropped.append(row_id)
+        upserts.append((
+            row_id, np.datetime64(entry['date'], 'D'), entry['amount'], entry['category'],
+            entry['type'], entry['description'], updated_at.astype(object),
+        ))
+
+    kept = partition[~np.isin(partition['id'], dropped)] if len(partition) else partition
+    added = build_partition(upserts)
+    dtype = _common_dtype(kept, added)
+    merged = np.concatenate([kept.astype(dtype), added.astype(dtype)])
+    return merged[np.argsort(merged['date'], kind='stable')]
+
+
+def compact_user_partition(user_id):
+    """
+    Folds the user's change log into the base partition. The live log is first
+    renamed so new writes keep appending to a fresh file while we compact; a
+    crash mid-way leaves the `.compacting` log in place and it is re-applied.
+    """
+    live, compacting = journal_path(user_id), _compacting_path(user_id)
+    if os.path.exists(live) and not os.path.exists(compacting):
+        os.replace(live, compacting)
+    if not os.path.exists(compacting):
+        return None
+
+    base = load_user_partition(user_id, mmap=False)
+    if base is None:
+        # No base yet: the database already holds every logged change
+        path = write_user_partition(user_id)
+    else:
+        path = save_partition(user_id, apply_journal(base, _read_log(compacting)))
+    try:
+        os.remove(compacting)
+    except FileNotFoundError:
+        pass  # Another worker finished the same compaction first
+    return path
+
+
+def load_user_partition(user_id, mmap=True):
+    """Returns the user's structured array (memory-mapped by default), or None if missing."""
+    path = partition_path(user_id)
+    if not os.path.exists(path):
+        return None
+    return np.load(path, mmap_mode='r' if mmap else None, allow_pickle=False)
+
+
+def partition_to_frame(partition):
+    """
+    Converts a partition into the typed DataFrame the insights models consume.
+    Besides the stored columns it carries `month` (int32 yyyymm), `is_expense`
+    and `category_code` (the codes of the `category` categorical).
+    """
+    import pandas as pd
+
+    if partition is None or len(partition) == 0:
+        return pd.DataFrame()
+
+    # Months since 1970-01 -> yyyymm, so month filters and groupbys are plain int comparisons
+    months = partition['date'].astype('datetime64[M]').astype('i8')
+    category = pd.Categorical(partition['category'])
+    return pd.DataFrame({
+        'id': partition['id'],
+        'date': partition['date'].astype('datetime64[ns]'),
+        'amount': partition['amount'].astype('float64', copy=False),
+        'category': category,
+        'type': pd.Categorical(partition['type'], categories=TYPE_LABELS),
+        'description': partition['description'].astype(object),
+        'updated_at': partition['updated_at'],
+        'month': ((months // 12 + 1970) * 100 + months % 12 + 1).astype('int32'),
+        'is_expense': partition['type'] == 'Expense',
+        'category_code': category.codes,
+    })
+
+
+def load_user_frame(user_id):
+    """
+    Loads only the requesting user's rows: the base partition plus any pending
+    change-log entries. A missing partition (new user, fresh deploy) is built
+    from the database on first access.
+    """
+    partition = load_user_partition(user_id)
+    if partition is None:
+        write_user_partition(user_id)
+        partition = load_user_partition(user_id)
+    return partition_to_frame(apply_journal(partition, read_journal(user_id)))
@@ -0,0 +1,72 @@
+from celery import shared_task
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(ignore_result=True)
+def refine_transaction_categories(pairs):
+    """
+    Background Gemini refinement of Naive Bayes categories.
+    `pairs` is a list of [transaction_id, auto_category_id]; Gemini is called
+    once per distinct normalized description, and a transaction is only
+    patched while it still carries the category it was auto-assigned. That
+    check is repeated by the UPDATE itself, so a user edit made while Gemini
+    was answering is never overwritten.
+    """
+    from django.db import transaction as db_transaction
+    from django.db.models.signals import post_save
+    from django.utils import timezone
+    from .categorizer import _gemini_categorize, normalize_description
+    from .models import Transaction, Category
+    from .rollups import apply_change, row_state
+
+    auto_category = {int(txn_id): cat_id for txn_id, cat_id in pairs}
+    transactions = Transaction.objects.filter(id__in=auto_category).select_related('category')
+
+    groups = {}
+    for txn in transactions:
+        if txn.category_id == auto_category[txn.id]:
+            groups.setdefault(normalize_description(txn.description), []).append(txn)
+
+    categories = {}
+    patched = 0
+    for txns in groups.values():
+        refined = _gemini_categorize(txns[0].description)
+        if not refined:
+            continue
+        for txn in txns:
+            if txn.category and txn.category.name == refined:
+                continue
+            key = (txn.user_id, refined)
+            if key not in categories:
+                categories[key], _ = Category.objects.get_or_create(user_id=txn.user_id, name=refined)
+            with db_transaction.atomic():
+                if not Transaction.objects.filter(pk=txn.pk, category_id=auto_category[txn.id]).update(
+                    category=categories[key], updated_at=timezone.now(),
+                ):
+                    continue  # edited (or deleted) since the Gemini call started: the user's choice wins
+                txn.refresh_from_db()  # the row is ours until commit; also picks up concurrent amount/date edits
+                after = row_state(txn)
+                user_id, year, month, _, category_type = after[0]
+                txn._stored_state = ((user_id, year, month, auto_category[txn.id], category_type), after[1])
+                apply_change(txn._stored_state, after)
+                # What save() would have triggered: budget check, change-log entry and insight refresh
+                post_save.send(
+                    sender=Transaction, instance=txn, created=False, raw=False,
+                    using=Transaction.objects.db, update_fields=frozenset({'category', 'updated_at'}),
+                )
+            patched += 1
+
+    logger.info(f"[GEMINI CATEGORIZER] Refined {patched} of {len(auto_category)} transactions")
+    return patched
+
+
+@shared_task(ignore_result=True)
+def train_categorizer_incremental():
+    """Nightly partial_fit of the categorizer on labels added since the last checkpoint."""
+    from .training import train_incremental
+
+    result = train_incremental()
+    logger.info(f"[CATEGORIZER TRAINING] {result}")
+    return result
@@ -1,7 +1,43 @@
-from django.test import TestCase, Client
+import io
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from datetime import date, timedelta
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from unittest import mock
+
+import numpy as np
+from django.conf import settings
+from django.db import IntegrityError, transaction as db_transaction
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, Client, override_settings, tag
 from django.contrib.auth import get_user_model
 from django.urls import reverse
-from transactions.models import Transaction, Category
+from django.utils import timezone
+from insights.analytics import AnalyticsContext
+from transactions import categorizer
+from transactions.aggregates import category_spend, month_bounds
+from transactions.categorizer import CategorizerRegistry, _naive_bayes_categorize, registry
+from transactions.importer import detect_format, import_transactions
+from transactions import merchants
+from transactions.merchants import MerchantIndex, fast_path_stats, get_user_index, normalize_description
+from transactions.models import Transaction, Category, Budget, CategoryRule, MonthlyCategorySpend, alerts
+from transactions.rollups import rebuild_user_rollup
+from transactions.store import (
+    compact_user_partition, load_user_frame, load_user_partition, read_journal, write_user_partition,
+)
+from transactions.tasks import refine_transaction_categories
+from transactions.training import read_checkpoint, train_incremental
+from transactions.utils import check_budget_alert
+from backend import jobs
+from backend.testing import TempDirMixin
 from rest_framework_simplejwt.tokens import RefreshToken
 
 User = get_user_model()
@@ -58,3 +94,661 @@ class TransactionIntegrationTests(TestCase):
         )
         self.assertEqual(res.status_code, 204)
         self.assertFalse(Transaction.objects.filter(id=t.id).exists())
+
+
+class TransactionStoreTests(TempDirMixin, TestCase):
+    """Per-user columnar partitions consumed by the insights models."""
+
+    temp_dir_settings = {'TRANSACTION_STORE_DIR': None}
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='alice', email='alice@example.com', password='pw')
+        self.other = User.objects.create_user(username='bob', email='bob@example.com', password='pw')
+        self.food = Category.objects.create(user=self.user, name='Food')
+
+    def test_frame_contains_only_requesting_user_with_typed_columns(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Transaction.objects.create(user=self.user, amount=120, category=self.food, date='2024-01-05', description='Swiggy')
+            Transaction.objects.create(user=self.user, amount=80, category_type='income', date='2024-01-06')
+            Transaction.objects.create(user=self.other, amount=999, date='2024-01-05')
+
+        df = load_user_frame(self.user.id)
+        self.assertEqual(len(df), 2)
+        self.assertEqual(str(df['date'].dtype), 'datetime64[ns]')
+        self.assertEqual(str(df['amount'].dtype), 'float64')
+        self.assertEqual(str(df['category'].dtype), 'category')
+        self.assertEqual(str(df['type'].dtype), 'category')
+        self.assertEqual(sorted(df['category'].astype(str)), ['Food', 'Other'])
+        self.assertNotIn(999.0, df['amount'].tolist())
+        self.assertEqual(str(df['month'].dtype), 'int32')
+        self.assertEqual(df['month'].tolist(), [202401, 202401])
+        self.assertEqual(df['is_expense'].tolist(), [True, False])
+        self.assertEqual(list(df['category'].cat.categories[df['category_code']]), list(df['category'].astype(str)))
+
+    def test_partition_is_memory_mapped(self):
+        Transaction.objects.create(user=self.user, amount=50, category=self.food, date='2024-02-01')
+        write_user_partition(self.user.id)
+        self.assertIsInstance(load_user_partition(self.user.id), np.memmap)
+
+    def test_writes_append_to_change_log_and_compact(self):
+        keep = Transaction.objects.create(user=self.user, amount=10, category=self.food, date='2024-03-01')
+        gone = Transaction.objects.create(user=self.user, amount=20, category=self.food, date='2024-03-02')
+        write_user_partition(self.user.id)
+        base_mtime = os.path.getmtime(os.path.join(self.tmp_dir, f"{self.user.id}.npy"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            keep.amount = 15
+            keep.save()
+            gone.delete()
+            Transaction.objects.create(user=self.user, amount=30, date='2024-03-03')
+
+        # The base partition is untouched; the log carries two upserts and a tombstone
+        self.assertEqual(os.path.getmtime(os.path.join(self.tmp_dir, f"{self.user.id}.npy")), base_mtime)
+        self.assertEqual([e['op'] for e in read_journal(self.user.id)], ['upsert', 'delete', 'upsert'])
+        self.assertEqual(load_user_frame(self.user.id)['amount'].tolist(), [15.0, 30.0])
+
+        compact_user_partition(self.user.id)
+        self.assertEqual(read_journal(self.user.id), [])
+        self.assertEqual(load_user_partition(self.user.id)['amount'].tolist(), [15.0, 30.0])
+
+    def test_category_delete_reaches_partition(self):
+        Transaction.objects.create(user=self.user, amount=10, category=self.food, date='2024-04-01')
+        write_user_partition(self.user.id)
+        version = AnalyticsContext(self.user).data_version
+        with self.captureOnCommitCallbacks(execute=True):
+            self.food.delete()
+        self.assertEqual(load_user_frame(self.user.id)['category'].astype(str).tolist(), ['Other'])
+        self.assertNotEqual(AnalyticsContext(self.user).data_version, version)  # cached insights rebuild
+
+
+class CategorizeManyTests(TestCase):
+    """Batch categorization runs one vectorizer pass and caches normalized descriptions."""
+
+    def setUp(self):
+        categorizer.prediction_cache.clear()
+        self.user = User.objects.create_user(username='batcher', password='pw')
+        self.client = Client()
+        self.auth_headers = {'HTTP_AUTHORIZATION': f'Bearer {RefreshToken.for_user(self.user).access_token}'}
+
+    def test_one_transform_per_batch_and_cache_hits(self):
+        if registry.get()[1] is None:
+            self.skipTest("Naive Bayes model files are not available")
+
+        descriptions = ['SWIGGY*ORDER 8812', 'swiggy order 9913', '', 'petrol pump refill', 'Uber ride to office']
+        with mock.patch.object(registry, 'vectorizer', wraps=registry.vectorizer) as vec:
+            first = categorizer.categorize_many(descriptions)
+            second = categorizer.categorize_many(descriptions)
+
+        self.assertEqual(vec.transform.call_count, 1)
+        self.assertEqual(len(vec.transform.call_args.args[0]), 2)  # the two Swiggy rows share a key
+        self.assertEqual(first, second)
+        self.assertEqual(first[0], first[1])
+        self.assertEqual(first[2], 'Other')
+        self.assertEqual(first[4], 'Transport')  # merchant index, never reaches the model
+        self.assertEqual(categorizer.prediction_cache.stats()['hits'], 3)  # blanks and merchants skip the cache
+
+    def test_categorize_endpoint_accepts_array(self):
+        res = self.client.post(
+            reverse('categorize_description'),
+            data={'descriptions': ['Uber ride', 'Salary credit', '']},
+            content_type='application/json', **self.auth_headers,
+        )
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(len(res.json()['categories']), 3)
+        self.assertEqual(res.json()['categories'][2], 'Other')
+
+    def test_list_post_creates_and_categorizes_rows(self):
+        rows = [
+            {'amount': '10', 'description': 'Uber ride', 'category_type': 'expense', 'date': '2026-01-0%d' % d}
+            for d in range(1, 4)
+        ]
+        res = self.client.post(
+            reverse('transaction_list_create'), data=rows,
+            content_type='application/json', **self.auth_headers,
+        )
+        self.assertEqual(res.status_code, 201)
+        self.assertEqual(Transaction.objects.filter(user=self.user).count(), 3)
+        self.assertFalse(Transaction.objects.filter(user=self.user, category__isnull=True).exists())
+
+        with override_settings(TRANSACTIONS_MAX_BATCH_SIZE=2):
+            res = self.client.post(
+                reverse('transaction_list_create'), data=rows,
+                content_type='application/json', **self.auth_headers,
+            )
+        self.assertEqual(res.status_code, 400)
+        self.assertEqual(Transaction.objects.filter(user=self.user).count(), 3)
+
+
+class CategorizerRegistryTests(TestCase):
+    """The Naive Bayes model is loaded once, lazily, and hot-reloads when retrained."""
+
+    def test_django_setup_does_not_import_sklearn(self):
+        code = (
+            "import os, sys; os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings'); "
+            "import django; django.setup(); import backend.urls, transactions.categorizer; "
+            "print(','.join(m for m in ('sklearn', 'joblib', 'xgboost', 'google.generativeai') if m in sys.modules))"
+        )
+        out = subprocess.run([sys.executable, '-c', code], cwd=settings.BASE_DIR, capture_output=True, text=True, check=True)
+        self.assertEqual(out.stdout.strip(), '')
+
+    def test_lazy_load_and_reload_on_change(self):
+        model_path, vectorizer_path = registry.paths()
+        if not (os.path.exists(model_path) and os.path.exists(vectorizer_path)):
+            self.skipTest("Naive Bayes model files are not available")
+
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = {'CATEGORIZER_MODEL_PATH': os.path.join(tmp, 'clf.pkl'),
+                     'CATEGORIZER_VECTORIZER_PATH': os.path.join(tmp, 'vec.pkl')}
+            shutil.copy(model_path, paths['CATEGORIZER_MODEL_PATH'])
+            shutil.copy(vectorizer_path, paths['CATEGORIZER_VECTORIZER_PATH'])
+
+            with override_settings(CATEGORIZER_RELOAD_CHECK=0, **paths):
+                fresh = CategorizerRegistry()
+                self.assertFalse(fresh.stats()['loaded'])
+                classifier, _ = fresh.get()
+                self.assertIsNotNone(classifier)
+                self.assertIs(fresh.get()[0], classifier)  # unchanged on disk: same copy
+                self.assertIsNotNone(fresh.stats()['load_time_ms'])
+
+                mtime = os.path.getmtime(paths['CATEGORIZER_MODEL_PATH'])
+                os.utime(paths['CATEGORIZER_MODEL_PATH'], (mtime + 5, mtime + 5))  # "retrained"
+                self.assertIsNot(fresh.get()[0], classifier)
+                self.assertEqual(fresh.stats()['reloads'], 1)
+
+
+class IncrementalTrainingTests(TempDirMixin, TestCase):
+    """partial_fit training streams only new labels and swaps the served model."""
+
+    temp_dir_settings = {'CATEGORIZER_MODEL_PATH': 'clf.pkl', 'CATEGORIZER_VECTORIZER_PATH': 'vec.pkl'}
+
+    def setUp(self):
+        self.addCleanup(registry.reload)  # registered first, so it runs after the paths are restored
+        super().setUp()
+        self.user = User.objects.create_user(username='trainer', password='pw')
+
+    def _label(self, description, category, n=3):
+        cat, _ = Category.objects.get_or_create(user=self.user, name=category)
+        for _ in range(n):
+            Transaction.objects.create(
+                user=self.user, amount=10, description=description, category=cat,
+                category_type='expense', date='2026-01-05',
+            )
+
+    def test_full_then_incremental_then_new_category(self):
+        self._label('zorblax fresh market', 'Food & Dining')
+        first = train_incremental()
+        self.assertEqual(first['mode'], 'full')
+        self.assertTrue(os.path.exists(os.path.join(self.tmp_dir, 'clf.pkl')))
+        self.assertEqual(_naive_bayes_categorize('zorblax fresh market'), 'Food & Dining')
+
+        self._label('quuxcorp streaming plan', 'Subscriptions')
+        second = train_incremental()
+        self.assertEqual((second['mode'], second['samples']), ('incremental', 3))
+        self.assertEqual(second['total_samples'], first['total_samples'] + 3)
+        self.assertEqual(read_checkpoint()['samples'], second['total_samples'])
+        self.assertEqual(_naive_bayes_categorize('quuxcorp streaming plan'), 'Subscriptions')
+
+        self.assertFalse(train_incremental()['swapped'])  # nothing new since the checkpoint
+
+        self._label('kibble barn', 'Pet Care')  # a class the model has never seen
+        self.assertEqual(train_incremental()['mode'], 'full')
+        self.assertIn('Pet Care', registry.classifier.classes_)
+
+
+class TransactionExportTests(TempDirMixin, TestCase):
+    """Per-user CSV export: streamed, date-filtered, and as an owner-only background file."""
+
+    temp_dir_settings = {'EXPORTS_DIR': None}
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='exporter', email='exporter@example.com', password='pw')
+        other = User.objects.create_user(username='other', email='other@example.com', password='pw')
+        for user, day in ((self.user, '2026-01-05'), (self.user, '2026-02-05'), (other, '2026-01-05')):
+            Transaction.objects.create(user=user, amount=10, description='Uber ride', category_type='expense', date=day)
+        self.client = Client()
+        self.auth_headers = {'HTTP_AUTHORIZATION': f'Bearer {RefreshToken.for_user(self.user).access_token}'}
+
+    def test_streams_only_own_rows_in_range(self):
+        res = self.client.get(reverse('export_transactions'), {'start_date': '2026-02-01'}, **self.auth_headers)
+        self.assertEqual(res.status_code, 200)
+        lines = b''.join(res.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], 'Date,Description,Category,Type,Amount')
+        self.assertEqual(len(lines), 2)
+        self.assertTrue(lines[1].startswith('2026-02-05,Uber ride'))
+
+        bad = self.client.get(reverse('export_transactions'), {'end_date': 'soon'}, **self.auth_headers)
+        self.assertEqual(bad.status_code, 400)
+
+    def test_background_file_mode(self):
+        with mock.patch('backend.jobs.schedule') as schedule, \
+                mock.patch('backend.exports.generate_export_file.apply_async', side_effect=OSError('no broker')):
+            res = self.client.get(reverse('export_transactions'), {'mode': 'file'}, **self.auth_headers)
+            self.assertEqual(res.status_code, 202)
+            # Run the queued job here: the in-memory test database is not shared with the runner's threads
+            key, publish, *args = schedule.call_args.args
+            self.assertEqual(key, f"export:{res.json()['job']}")
+            publish(*args)
+
+        download = self.client.get(res.json()['download_url'], **self.auth_headers)
+        self.assertEqual(download.status_code, 200)
+        self.assertEqual(len(b''.join(download.streaming_content).decode().splitlines()), 3)
+
+        intruder = User.objects.get(username='other')
+        headers = {'HTTP_AUTHORIZATION': f'Bearer {RefreshToken.for_user(intruder).access_token}'}
+        self.assertEqual(self.client.get(res.json()['download_url'], **headers).status_code, 404)
+
+
+class StubGemini(BaseHTTPRequestHandler):
+    """Answers every generateContent call with 'Food & Dining' after `server.delay` seconds."""
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        self.server.requests.append(self.path)
+        time.sleep(self.server.delay)
+        body = json.dumps({'candidates': [{
+            'content': {'parts': [{'text': 'Food & Dining'}], 'role': 'model'},
+            'finishReason': 'STOP', 'index': 0,
+        }]}).encode()
+        try:
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except BrokenPipeError:
+            pass  # client gave up after its timeout
+
+    def log_message(self, *args):
+        pass
+
+
+@override_settings(GEMINI_API_KEY='test-key', GEMINI_CATEGORIZE_TIMEOUT=0.5)
+class GeminiRefinementTests(TestCase):
+    """Creates answer from Naive Bayes; Gemini refines in the background within a latency budget."""
+
+    def setUp(self):
+        self.server = HTTPServer(('127.0.0.1', 0), StubGemini)
+        self.server.requests, self.server.delay = [], 0
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.enterContext(override_settings(GEMINI_API_ENDPOINT=f'http://127.0.0.1:{self.server.server_address[1]}'))
+        categorizer._gemini_model = None
+        self.addCleanup(setattr, categorizer, '_gemini_model', None)
+
+        self.user = User.objects.create_user(username='gemini', password='pw')
+        self.client = Client()
+        self.auth_headers = {'HTTP_AUTHORIZATION': f'Bearer {RefreshToken.for_user(self.user).access_token}'}
+        self.transport = Category.objects.create(user=self.user, name='Transport')
+
+    def _txn(self, description):
+        return Transaction.objects.create(
+            user=self.user, amount=120, category=self.transport, category_type='expense',
+            description=description, date='2026-03-01',
+        )
+
+    def test_create_does_not_call_gemini_inline(self):
+        with mock.patch('transactions.categorizer._publish_refinement') as publish:
+            with self.captureOnCommitCallbacks(execute=True):
+                res = self.client.post(
+                    reverse('transaction_list_create'),
+                    data={'amount': '99', 'description': 'Swiggy order', 'category_type': 'expense', 'date': '2026-03-01'},
+                    content_type='application/json', **self.auth_headers,
+                )
+            self.assertTrue(jobs.wait_idle(5))
+        self.assertEqual(res.status_code, 201)
+        self.assertEqual(self.server.requests, [])
+        publish.assert_called_once()
+
+    def test_refinement_patches_category_once_per_description(self):
+        first, second = self._txn('SWIGGY order 101'), self._txn('swiggy ORDER 102')
+        patched = refine_transaction_categories([[first.id, self.transport.id], [second.id, self.transport.id]])
+
+        self.assertEqual(patched, 2)
+        self.assertEqual(len(self.server.requests), 1)
+        first.refresh_from_db()
+        self.assertEqual(first.category.name, 'Food & Dining')
+
+    def test_user_edit_wins_and_slow_upstream_is_cut_off(self):
+        edited = self._txn('Swiggy order')
+        refine_transaction_categories([[edited.id, self.transport.id + 999]])
+        self.assertEqual(self.server.requests, [])  # category changed since auto-assignment → skipped
+
+        self.server.delay = 2
+        slow = self._txn('Zomato order')
+        started = time.perf_counter()
+        self.assertEqual(refine_transaction_categories([[slow.id, self.transport.id]]), 0)
+        self.assertLess(time.perf_counter() - started, 1.5)
+        slow.refresh_from_db()
+        self.assertEqual(slow.category, self.transport)
+
+    def test_edit_during_gemini_call_is_kept(self):
+        travel = Category.objects.create(user=self.user, name='Travel')
+        txn = self._txn('Swiggy order')
+
+        def user_edits_meanwhile(description):
+            Transaction.objects.filter(pk=txn.pk).update(category=travel)
+            return 'Food & Dining'
+
+        with mock.patch('transactions.categorizer._gemini_categorize', side_effect=user_edits_meanwhile):
+            self.assertEqual(refine_transaction_categories([[txn.id, self.transport.id]]), 0)
+        txn.refresh_from_db()
+        self.assertEqual(txn.category, travel)
+
+    def test_refinement_moves_rollup_and_logs_change(self):
+        txn = self._txn('Swiggy order')
+        with mock.patch('transactions.signals._log_change') as log:
+            self.assertEqual(refine_transaction_categories([[txn.id, self.transport.id]]), 1)
+        self.assertEqual(category_spend(self.user, 2026, 3), {'Food & Dining': 120.0})
+        self.assertEqual(log.call_args.args[1]['category'], 'Food & Dining')
+
+
+class MerchantIndexTests(TestCase):
+    """Known merchants and per-user corrections are answered before any ML model."""
+
+    def setUp(self):
+        fast_path_stats.reset()
+        self.user = User.objects.create_user(username='merchant', password='pw')
+        self.client = Client()
+        self.auth_headers = {'HTTP_AUTHORIZATION': f'Bearer {RefreshToken.for_user(self.user).access_token}'}
+
+    def test_longest_whole_word_match_wins(self):
+        index = MerchantIndex({'Amazon': 'Shopping', 'Amazon Prime': 'Subscriptions', 'he': 'X'})
+        self.assertEqual(index.match(normalize_description('AMAZON PRIME*2K81 video')), 'Subscriptions')
+        self.assertEqual(index.match(normalize_description('amazon.in order 4411')), 'Shopping')
+        self.assertIsNone(index.match(normalize_description('the shed')))  # 'he' is not a whole word here
+
+    def test_fast_path_skips_model_and_reports_hit_rate(self):
+        with mock.patch.object(registry, 'get') as model:
+            self.assertEqual(categorizer.categorize_transaction('UBER *TRIP 8812'), 'Transport')
+            self.assertEqual(categorizer.categorize_transaction('Netflix.com monthly'), 'Subscriptions')
+            model.assert_not_called()
+        categorizer.categorize_transaction('qwzx plorb')
+        self.assertEqual(fast_path_stats.snapshot(), {
+            'lookups': 3, 'rule_hits': 0, 'merchant_hits': 2, 'hit_rate': 0.667,
+        })
+
+    def test_user_correction_becomes_override_rule(self):
+        transport = Category.objects.create(user=self.user, name='Transport')
+        travel = Category.objects.create(user=self.user, name='Travel')
+        txn = Transaction.objects.create(
+            user=self.user, amount=500, category=transport, category_type='expense',
+            description='Uber intercity 2231', date='2026-03-01',
+        )
+        res = self.client.patch(
+            reverse('transaction_detail', args=[txn.id]), data={'category': travel.id},
+            content_type='application/json', **self.auth_headers,
+        )
+        self.assertEqual(res.status_code, 200)
+        self.assertTrue(CategoryRule.objects.filter(user=self.user, pattern='uber intercity').exists())
+
+        self.assertEqual(categorizer.categorize_transaction('UBER INTERCITY 9001', user=self.user), 'Travel')
+        self.assertEqual(categorizer.categorize_transaction('UBER INTERCITY 9001'), 'Transport')
+
+    def test_rules_saved_by_another_worker_are_picked_up(self):
+        self.assertIsNone(get_user_index(self.user.id).match('zzqx tea stall'))
+        # bulk_create sends no signal, as if the rule had been saved in another process
+        CategoryRule.objects.bulk_create([CategoryRule(user=self.user, pattern='zzqx tea', category='Food & Dining')])
+        self.assertIsNone(get_user_index(self.user.id).match('zzqx tea stall'))  # inside the recheck window
+        with override_settings(CATEGORY_RULES_RECHECK=0):
+            self.assertEqual(get_user_index(self.user.id).match('zzqx tea stall'), 'Food & Dining')
+
+    def test_compiled_rule_indexes_are_bounded(self):
+        with override_settings(CATEGORY_RULES_INDEX_SIZE=2):
+            for _ in range(4):
+                get_user_index(uuid.uuid4())
+            get_user_index(self.user.id)
+            self.assertEqual(len(merchants._user_indexes), 2)
+            self.assertIn(self.user.id, merchants._user_indexes)
+
+
+class MonthlySpendRollupTests(TestCase):
+    """MonthlyCategorySpend follows every ledger change without a rebuild."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='rollup', email='rollup@example.com', password='pw')
+        self.food = Category.objects.create(user=self.user, name='Food')
+        self.rent = Category.objects.create(user=self.user, name='Rent')
+
+    def snapshot(self):
+        return {
+            (r.year, r.month, r.category_id, r.category_type): (float(r.total), r.count)
+            for r in MonthlyCategorySpend.objects.filter(user=self.user)
+        }
+
+    def test_tracks_create_update_and_delete(self):
+        a = Transaction.objects.create(user=self.user, amount=100, category=self.food, category_type='expense', date='2026-03-05')
+        b = Transaction.objects.create(user=self.user, amount=50, category=self.food, category_type='expense', date='2026-03-20')
+        self.assertEqual(self.snapshot(), {(2026, 3, self.food.id, 'expense'): (150.0, 2)})
+
+        b.amount = 70
+        b.category = self.rent
+        b.save()
+        a.date = '2026-04-01'
+        a.save()
+        self.assertEqual(self.snapshot(), {
+            (2026, 3, self.rent.id, 'expense'): (70.0, 1),
+            (2026, 4, self.food.id, 'expense'): (100.0, 1),
+        })
+
+        b.category_type = 'income'
+        b.save()
+        a.delete()
+        self.assertEqual(self.snapshot(), {(2026, 3, self.rent.id, 'income'): (70.0, 1)})
+
+    def test_category_delete_and_rebuild_match_incremental_state(self):
+        Transaction.objects.create(user=self.user, amount=100, category=self.food, category_type='expense', date='2026-03-05')
+        Transaction.objects.create(user=self.user, amount=30, category=self.rent, category_type='expense', date='2026-03-06')
+        Transaction.objects.create(user=self.user, amount=20, category_type='expense', date='2026-03-07')
+        self.food.delete()
+        incremental = self.snapshot()
+        self.assertEqual(incremental[(2026, 3, None, 'expense')], (120.0, 2))
+
+        rebuild_user_rollup(self.user.id)
+        self.assertEqual(self.snapshot(), incremental)
+
+    def test_one_uncategorized_bucket_per_month(self):
+        bucket = dict(user=self.user, year=2026, month=3, category=None, category_type='expense', total=10, count=1)
+        MonthlyCategorySpend.objects.create(**bucket)
+        with self.assertRaises(IntegrityError), db_transaction.atomic():
+            MonthlyCategorySpend.objects.create(**bucket)  # what a racing second writer would try
+
+    def test_category_spend_reads_rollup(self):
+        Transaction.objects.create(user=self.user, amount=100, category=self.food, category_type='expense', date='2026-03-05')
+        Transaction.objects.create(user=self.user, amount=900, category=self.food, category_type='income', date='2026-03-05')
+        with self.assertNumQueries(1):
+            self.assertEqual(category_spend(self.user, 2026, 3), {'Food': 100.0})
+
+
+class TransactionIndexTests(TestCase):
+    def test_month_range_filter_uses_composite_index(self):
+        user = User.objects.create_user(username='indexed', email='indexed@example.com', password='pw')
+        start, end = month_bounds(2026, 3)
+        plan = Transaction.objects.filter(
+            user=user, category_type='expense', date__gte=start, date__lt=end,
+        ).explain()
+        self.assertIn('txn_user_type_date_idx', plan)
+
+
+@override_settings(INSIGHTS_PRECOMPUTE_ON_WRITE=False)
+class BulkImportTests(TempDirMixin, TestCase):
+    """Statement import: streamed parsing, bulk inserts, one recompute instead of per-row signals."""
+
+    temp_dir_settings = {'TRANSACTION_STORE_DIR': None}
+
+    OFX = """OFXHEADER:100
+<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>
+<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>20260305120000[+5.5:IST]<TRNAMT>-450.00<NAME>UBER TRIP 4411</STMTTRN>
+<STMTTRN>
+<TRNTYPE>CREDIT
+<DTPOSTED>20260301
+<TRNAMT>52000.00
+<NAME>ACME PAYROLL
+</STMTTRN>
+</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>
+"""
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='importer', email='importer@example.com', password='pw')
+        self.client = Client()
+        self.auth_headers = {'HTTP_AUTHORIZATION': f'Bearer {RefreshToken.for_user(self.user).access_token}'}
+
+    def test_csv_upload_skips_bad_rows_and_recomputes_once(self):
+        csv_file = SimpleUploadedFile('statement.csv', (
+            'Date,Description,Category,Type,Amount\n'
+            '2026-03-02,Big Bazaar,Groceries,expense,"1,250.50"\n'
+            '05/03/2026,Corner cafe,Groceries,,-80\n'
+            'someday,Broken row,Groceries,expense,10\n'
+            '2026-03-07,Salary March,Salary,income,50000\n'
+        ).encode())
+        with mock.patch('transactions.utils.check_budget_alert') as alert, \
+                mock.patch('transactions.signals.check_budget_alert') as per_row_alert, \
+                self.captureOnCommitCallbacks(execute=True):
+            res = self.client.post(reverse('import_transactions'), {'file': csv_file}, **self.auth_headers)
+
+        self.assertEqual(res.status_code, 201)
+        body = res.json()
+        self.assertEqual((body['imported'], body['skipped']), (3, 1))
+        self.assertEqual(body['errors'], [{'line': 4, 'error': "Unrecognized date 'someday'"}])
+        alert.assert_called_once_with(self.user)
+        per_row_alert.assert_not_called()
+        self.assertEqual(Category.objects.filter(user=self.user, name='Groceries').count(), 1)
+        self.assertEqual(category_spend(self.user, 2026, 3), {'Groceries': 1330.5})
+        self.assertEqual(len(load_user_frame(self.user.id)), 3)
+
+    def test_ofx_and_json_lines(self):
+        summary = import_transactions(self.user, io.StringIO(self.OFX), detect_format('bank.qfx'))
+        self.assertEqual(summary['imported'], 2)
+        rows = {t.description: t for t in Transaction.objects.filter(user=self.user)}
+        self.assertEqual((rows['UBER TRIP 4411'].category_type, str(rows['UBER TRIP 4411'].amount)), ('expense', '450.00'))
+        self.assertEqual(str(rows['UBER TRIP 4411'].date), '2026-03-05')
+        self.assertEqual(rows['ACME PAYROLL'].category_type, 'income')
+
+        lines = '{"date": "2026-04-01", "amount": 99.5, "description": "Netflix", "category": "Subscriptions"}\n\nnot json\n'
+        summary = import_transactions(self.user, io.StringIO(lines), 'json', dry_run=True)
+        self.assertEqual((summary['imported'], summary['skipped']), (1, 1))
+        self.assertFalse(Transaction.objects.filter(description='Netflix').exists())
+
+    def test_reimport_skips_ledger_rows_but_keeps_identical_ones(self):
+        Transaction.objects.create(
+            user=self.user, date=date(2026, 3, 2), amount=Decimal('80.00'), description='Corner cafe', category_type='expense',
+        )
+        body = (
+            'date,description,amount\n'
+            '2026-03-02,Corner cafe,-80\n'   # already in the ledger
+            '2026-03-03,Metro fare,-20\n'
+            '2026-03-03,Metro fare,-20\n'    # a second, real fare
+            '2026-03-04,Metro fare,-20\n'
+        )
+        summary = import_transactions(self.user, io.StringIO(body), 'csv', chunk_size=2)
+        self.assertEqual((summary['imported'], summary['duplicates'], summary['skipped']), (3, 1, 0))
+        self.assertEqual(summary['duplicate_rows'], [
+            {'line': 2, 'date': '2026-03-02', 'amount': '80.00', 'description': 'Corner cafe'},
+        ])
+
+        summary = import_transactions(self.user, io.StringIO(body), 'csv')
+        self.assertEqual((summary['imported'], summary['duplicates']), (0, 4))
+
+        # An overlapping statement with a third fare that day: only that one is new
+        overlap = 'date,description,amount\n' + '2026-03-03,Metro fare,-20\n' * 3
+        summary = import_transactions(self.user, io.StringIO(overlap), 'csv')
+        self.assertEqual((summary['imported'], summary['duplicates']), (1, 2))
+        self.assertEqual(Transaction.objects.filter(user=self.user, description='Metro fare').count(), 4)
+
+    def test_statement_reference_and_keep_duplicates(self):
+        body = (
+            'date,description,amount,ref\n'
+            '2026-03-03,Metro fare,-20,TXN-1\n'
+            '2026-03-03,Metro fare,-20,TXN-2\n'
+            '2026-03-03,Metro fare,-20,TXN-1\n'   # the same statement line, listed twice
+        )
+        summary = import_transactions(self.user, io.StringIO(body), 'csv')
+        self.assertEqual((summary['imported'], summary['duplicates']), (2, 1))
+        self.assertEqual(summary['duplicate_rows'][0]['line'], 4)
+
+        summary = import_transactions(self.user, io.StringIO(body), 'csv', skip_duplicates=False)
+        self.assertEqual((summary['imported'], summary['duplicates']), (3, 0))
+
+    def test_overlong_category_is_a_row_error(self):
+        body = f'date,description,category,amount\n2026-03-02,Shop,{"x" * 101},-10\n2026-03-02,Shop,Misc,-10\n'
+        summary = import_transactions(self.user, io.StringIO(body), 'csv')
+        self.assertEqual((summary['imported'], summary['skipped']), (1, 1))
+        self.assertEqual(summary['errors'], [{'line': 2, 'error': 'Category name longer than 100 characters'}])
+
+    @tag('benchmark')
+    def test_throughput(self):
+        n_rows = 20_000
+        body = 'date,description,category,amount\n' + ''.join(
+            f'2025-{i % 12 + 1:02d}-{i % 28 + 1:02d},Shop {i % 50},Cat {i % 8},-{i + 10}.25\n' for i in range(n_rows)
+        )
+        summary = import_transactions(self.user, io.StringIO(body), 'csv')
+        print(f"\n[benchmark] bulk import: {n_rows:,} rows {summary['seconds']}s ({summary['rows_per_second']:,.0f} rows/s)")
+        self.assertEqual(summary['imported'], n_rows)
+
+
+class BudgetAlertTests(TestCase):
+    """One alert per threshold crossing per month, from a fixed number of queries."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='alerts', email='alerts@example.com', password='pw')
+        self.food = Category.objects.create(user=self.user, name='Food')
+        self.today = timezone.localdate()
+        Budget.objects.create(user=self.user, category='Food', monthly_limit=1000)
+        Budget.objects.create(user=self.user, category='Rent', monthly_limit=500)
+
+    def spend(self, amount, day=None):
+        return Transaction.objects.create(
+            user=self.user, amount=amount, category=self.food, category_type='expense', date=day or self.today,
+        )
+
+    def messages(self):
+        return list(alerts.objects.filter(user=self.user).values_list('message', flat=True))
+
+    def test_burst_alerts_once_per_threshold(self):
+        self.spend(900, day=self.today.replace(day=1) - timedelta(days=1))  # last month does not count
+        for _ in range(5):
+            self.spend(170)  # 850 this month: crosses 80% once
+        self.assertEqual(len(self.messages()), 1)
+        self.assertIn('85.00% of your budget for Food', self.messages()[0])
+
+        self.spend(200)  # 1050: crosses 100%
+        self.spend(10)
+        self.assertEqual(len(self.messages()), 2)
+
+    def test_drop_below_rearms_threshold_and_query_count_is_fixed(self):
+        txn = self.spend(850)
+        Transaction.objects.filter(pk=txn.pk).update(amount=0)  # no signals: the check below does the reset
+        with self.assertNumQueries(4):  # budgets, grouped spend, states, state reset
+            self.assertEqual(check_budget_alert(self.user), 0)
+        self.spend(850)
+        self.assertEqual(len(self.messages()), 2)
+        with self.assertNumQueries(3):
+            self.assertEqual(check_budget_alert(self.user), 0)
+
+    def test_edits_and_deletes_rearm_and_recross(self):
+        txn = self.spend(850)
+        self.assertEqual(len(self.messages()), 1)
+
+        txn.amount = 300  # edit below 80%...
+        txn.save()
+        txn.amount = 900  # ...and back over it
+        txn.save()
+        self.assertEqual(len(self.messages()), 2)
+
+        txn.delete()
+        self.spend(820)
+        self.assertEqual(len(self.messages()), 3)
+
+        rent = Category.objects.create(user=self.user, name='Rent')
+        moved = self.spend(450)  # Food at 1270: over 100%
+        self.assertEqual(len(self.messages()), 4)
+        moved.category = rent  # moving it counts towards Rent (90%) and re-arms Food's 100%
+        moved.save()
+        self.assertEqual(len(self.messages()), 5)
+        self.assertIn('90.00% of your budget for Rent', self.messages()[-1])
+        moved.category = self.food
+        moved.save()
+        self.assertEqual(len(self.messages()), 6)
@@ -0,0 +1,228 @@
+"""
+TRANSACTIONS MODULE - INCREMENTAL CATEGORIZER TRAINING (transactions/training.py)
+---------------------------------------------------------------------------------
+Online alternative to `categorizer_train.py`, which refits TF-IDF + Naive Bayes
+from scratch over the whole ledger.
+
+The online model pairs a stateless HashingVectorizer (no vocabulary to refit)
+with MultinomialNB trained through `partial_fit`. Each run only streams the
+labeled transactions created or re-labeled since the last checkpoint, in
+chunks straight from the database cursor, and folds them into the existing
+counts. A full run (bootstrap, or when a category the model has never seen
+appears) replays `categories_dataset.csv` and the whole ledger the same way.
+
+The trained pair is written next to the served model with a temp-file rename
+and swapped into this process's CategorizerRegistry; other workers pick it up
+through the registry's on-disk change check.
+"""
+
+import csv
+import json
+import logging
+import os
+from datetime import datetime
+
+from django.conf import settings
+from django.utils import timezone
+
+from .categorizer import AVAILABLE_CATEGORIES, registry
+from .merchants import normalize_description
+
+logger = logging.getLogger(__name__)
+
+HASHING_FEATURES = 2 ** 18
+DEFAULT_CHUNK_SIZE = 5000
+
+
+def checkpoint_path():
+    model_path, _ = registry.paths()
+    return getattr(settings, "CATEGORIZER_CHECKPOINT_PATH", os.path.splitext(model_path)[0] + ".checkpoint.json")
+
+
+def read_checkpoint():
+    """The last run's checkpoint, or None when the served model was not trained online."""
+    try:
+        with open(checkpoint_path(), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _atomic_write(path, write):
+    tmp = path + ".tmp"
+    write(tmp)
+    os.replace(tmp, path)
+
+
+def make_vectorizer():
+    """Stateless features: the same text always hashes to the same columns, so nothing is refit."""
+    from sklearn.feature_extraction.text import HashingVectorizer
+
+    # Non-negative features, as MultinomialNB requires
+    return HashingVectorizer(
+        n_features=HASHING_FEATURES, ngram_range=(1, 2), stop_words="english", alternate_sign=False,
+    )
+
+
+# ==========================================
+# 1. STREAMING TRAINING DATA
+# ==========================================
+
+def iter_dataset_chunks(chunk_size=DEFAULT_CHUNK_SIZE):
+    """(descriptions, categories) chunks from the seed `categories_dataset.csv`."""
+    path = os.path.join(settings.BASE_DIR, "categories_dataset.csv")
+    texts, labels = [], []
+    try:
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                text = normalize_description(row.get("Transaction"))
+                if text and row.get("Category"):
+                    texts.append(text)
+                    labels.append(row["Category"].strip())
+                    if len(texts) >= chunk_size:
+                        yield texts, labels
+                        texts, labels = [], []
+    except OSError as e:
+        logger.warning(f"[CATEGORIZER TRAINING] Could not read seed dataset: {e}")
+    if texts:
+        yield texts, labels
+
+
+def iter_labeled_chunks(since=None, until=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    (descriptions, categories) chunks of labeled transactions whose label was
+    set in [since, until), streamed with a server-side cursor so the ledger is
+    never materialized in memory.
+    """
+    from .models import Transaction
+
+    rows = Transaction.objects.filter(category__isnull=False).exclude(description__isnull=True).exclude(description="")
+    if since is not None:
+        rows = rows.filter(updated_at__gte=since)
+    if until is not None:
+        rows = rows.filter(updated_at__lt=until)
+
+    texts, labels = [], []
+    for description, category in rows.values_list("description", "category__name").iterator(chunk_size=chunk_size):
+        text = normalize_description(description)
+        if text:
+            texts.append(text)
+            labels.append(category)
+            if len(texts) >= chunk_size:
+                yield texts, labels
+                texts, labels = [], []
+    if texts:
+        yield texts, labels
+
+
+def _known_classes():
+    """Every label a full run can encounter; partial_fit needs them all up front."""
+    from .models import Category
+
+    classes = set(AVAILABLE_CATEGORIES) | {"Other"}
+    for _, labels in iter_dataset_chunks():
+        classes.update(labels)
+    classes.update(Category.objects.values_list("name", flat=True).distinct())
+    return sorted(classes)
+
+
+# ==========================================
+# 2. TRAINING RUNS
+# ==========================================
+
+def _current_online_model():
+    """A private copy of the served classifier if it was trained online (hashing features), else None."""
+    import copy
+
+    classifier, vectorizer = registry.get()
+    if classifier is None or read_checkpoint() is None:
+        return None
+    if getattr(vectorizer, "n_features", None) != HASHING_FEATURES or not hasattr(classifier, "partial_fit"):
+        return None
+    # Never partial_fit the instance that is serving predictions
+    return copy.deepcopy(classifier)
+
+
+class _UnseenCategories(Exception):
+    def __init__(self, categories):
+        super().__init__(", ".join(sorted(categories)))
+        self.categories = categories
+
+
+def _partial_fit(classifier, vectorizer, chunks, classes=None):
+    """
+    Streams chunks into `classifier.partial_fit`. `classes` is required on the
+    first call of a fresh model; once fitted, a label outside `classes_` raises
+    _UnseenCategories. Returns the number of samples seen.
+    """
+    seen = 0
+    for texts, labels in chunks:
+        if classes is None:
+            unknown = set(labels).difference(classifier.classes_)
+            if unknown:
+                raise _UnseenCategories(unknown)
+        classifier.partial_fit(vectorizer.transform(texts), labels, classes=classes)
+        classes = None
+        seen += len(texts)
+    return seen
+
+
+def train_incremental(full=False, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Folds labels created or changed since the last checkpoint into the online
+    model, or retrains it from the seed dataset plus the whole ledger when
+    `full` is set, no online model exists yet, or an unseen category appears.
+    Returns a summary dict.
+    """
+    from sklearn.naive_bayes import MultinomialNB
+
+    vectorizer = make_vectorizer()
+    checkpoint = read_checkpoint()
+    classifier = None if full else _current_online_model()
+    until = timezone.now()
+
+    mode = "incremental"
+    if classifier is not None:
+        since = datetime.fromisoformat(checkpoint["trained_until"])
+        try:
+            samples = _partial_fit(classifier, vectorizer, iter_labeled_chunks(since, until, chunk_size))
+        except _UnseenCategories as e:
+            logger.info(f"[CATEGORIZER TRAINING] New categories {sorted(e.categories)}; retraining from scratch")
+            classifier = None
+
+    if classifier is None:
+        mode = "full"
+        classifier = MultinomialNB()
+        classes = _known_classes()
+        samples = _partial_fit(classifier, vectorizer, iter_dataset_chunks(chunk_size), classes)
+        samples += _partial_fit(
+            classifier, vectorizer, iter_labeled_chunks(None, until, chunk_size), None if samples else classes,
+        )
+        total = samples
+    else:
+        total = checkpoint.get("samples", 0) + samples
+
+    swapped = samples > 0
+    if swapped:
+        swap_model(classifier, vectorizer)
+    _write_checkpoint(until, total)
+    logger.info(f"[CATEGORIZER TRAINING] {mode} run: {samples} samples ({total} total)")
+    return {"mode": mode, "samples": samples, "total_samples": total, "swapped": swapped}
+
+
+def _write_checkpoint(until, total):
+    def write(path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"trained_until": until.isoformat(), "samples": total}, f)
+
+    _atomic_write(checkpoint_path(), write)
+
+
+def swap_model(classifier, vectorizer):
+    """Writes the pair over the served pickles (rename, never partial) and swaps it in here."""
+    import joblib
+
+    model_path, vectorizer_path = registry.paths()
+    _atomic_write(vectorizer_path, lambda path: joblib.dump(vectorizer, path))
+    _atomic_write(model_path, lambda path: joblib.dump(classifier, path))
+    registry.swap(classifier, vectorizer)
@@ -8,7 +8,8 @@ It maps endpoints to the views defined in `transactions/views.py`.
 from django.urls import path
 from .views import (
     get_transactions, TransactionListCreateView, TransactionDetailView, CategoryListView,
-    categorize_description
+    categorize_description, categorizer_stats, export_transactions, export_transactions_download,
+    import_transactions,
 )
 from .views import BudgetView, BudgetHistoryView, BudgetDeleteView
 
@@ -20,6 +21,9 @@ urlpatterns = [
     path('', TransactionListCreateView.as_view(), name='transaction_list_create'),
     path('get-transactions/', get_transactions, name='get_transactions'),
     path('<int:pk>/', TransactionDetailView.as_view(), name='transaction_detail'),
+    path('export/', export_transactions, name='export_transactions'),
+    path('export/<str:token>/', export_transactions_download, name='export_transactions_download'),
+    path('import/', import_transactions, name='import_transactions'),
 
     # ==========================================
     # 2. CATEGORIES
@@ -40,4 +44,5 @@ urlpatterns = [
     # Endpoints to interface with the Local ML model for transaction tagging.
     # ==========================================
     path('categorize/', categorize_description, name='categorize_description'),
+    path('categorize/stats/', categorizer_stats, name='categorizer_stats'),
 ]
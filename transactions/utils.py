@@ -1,50 +1,79 @@
 # transactions/utils.py
 from .models import alerts, Budget, Transaction
 from django.db.models import Sum
-import joblib
 import os
 import csv
 from django.conf import settings
 
-def check_budget_alert(user):
-    budgets = Budget.objects.filter(user=user)
-    for budget in budgets:
-        spent = Transaction.objects.filter(
-            user=user, category__name=budget.category, category_type='expense'
-        ).aggregate(Sum('amount'))['amount__sum'] or 0
-        
-        usage_percentage = (float(spent) / float(budget.monthly_limit)) * 100 if budget.monthly_limit > 0 else 0
-        
-        if usage_percentage >= 80:
-            alerts.objects.create(
-                user=user,
-                message=f"You have used {usage_percentage:.2f}% of your budget for {budget.category}. Consider reviewing your spending."
-            )
-
-
+# Usage percentages that raise a budget alert, each at most once per budget and month
+BUDGET_ALERT_THRESHOLDS = (80, 100)
 
-# Load the model and vectorizer at startup
 
-BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-
-MODEL_PATH = os.path.join(BASE_DIR, "transaction_classifier.pkl")
-VECTORIZER_PATH = os.path.join(BASE_DIR, "transaction_vectorizer.pkl")
+def check_budget_alert(user, categories=None, today=None):
+    """
+    Raises an alert for every budget whose current-month usage has crossed a
+    threshold it has not been alerted for yet. Only the budgets of
+    `categories` (names) are evaluated when given. Runs a fixed number of
+    queries: budgets, one grouped spend query and the alert states, plus
+    writes for actual crossings. Returns the number of alerts created.
+    """
+    from django.utils import timezone
+    from .aggregates import month_bounds
+    from .models import BudgetAlertState
 
-classifier = joblib.load(MODEL_PATH)
-vectorizer = joblib.load(VECTORIZER_PATH)
+    today = today or timezone.localdate()
+    budgets = Budget.objects.filter(user=user, monthly_limit__gt=0)
+    if categories is not None:
+        budgets = budgets.filter(category__in=list(categories))
+    budgets = list(budgets)
+    if not budgets:
+        return 0
 
+    start, end = month_bounds(today.year, today.month)
+    spent = dict(
+        Transaction.objects.filter(
+            user=user, category_type='expense', date__gte=start, date__lt=end,
+            category__name__in={b.category for b in budgets},
+        ).values_list('category__name').annotate(total=Sum('amount')).order_by()
+    )
+    alerted = dict(
+        BudgetAlertState.objects.filter(budget__in=budgets, year=today.year, month=today.month)
+        .values_list('budget_id', 'threshold')
+    )
 
-def categorize_transaction(description):
-    """Predicts category for a given transaction description"""
-    X_new = vectorizer.transform([description])
-    predicted_category = classifier.predict(X_new)[0]
-    return predicted_category
+    created = 0
+    for budget in budgets:
+        usage_percentage = float(spent.get(budget.category) or 0) / float(budget.monthly_limit) * 100
+        crossed = max((t for t in BUDGET_ALERT_THRESHOLDS if usage_percentage >= t), default=0)
+        previous = alerted.get(budget.id)
+        if crossed == (previous or 0):
+            continue
+        state = BudgetAlertState.objects.filter(budget=budget, year=today.year, month=today.month)
+        if crossed < (previous or 0):
+            # Spend went back down (deleted/edited rows): the next crossing alerts again
+            state.update(threshold=crossed)
+            continue
+        # Claim the crossing atomically so concurrent writes alert only once
+        if previous is None:
+            _, claimed = BudgetAlertState.objects.get_or_create(
+                budget=budget, year=today.year, month=today.month, defaults={'threshold': crossed},
+            )
+        else:
+            claimed = state.filter(threshold__lt=crossed).update(threshold=crossed) > 0
+        if claimed:
+            alerts.objects.create(
+                user=user,
+                message=f"You have used {usage_percentage:.2f}% of your budget for {budget.category}. Consider reviewing your spending."
+            )
+            created += 1
+    return created
 
 
 def export_all_transactions_to_csv():
     """
     Exports all transactions across the entire platform to a single unified CSV file.
-    Runs asynchronously via a debounced Django signal whenever any transaction is modified.
+    Intended for offline analysis only — the insights models read the per-user
+    partitions in transactions/store.py, which signals keep current incrementally.
     """
     dataset_dir = os.path.join(settings.BASE_DIR, 'media', 'datasets')
     os.makedirs(dataset_dir, exist_ok=True)
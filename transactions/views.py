@@ -11,7 +11,7 @@ It is organized into four main sections:
 
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from django.utils.timezone import now
 from django.http import JsonResponse, HttpResponse
 from django.db.models import Sum
@@ -95,21 +95,65 @@ class TransactionListCreateView(generics.ListCreateAPIView):
 
         return queryset
 
+    def get_serializer(self, *args, **kwargs):
+        # A JSON array POST creates many transactions in one request, up to TRANSACTIONS_MAX_BATCH_SIZE
+        if isinstance(kwargs.get('data'), list):
+            limit = getattr(settings, 'TRANSACTIONS_MAX_BATCH_SIZE', 1000)
+            if len(kwargs['data']) > limit:
+                raise serializers.ValidationError(
+                    {'error': f'At most {limit} transactions per request; use the import endpoint for larger batches.'}
+                )
+            kwargs['many'] = True
+        return super().get_serializer(*args, **kwargs)
+
     def perform_create(self, serializer):
-        # Auto-categorize if description is provided but category is missing
+        from .categorizer import queue_category_refinement
+
+        if isinstance(serializer.validated_data, list):
+            auto = self._categorize_rows(serializer.validated_data)
+            created = serializer.save(user=self.request.user)
+            queue_category_refinement([created[i] for i in auto])
+            return
+
+        # Auto-categorize if description is provided but category is missing.
+        # Naive Bayes answers now; Gemini refines the category in the background.
         instance = serializer.validated_data
         if 'description' in instance and not instance.get('category'):
             try:
                 from .categorizer import categorize_transaction
-                predicted_cat_name = categorize_transaction(instance['description'])
+                predicted_cat_name = categorize_transaction(instance['description'], user=self.request.user)
                 cat, _ = Category.objects.get_or_create(user=self.request.user, name=predicted_cat_name)
-                serializer.save(user=self.request.user, category=cat)
+                created = serializer.save(user=self.request.user, category=cat)
+                queue_category_refinement([created])
                 return
             except Exception as e:
                 import logging
                 logging.getLogger(__name__).error(f"Failed to auto-categorize: {e}")
         serializer.save(user=self.request.user)
 
+    def _categorize_rows(self, rows):
+        """
+        Fills in missing categories for a batch of rows with one categorize_many
+        call. Returns the positions of the rows that were auto-categorized.
+        """
+        positions = [i for i, row in enumerate(rows) if row.get('description') and not row.get('category')]
+        uncategorized = [rows[i] for i in positions]
+        if not uncategorized:
+            return []
+        try:
+            from .categorizer import categorize_many
+            names = categorize_many([row['description'] for row in uncategorized], user=self.request.user)
+            categories = {c.name: c for c in Category.objects.filter(user=self.request.user, name__in=set(names))}
+            for name in set(names) - set(categories):
+                categories[name] = Category.objects.create(user=self.request.user, name=name)
+            for row, name in zip(uncategorized, names):
+                row['category'] = categories[name]
+            return positions
+        except Exception as e:
+            import logging
+            logging.getLogger(__name__).error(f"Failed to auto-categorize batch: {e}")
+            return []
+
 
 
 # View for fetching, updating and deleting a transaction
@@ -120,6 +164,14 @@ class TransactionDetailView(generics.RetrieveUpdateDestroyAPIView):
     def get_queryset(self):
         return Transaction.objects.filter(user=self.request.user)
 
+    def perform_update(self, serializer):
+        # A manual category change is a confirmed correction: learn it as a per-user rule
+        previous_category_id = serializer.instance.category_id
+        instance = serializer.save()
+        if instance.category_id and instance.category_id != previous_category_id and instance.description:
+            from .merchants import record_correction
+            record_correction(instance.user_id, instance.description, instance.category.name)
+
     def perform_destroy(self, instance):
         DeletedTransaction.objects.create(
             user=instance.user,
@@ -132,6 +184,52 @@ class TransactionDetailView(generics.RetrieveUpdateDestroyAPIView):
         instance.delete()
 
 
+# Streamed CSV export of the user's ledger (?start_date=&end_date=, ?compress=gzip, ?mode=file)
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def export_transactions(request):
+    from datetime import date
+    from backend.exports import export_response
+
+    params = {'user_id': str(request.user.pk)}
+    for key in ('start_date', 'end_date'):
+        value = request.query_params.get(key)
+        if value:
+            try:
+                params[key] = date.fromisoformat(value).isoformat()
+            except ValueError:
+                return Response({'error': f'{key} must be YYYY-MM-DD'}, status=400)
+    return export_response(request, 'transactions.exports.transactions', params, 'transactions.csv', 'export_transactions_download')
+
+
+# Status / download of a background transaction export
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def export_transactions_download(request, token):
+    from backend.exports import export_job_response
+    return export_job_response(request, token)
+
+
+# Bulk import of a CSV / OFX / JSON statement (multipart `file`, optional `format`;
+# `keep_duplicates=true` imports rows even when the ledger already holds them)
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def import_transactions(request):
+    from .importer import detect_format, import_transactions as run_import
+
+    upload = request.FILES.get('file')
+    if upload is None:
+        return Response({'error': 'Attach the statement as `file`.'}, status=400)
+    try:
+        fmt = detect_format(upload.name, request.data.get('format'))
+        stream = io.TextIOWrapper(upload.file, encoding='utf-8-sig', errors='replace', newline='')
+        keep_duplicates = str(request.data.get('keep_duplicates', '')).lower() in ('1', 'true', 'yes')
+        summary = run_import(request.user, stream, fmt, skip_duplicates=not keep_duplicates)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=400)
+    return Response(summary, status=201)
+
+
 # ==========================================
 # 2. CATEGORIES MODULE
 # Manages the list of available categories. Auto-provisions the user's account
@@ -187,20 +285,12 @@ class BudgetView(generics.ListCreateAPIView):
 
     def list(self, request, *args, **kwargs):
         from django.utils.timezone import now
-        from django.db.models import Sum
         user = request.user
         today = now()
 
-        # Aggregate actual spending per category for the current month
-        monthly_spent = {
-            item['category__name']: float(item['total'])
-            for item in Transaction.objects.filter(
-                user=user,
-                category_type='expense',
-                date__year=today.year,
-                date__month=today.month
-            ).values('category__name').annotate(total=Sum('amount'))
-        }
+        # Actual spending per category for the current month (monthly rollup)
+        from .aggregates import category_spend
+        monthly_spent = category_spend(user, today.year, today.month)
 
         budgets = self.get_queryset()
         result = []
@@ -259,22 +349,55 @@ class BudgetHistoryView(generics.ListAPIView):
 # Utility endpoints that interface with the machine learning models.
 # ==========================================
 
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def categorize_description(request):
     """
     Accepts a transaction description and returns the predicted category name.
     Used for live auto-selection in the Add Transaction modal.
+
+    Batch variant: POST {"descriptions": [...]} returns {"categories": [...]}
+    in the same order, predicted in one Naive Bayes pass (see categorize_many).
     """
+    descriptions = request.data.get('descriptions')
+    if descriptions is not None:
+        limit = getattr(settings, 'TRANSACTIONS_MAX_BATCH_SIZE', 1000)
+        if not isinstance(descriptions, list) or len(descriptions) > limit:
+            return Response(
+                {'error': f'descriptions must be a list of at most {limit} strings.'},
+                status=400,
+            )
+        try:
+            from .categorizer import categorize_many
+            return Response({'categories': categorize_many([str(d or '') for d in descriptions], user=request.user)})
+        except Exception as e:
+            import logging
+            logging.getLogger(__name__).error(f"Categorize endpoint error: {e}")
+            return Response({'categories': ['Other'] * len(descriptions)})
+
     description = request.data.get('description', '').strip()
     if not description:
         return Response({'category': 'Other'})
 
     try:
         from .categorizer import categorize_transaction
-        predicted = categorize_transaction(description)
+        predicted = categorize_transaction(description, user=request.user)
         return Response({'category': predicted})
     except Exception as e:
         import logging
         logging.getLogger(__name__).error(f"Categorize endpoint error: {e}")
         return Response({'category': 'Other'})
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def categorizer_stats(request):
+    """Hit rates of this worker's categorizer (merchant/rule fast path, Naive Bayes cache) and model load state."""
+    from .categorizer import prediction_cache, registry
+    from .merchants import fast_path_stats
+    return Response({
+        'fast_path': fast_path_stats.snapshot(),
+        'naive_bayes_cache': prediction_cache.stats(),
+        'model': registry.stats(),
+    })